@@ -3,10 +3,12 @@
 import os
 
 from flask import Flask
-import os
-from flask import Flask
+
 import Movie.adapters.repository as repo
-from Movie.adapters.memory_repository import MemoryRepository, populate
+from Movie.adapters.memory_repository import MemoryRepository, populate, populate_from_snapshot
+from Movie.adapters.shared_repository import populate_from_shared_catalogue
+from Movie.adapters.sqlite_repository import SqliteRepository
+from Movie.adapters.journal import Journal, replay_journal
 
 
 def create_app(test_config=None):
@@ -25,9 +27,30 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    # Create the configured repository: an SQLite database shared by every worker, a MemoryRepository per worker over a
+    # catalogue file they all map, or a MemoryRepository per worker, loaded from a snapshot if one is configured.
+    snapshot_path = app.config.get('REPOSITORY_SNAPSHOT')
+    if app.config.get('REPOSITORY') == 'sqlite':
+        sqlite_repo = repo.repo_instance = SqliteRepository(app.config['SQLITE_DATABASE'])
+        sqlite_repo.populate_if_empty(data_path)
+        sqlite_repo.release_connection()
+
+        # Each request hands its thread's connection back when it ends, so that threads started per request don't
+        # each keep one open.
+        app.teardown_appcontext(lambda exception: sqlite_repo.release_connection())
+    elif app.config.get('REPOSITORY') == 'shared':
+        repo.repo_instance = populate_from_shared_catalogue(data_path, app.config['SHARED_CATALOGUE'])
+    elif snapshot_path:
+        repo.repo_instance = populate_from_snapshot(data_path, snapshot_path)
+    else:
+        repo.repo_instance = MemoryRepository()
+        populate(data_path, repo.repo_instance)
+
+    # Replay the users and comments written since the data files were last compacted, then record new ones.
+    journal_path = app.config.get('REPOSITORY_JOURNAL')
+    if journal_path and isinstance(repo.repo_instance, MemoryRepository):
+        replay_journal(journal_path, repo.repo_instance)
+        repo.repo_instance.attach_journal(Journal(journal_path))
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -35,10 +58,27 @@ def create_app(test_config=None):
         from .home import home
         app.register_blueprint(home.home_blueprint)
 
-        from .movie import movies
+        from .movie import movies, services
         app.register_blueprint(movies.movies_blueprint)
 
+        # Pages and movies rendered from any previous repository instance are stale.
+        services.clear_rendered_pages()
+        services.clear_movie_dicts()
+
         from .authentication import authentication
         app.register_blueprint(authentication.authentication_blueprint)
 
+        from .search import search
+        app.register_blueprint(search.search_blueprint)
+
+        from .stats import stats
+        app.register_blueprint(stats.stats_blueprint)
+
+        from .actors import actors
+        app.register_blueprint(actors.actors_blueprint)
+
+        from .recommendations import recommendations, services as recommendation_services
+        app.register_blueprint(recommendations.recommendations_blueprint)
+        recommendation_services.clear_recommendations()
+
     return app
@@ -0,0 +1,54 @@
+from flask import Blueprint
+from flask import request, jsonify, abort, url_for
+
+import Movie.adapters.repository as repo
+import Movie.actors.services as services
+
+
+# Configure Blueprint.
+actors_blueprint = Blueprint(
+    'actors_bp', __name__)
+
+
+# Upper bound on the number of collaborators listed.
+MAX_COLLABORATORS = 50
+
+
+@actors_blueprint.route('/actors/worked_with', methods=['GET'])
+def worked_with():
+    # Answers e.g. /actors/worked_with?actor=Christian+Bale&colleague=Michael+Caine
+    try:
+        return jsonify(services.worked_with(
+            request.args.get('actor', ''), request.args.get('colleague', ''), repo.repo_instance))
+    except services.UnknownActorException as error:
+        abort(404, 'No actor named {}'.format(error))
+
+
+@actors_blueprint.route('/actors/collaborators', methods=['GET'])
+def collaborators():
+    # Answers e.g. /actors/collaborators?actor=Christian+Bale&limit=5
+    actor = request.args.get('actor', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_COLLABORATORS)
+
+    try:
+        result = services.get_top_collaborators(actor, repo.repo_instance, limit)
+    except services.UnknownActorException as error:
+        abort(404, 'No actor named {}'.format(error))
+
+    return jsonify({'actor': actor, 'collaborators': result})
+
+
+@actors_blueprint.route('/actors/separation', methods=['GET'])
+def separation():
+    # Answers e.g. /actors/separation?from=Chris+Pratt&to=Meryl+Streep
+    try:
+        result = services.get_degrees_of_separation(
+            request.args.get('from', ''), request.args.get('to', ''), repo.repo_instance)
+    except services.UnknownActorException as error:
+        abort(404, 'No actor named {}'.format(error))
+
+    for step in result['path']:
+        if step['movie'] is not None:
+            step['movie']['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=step['movie']['rank'])
+
+    return jsonify(result)
@@ -0,0 +1,56 @@
+from Movie.adapters.repository import AbstractRepository
+from Movie.domain.actor import Actor
+
+
+class UnknownActorException(Exception):
+    pass
+
+
+def worked_with(actor_name: str, colleague_name: str, repo: AbstractRepository):
+    actor = get_actor(actor_name, repo)
+    colleague = get_actor(colleague_name, repo)
+
+    return {
+        'actor': actor.actor_full_name,
+        'colleague': colleague.actor_full_name,
+        'worked_with': actor.check_if_this_actor_worked_with(colleague),
+        'shared_movies': actor.number_of_shared_movies(colleague)
+    }
+
+
+def get_top_collaborators(actor_name: str, repo: AbstractRepository, limit: int = 10):
+    actor = get_actor(actor_name, repo)
+    collaborators = repo.get_costar_graph().top_collaborators(actor, limit)
+
+    return [{'actor': colleague.actor_full_name, 'shared_movies': shared_movies}
+            for colleague, shared_movies in collaborators]
+
+
+def get_degrees_of_separation(source_name: str, target_name: str, repo: AbstractRepository):
+    source = get_actor(source_name, repo)
+    target = get_actor(target_name, repo)
+    path = repo.get_costar_graph().shortest_path(source, target)
+
+    if path is None:
+        return {'degrees': None, 'path': []}
+
+    # Name a movie linking each actor on the path to the next.
+    links = [shared_movie(actor, colleague, repo) for actor, colleague in zip(path, path[1:])]
+    return {
+        'degrees': len(path) - 1,
+        'path': [{'actor': actor.actor_full_name,
+                  'movie': None if movie is None else {'rank': movie.rank, 'title': movie.title}}
+                 for actor, movie in zip(path, links + [None])]
+    }
+
+
+def get_actor(actor_name: str, repo: AbstractRepository) -> Actor:
+    actor = repo.get_costar_graph().get_actor(Actor(actor_name))
+    if actor is None:
+        raise UnknownActorException(actor_name)
+    return actor
+
+
+def shared_movie(actor: Actor, colleague: Actor, repo: AbstractRepository):
+    # Returns the best ranked movie featuring both actors.
+    return next((movie for movie in repo.get_movie_by_actor(actor) if colleague in movie.actors), None)
@@ -0,0 +1,90 @@
+import heapq
+import re
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
+
+
+NON_WORD_PATTERN = re.compile(r'[^a-z0-9]+')
+
+# Highest number of completions returned for a prefix.
+MAX_COMPLETIONS = 10
+
+# Prefixes up to this length match so many keys that their best completions are precomputed.
+PRECOMPUTED_PREFIX_LENGTH = 3
+
+
+def normalise(text: str) -> str:
+    return NON_WORD_PATTERN.sub(' ', (text or '').lower()).strip()
+
+
+class PrefixIndex:
+    """ Completes prefixes of any word in the names of a set of items, best scoring items first.
+
+    Every word of every name starts a key, such as 'galaxy' and 'of the galaxy' for 'Guardians of the Galaxy'. The keys
+    are held in a sorted array, so the keys beginning with a prefix form a range found by bisection. The best items for
+    short prefixes, whose ranges are long, are precomputed.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, float, object]]):
+        # items are (name, score, value) triples; higher scores complete first.
+        self.__values = list()
+        self.__scores = list()
+        keys = list()
+        for name, score, value in items:
+            position = len(self.__values)
+            self.__values.append(value)
+            self.__scores.append(score)
+            words = normalise(name).split(' ')
+            for start in range(len(words)):
+                if words[start] != '':
+                    keys.append((' '.join(words[start:]), position))
+
+        keys.sort()
+        self.__keys = [key for key, _ in keys]
+        self.__positions = [position for _, position in keys]
+
+        candidates = dict()
+        for key, position in keys:
+            for length in range(1, min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                candidates.setdefault(key[:length], set()).add(position)
+        self.__precomputed = {prefix: self.best(positions, MAX_COMPLETIONS) for prefix, positions in candidates.items()}
+
+    def best(self, positions: Iterable[int], limit: int) -> List[int]:
+        # Break ties between equal scores by the order the items were given in.
+        return heapq.nsmallest(limit, positions, key=lambda position: (-self.__scores[position], position))
+
+    def complete(self, prefix: str, limit: int = MAX_COMPLETIONS) -> List[object]:
+        prefix = normalise(prefix)
+        limit = min(limit, MAX_COMPLETIONS)
+        if prefix == '' or limit < 1:
+            return []
+
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            positions = self.__precomputed.get(prefix, [])[:limit]
+        else:
+            start = bisect_left(self.__keys, prefix)
+            end = bisect_left(self.__keys, prefix + '\uffff', start)
+            positions = self.best(set(self.__positions[start:end]), limit)
+        return [self.__values[position] for position in positions]
+
+
+class AutocompleteIndex:
+    """ Completes prefixes of movie titles, ranked by votes, and of actor and director names, ranked by the total
+    votes of their movies.
+    """
+
+    def __init__(self, movies, actors, directors, movies_by_actor, movies_by_director):
+        self.__titles = PrefixIndex((movie.title, movie.votes or 0, movie) for movie in movies)
+        self.__actors = PrefixIndex(
+            (actor.actor_full_name, sum(movie.votes or 0 for movie in movies_by_actor(actor)), actor)
+            for actor in actors)
+        self.__directors = PrefixIndex(
+            (director.director_full_name, sum(movie.votes or 0 for movie in movies_by_director(director)), director)
+            for director in directors)
+
+    def complete(self, prefix: str, limit: int = MAX_COMPLETIONS) -> dict:
+        return {
+            'titles': self.__titles.complete(prefix, limit),
+            'actors': self.__actors.complete(prefix, limit),
+            'directors': self.__directors.complete(prefix, limit)
+        }
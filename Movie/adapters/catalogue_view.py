@@ -0,0 +1,94 @@
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Iterable, Optional, Tuple
+
+from Movie.domain.movie import Movie
+
+
+class CatalogueView:
+    """ One version of the catalogue: its movies in rank order, indexed by rank, and the generation it belongs to.
+
+    A view never changes once built. Adding movies builds a new view of the next generation, which the repository
+    publishes by replacing its reference to the current one, so a reader that takes the reference sees a consistent
+    catalogue for as long as it holds it, without locking.
+    """
+
+    __slots__ = ('__generation', '__movies', '__movie_index')
+
+    def __init__(self, movies: Tuple[Movie, ...] = (), generation: int = 0):
+        self.__generation = generation
+        self.__movies = movies
+        self.__movie_index = MappingProxyType({movie.rank: movie for movie in movies})
+
+    def __getstate__(self):
+        return self.__movies, self.__generation
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def movies(self) -> Tuple[Movie, ...]:
+        return self.__movies
+
+    def with_movies(self, movies: Iterable[Movie]) -> 'CatalogueView':
+        """ Returns the next generation's view, holding this view's movies and movies. """
+        # The stored and new movies are each in rank order, so the sort merges two runs in linear time.
+        merged = list(self.__movies)
+        merged.extend(sorted(movies))
+        merged.sort()
+        return CatalogueView(tuple(merged), self.__generation + 1)
+
+    def get_movie(self, rank: int) -> Optional[Movie]:
+        return self.__movie_index.get(rank)
+
+    def movies_with_rank(self, rank: int) -> Tuple[Movie, ...]:
+        probe = rank_probe(rank)
+        return self.__movies[bisect_left(self.__movies, probe):bisect_right(self.__movies, probe)]
+
+    def page(self, start_rank: int = None, limit: int = 1):
+        """ Returns the limit movies from the first whose rank is not less than start_rank, and the first ranks of the
+        previous and next pages, or None where there is no such page.
+        """
+        movies = self.__movies
+        start = 0 if start_rank is None else bisect_left(movies, rank_probe(start_rank))
+        end = start + limit
+
+        previous_rank = movies[max(start - limit, 0)].rank if start > 0 else None
+        next_rank = movies[end].rank if end < len(movies) else None
+        return movies[start:end], previous_rank, next_rank
+
+    def neighbouring_ranks(self, rank: int):
+        """ Returns the ranks of the movies immediately before and after rank, or None where there is no such movie.
+
+        Ranks need not be contiguous, and rank itself need not belong to a movie in the view.
+        """
+        movies = self.__movies
+        probe = rank_probe(rank)
+        before = bisect_left(movies, probe)
+        after = bisect_right(movies, probe)
+
+        previous_rank = movies[before - 1].rank if before > 0 else None
+        next_rank = movies[after].rank if after < len(movies) else None
+        return previous_rank, next_rank
+
+    def __len__(self):
+        return len(self.__movies)
+
+
+def rank_probe(rank: int) -> Movie:
+    # Returns a bare Movie that sorts alongside stored movies of the given rank, for bisecting a list of movies.
+    return Movie(
+        rank=rank,
+        title=None,
+        description=None,
+        year=None,
+        duration=None,
+        rating=None,
+        votes=None,
+        revenue=None,
+        metascore=None
+    )
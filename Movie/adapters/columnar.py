@@ -0,0 +1,143 @@
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+
+# The NumPy type of each numeric Movie attribute. Attributes that can be missing are floats, holding NaN when missing.
+COLUMN_TYPES = (
+    ('rank', np.int64),
+    ('year', np.int32),
+    ('duration', np.int32),
+    ('rating', np.float64),
+    ('votes', np.int64),
+    ('revenue', np.float64),
+    ('metascore', np.float64)
+)
+
+
+def column_value(value):
+    return np.nan if value is None else value
+
+
+class MovieColumns:
+    """ The numeric attributes of a sequence of Movies, held as one typed NumPy array per attribute.
+
+    Element i of every array describes the Movie at position i of the sequence, so a boolean mask or an array of
+    positions selects the same Movies from each column. Missing revenues and metascores are NaN, which no range
+    includes and aggregates ignore.
+    """
+
+    def __init__(self, movies: Sequence[Movie], movies_by_genre: Mapping[Genre, List[Movie]]):
+        self.__movies = list(movies)
+        self.__columns = {
+            attribute: np.array([column_value(getattr(movie, attribute)) for movie in self.__movies], dtype=dtype)
+            for attribute, dtype in COLUMN_TYPES
+        }
+
+        # Genre membership as parallel arrays of (Movie position, genre number) pairs, so that per-genre aggregates
+        # are computed with one bincount rather than a loop over genres.
+        position_of = {id(movie): position for position, movie in enumerate(self.__movies)}
+        self.__genres = list(movies_by_genre)
+        member_positions = list()
+        member_genres = list()
+        for number, genre in enumerate(self.__genres):
+            for movie in movies_by_genre[genre]:
+                if id(movie) in position_of:
+                    member_positions.append(position_of[id(movie)])
+                    member_genres.append(number)
+        self.__member_positions = np.array(member_positions, dtype=np.int64)
+        self.__member_genres = np.array(member_genres, dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, movies: Sequence[Movie], columns: Mapping[str, np.ndarray], genres: List[Genre],
+                    member_positions: np.ndarray, member_genres: np.ndarray) -> 'MovieColumns':
+        """ Returns the columns of movies from arrays already built, such as those of a SharedCatalogue, without
+        copying them. Genre membership is given as parallel arrays of Movie positions and indexes into genres.
+        """
+        movie_columns = cls.__new__(cls)
+        movie_columns.__movies = movies
+        movie_columns.__columns = {attribute: columns[attribute] for attribute, _ in COLUMN_TYPES}
+        movie_columns.__genres = list(genres)
+        movie_columns.__member_positions = member_positions
+        movie_columns.__member_genres = member_genres
+        return movie_columns
+
+    def __len__(self):
+        return len(self.__movies)
+
+    def column(self, attribute: str) -> np.ndarray:
+        return self.__columns[attribute]
+
+    def movies_at(self, positions: Sequence[int]) -> List[Movie]:
+        return [self.__movies[position] for position in positions]
+
+    def range_mask(self, attribute: str, low=None, high=None) -> np.ndarray:
+        """ Returns a mask of the Movies whose attribute lies in the inclusive range; either bound may be None. """
+        column = self.__columns[attribute]
+        mask = ~np.isnan(column) if column.dtype.kind == 'f' else np.ones(len(column), dtype=bool)
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column <= high
+        return mask
+
+    def genre_mask(self, genre: Genre) -> np.ndarray:
+        mask = np.zeros(len(self.__movies), dtype=bool)
+        if genre in self.__genres:
+            number = self.__genres.index(genre)
+            mask[self.__member_positions[self.__member_genres == number]] = True
+        return mask
+
+    def top_k(self, attribute: str, k: int, mask: np.ndarray = None, descending: bool = True) -> np.ndarray:
+        """ Returns the positions of the k Movies, among those selected by mask, with the highest (or lowest)
+        values of attribute, in order.
+        """
+        column = self.__columns[attribute].astype(np.float64)
+        selected = self.range_mask(attribute) if mask is None else mask & self.range_mask(attribute)
+        positions = np.flatnonzero(selected)
+        if k <= 0 or len(positions) == 0:
+            return positions[:0]
+
+        values = -column[positions] if descending else column[positions]
+        if k < len(positions):
+            candidates = np.argpartition(values, k - 1)[:k]
+        else:
+            candidates = np.arange(len(positions))
+        # Order the selected candidates by value, then by position, i.e. rank.
+        order = np.lexsort((positions[candidates], values[candidates]))
+        return positions[candidates[order]]
+
+    def mean_by_genre(self, attribute: str, mask: np.ndarray = None) -> Dict[Genre, float]:
+        """ Returns the mean of attribute over each genre's Movies, among those selected by mask, or None for a genre
+        with no values.
+        """
+        values = self.__columns[attribute].astype(np.float64)[self.__member_positions]
+        present = ~np.isnan(values)
+        if mask is not None:
+            present &= mask[self.__member_positions]
+
+        genres = self.__member_genres[present]
+        totals = np.bincount(genres, weights=values[present], minlength=len(self.__genres))
+        counts = np.bincount(genres, minlength=len(self.__genres))
+        return {genre: (float(totals[number] / counts[number]) if counts[number] > 0 else None)
+                for number, genre in enumerate(self.__genres)}
+
+    def total_by(self, group_attribute: str, attribute: str = None, mask: np.ndarray = None) -> Dict[int, float]:
+        """ Returns, for each value of group_attribute, the sum of attribute over its Movies, or the number of its
+        Movies if attribute is None. Missing values count as zero.
+        """
+        groups = self.__columns[group_attribute]
+        if attribute is None:
+            weights = np.ones(len(groups), dtype=np.float64)
+        else:
+            weights = np.nan_to_num(self.__columns[attribute].astype(np.float64))
+        if mask is not None:
+            groups = groups[mask]
+            weights = weights[mask]
+
+        keys, inverse = np.unique(groups, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights, minlength=len(keys))
+        return {int(key): float(total) for key, total in zip(keys, totals)}
@@ -0,0 +1,109 @@
+from heapq import nsmallest
+from typing import Iterable, List, Optional, Tuple
+
+from Movie.domain.actor import Actor
+from Movie.domain.movie import Movie
+
+
+class CostarGraph:
+    """ Graph linking each Actor to the Actors they have shared a movie with.
+
+    The adjacency is held by the Actors themselves, as a map from colleague to the number of shared movies; the
+    graph interns the Actors so that equal Actors share one node.
+    """
+
+    def __init__(self, movies: Iterable[Movie] = ()):
+        self.__actors = dict()
+        for movie in movies:
+            self.add_movie(movie)
+
+    def __len__(self):
+        return len(self.__actors)
+
+    def __getstate__(self):
+        # Pickled as a flat edge list; pickling the Actors' own colleague maps would recurse along every path.
+        return list(self.__actors), [(actor, colleague, shared_movies)
+                                     for actor in self.__actors
+                                     for colleague, shared_movies in actor.actor_colleagues.items()
+                                     if actor < colleague]
+
+    def __setstate__(self, state):
+        actors, edges = state
+        self.__actors = {actor: actor for actor in actors}
+        for actor, colleague, shared_movies in edges:
+            actor.add_actor_colleague(colleague, shared_movies)
+            colleague.add_actor_colleague(actor, shared_movies)
+
+    def add_movie(self, movie: Movie):
+        cast = [self.__actors.setdefault(actor, actor) for actor in set(movie.actors)]
+        for actor in cast:
+            for colleague in cast:
+                if colleague is not actor:
+                    actor.add_actor_colleague(colleague)
+
+    def get_actor(self, actor: Actor) -> Optional[Actor]:
+        return self.__actors.get(actor)
+
+    def worked_with(self, actor: Actor, colleague: Actor) -> bool:
+        actor = self.__actors.get(actor)
+        return actor is not None and actor.check_if_this_actor_worked_with(colleague)
+
+    def top_collaborators(self, actor: Actor, n: int = 10) -> List[Tuple[Actor, int]]:
+        """ Returns the n colleagues sharing most movies with actor, with the number shared, ties broken by name. """
+        actor = self.__actors.get(actor)
+        if actor is None:
+            return []
+        return nsmallest(n, actor.actor_colleagues.items(), key=lambda item: (-item[1], item[0].actor_full_name))
+
+    def shortest_path(self, source: Actor, target: Actor) -> Optional[List[Actor]]:
+        """ Returns a shortest chain of co-stars from source to target, both included, or None if there isn't one.
+
+        The search runs breadth-first from both ends, always expanding the smaller frontier, so it visits roughly
+        the square root of the nodes a one-sided search would.
+        """
+        source = self.__actors.get(source)
+        target = self.__actors.get(target)
+        if source is None or target is None:
+            return None
+        if source is target:
+            return [source]
+
+        # Each actor reached maps to the actor it was reached from.
+        forward_parents = {source: None}
+        backward_parents = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = expand(forward_frontier, forward_parents, backward_parents)
+            else:
+                backward_frontier, meeting = expand(backward_frontier, backward_parents, forward_parents)
+            if meeting is not None:
+                return path_to(meeting, forward_parents)[::-1] + path_to(backward_parents[meeting], backward_parents)
+        return None
+
+    def degrees_of_separation(self, source: Actor, target: Actor) -> Optional[int]:
+        path = self.shortest_path(source, target)
+        return None if path is None else len(path) - 1
+
+
+def expand(frontier, parents, other_parents):
+    # Advances one breadth-first level, returning the next frontier and an actor both searches have reached.
+    next_frontier = []
+    for actor in frontier:
+        for colleague in actor.actor_colleagues:
+            if colleague not in parents:
+                parents[colleague] = actor
+                if colleague in other_parents:
+                    return next_frontier, colleague
+                next_frontier.append(colleague)
+    return next_frontier, None
+
+
+def path_to(actor, parents):
+    path = []
+    while actor is not None:
+        path.append(actor)
+        actor = parents[actor]
+    return path
@@ -1,68 +1,128 @@
 import csv
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
 
 from Movie.domain.movie import Movie
 from Movie.domain.actor import Actor
 from Movie.domain.genre import Genre
 from Movie.domain.director import Director
 
+
+# Values the movie data files use for a missing revenue or metascore.
+MISSING_VALUES = ('', 'N/A')
+
+
+class MovieRecord(NamedTuple):
+    rank: int
+    title: str
+    genres: List[str]
+    description: str
+    director: str
+    actors: List[str]
+    year: int
+    duration: int
+    rating: float
+    votes: int
+    revenue: Optional[float]
+    metascore: Optional[int]
+
+
+def optional_value(value: str, convert: Callable):
+    return None if value in MISSING_VALUES else convert(value)
+
+
+def split_names(value: str) -> List[str]:
+    names = (name.strip() for name in value.split(','))
+    return [name for name in names if name != '']
+
+
+def read_movie_records(filename: str) -> Iterator[MovieRecord]:
+    """ Yields a typed MovieRecord for each row of a movie data file, reading the file one row at a time. """
+    with open(filename, mode='r', encoding='utf-8-sig') as infile:
+        movie_file_reader = csv.reader(infile)
+
+        # Locate columns by name, so that their order in the file doesn't matter.
+        headers = [header.strip() for header in next(movie_file_reader)]
+        column = {header: index for index, header in enumerate(headers)}
+        rank, title, genre, description, director, actors, year, duration, rating, votes, revenue, metascore = (
+            column['Rank'], column['Title'], column['Genre'], column['Description'], column['Director'],
+            column['Actors'], column['Year'], column['Runtime (Minutes)'], column['Rating'], column['Votes'],
+            column['Revenue (Millions)'], column['Metascore'])
+
+        for row in movie_file_reader:
+            row = [item.strip() for item in row]
+            yield MovieRecord(
+                rank=int(row[rank]),
+                title=row[title],
+                genres=split_names(row[genre]),
+                description=row[description],
+                director=row[director],
+                actors=split_names(row[actors]),
+                year=int(row[year]),
+                duration=int(row[duration]),
+                rating=float(row[rating]),
+                votes=int(row[votes]),
+                revenue=optional_value(row[revenue], float),
+                metascore=optional_value(row[metascore], int)
+            )
+
+
+def intern_table(table: dict) -> Callable:
+    """ Returns a function that maps an entity to the first equal entity it was given, recording entities in table. """
+    return lambda entity: table.setdefault(entity, entity)
+
+
+def build_movies(records: Iterable[MovieRecord], add_actor: Callable, add_director: Callable,
+                 add_genre: Callable) -> Iterator[Movie]:
+    """ Yields a Movie for each record, with its actors, director and genres attached.
+
+    Each Actor, Director and Genre is passed through add_actor, add_director or add_genre, which return the canonical
+    instance that the Movie should refer to.
+    """
+    for record in records:
+        movie = Movie(rank=record.rank,
+                      title=record.title,
+                      description=record.description,
+                      year=record.year,
+                      duration=record.duration,
+                      rating=record.rating,
+                      votes=record.votes,
+                      revenue=record.revenue,
+                      metascore=record.metascore
+                      )
+        movie.director = add_director(Director(record.director))
+        for name in record.actors:
+            movie.add_actor(add_actor(Actor(name)))
+        for name in record.genres:
+            movie.add_genre(add_genre(Genre(name)))
+        yield movie
+
+
 class MovieFileCSVReader:
 
     def __init__(self, file_name: str):
         self.__file_name = file_name
-        self.__dataset_of_movies = []
-        self.__dataset_of_actors = []
-        self.__dataset_of_directors = []
-        self.__dataset_of_genres = []
+        self.__dataset_of_movies = dict()
+        self.__dataset_of_actors = dict()
+        self.__dataset_of_directors = dict()
+        self.__dataset_of_genres = dict()
 
     def read_csv_file(self):
-        with open(self.__file_name, mode='r', encoding='utf-8-sig') as csvfile:
-            movie_file_reader = csv.DictReader(csvfile)
-
-            for row in movie_file_reader:
-                title = row['Title']
-                description = str(row['Description'])
-                year = int(row['Year'])
-                duration = int(row['Runtime (Minutes)'])
-                rating = float(row['Rating'])
-                votes = int(row['Votes'])
-                revenue = row['Revenue']
-                metascore = row['Metascore']
-
-                movie = Movie(title, description, year, duration, rating, votes, revenue, metascore)
-
-                actors = row['Actors'].split(",")
-                directors = Director(row['Director'])
-                genres = row['Genre'].split(",")
-
-                if movie not in self.__dataset_of_movies:
-                    self.__dataset_of_movies.append(movie)
-
-                if directors not in self.__dataset_of_directors:
-                    self.__dataset_of_directors.append(directors)
-
-                for a in actors:
-                    actors = Actor(a)
-                    if actors not in self.__dataset_of_actors:
-                        self.__dataset_of_actors.append(actors)
-
-                for g in genres:
-                    genres = Genre(g)
-                    if genres not in self.__dataset_of_genres:
-                        self.__dataset_of_genres.append(genres)
+        movies = build_movies(read_movie_records(self.__file_name),
+                              intern_table(self.__dataset_of_actors),
+                              intern_table(self.__dataset_of_directors),
+                              intern_table(self.__dataset_of_genres))
+        for movie in movies:
+            self.__dataset_of_movies.setdefault(movie.rank, movie)
 
     @property
     def dataset_of_movies(self) -> list:
-        return self.__dataset_of_movies
+        return list(self.__dataset_of_movies.values())
     @property
     def dataset_of_actors(self) -> list:
-        return self.__dataset_of_actors
+        return list(self.__dataset_of_actors)
     @property
     def dataset_of_directors(self) -> list:
-        return self.__dataset_of_directors
+        return list(self.__dataset_of_directors)
     @property
     def dataset_of_genres(self) -> list:
-        return self.__dataset_of_genres
-
-
-
-
+        return list(self.__dataset_of_genres)
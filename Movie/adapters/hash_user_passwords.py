@@ -0,0 +1,49 @@
+"""Convert a users seed file with plaintext passwords into one holding password hashes.
+
+The converted file has a password_hash column in place of the password column, and load_users uses its values without
+hashing them again, which keeps hashing out of application start-up.
+
+Usage:
+
+    python -m Movie.adapters.hash_user_passwords Movie/adapters/data/users.csv hashed_users.csv
+"""
+
+import argparse
+import csv
+
+from werkzeug.security import generate_password_hash
+
+
+def hash_user_passwords(source_filename: str, target_filename: str):
+    with open(source_filename, mode='r', encoding='utf-8-sig', newline='') as infile:
+        rows = [[item.strip() for item in row] for row in csv.reader(infile)]
+
+    if 'password' not in rows[0]:
+        raise ValueError('{} has no password column'.format(source_filename))
+    hash_password_rows(rows)
+
+    with open(target_filename, mode='w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(rows)
+
+
+def hash_password_rows(rows):
+    """ Replaces, in place, the password column of the users CSV rows, headers first, with a password_hash column. """
+    headers = rows[0]
+    password_column = headers.index('password')
+    headers[password_column] = 'password_hash'
+
+    for row in rows[1:]:
+        row[password_column] = generate_password_hash(row[password_column])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replace the plaintext passwords in a users CSV file with hashes.')
+    parser.add_argument('source', help='users CSV file with a password column')
+    parser.add_argument('target', help='users CSV file to write, with a password_hash column')
+    args = parser.parse_args(argv)
+
+    hash_user_passwords(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""Write-ahead journal of the user registrations and comments made while the application runs.
+
+Each write is appended to the journal as a line of JSON, and made durable with fsync, before the repository is
+updated. On start-up the journal is replayed over the repository populated from the data files or snapshot. Compaction
+folds the journal into the users and comments CSV files and empties it; run it while the application is stopped:
+
+    python -m Movie.adapters.journal Movie/adapters/data journal.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterator
+
+from Movie.adapters.hash_user_passwords import hash_password_rows
+from Movie.adapters.repository import AbstractRepository
+from Movie.domain.comment import Comment, make_comment
+from Movie.domain.user import User, normalise_user_name
+
+
+class Journal:
+    """ An append-only file of JSON records, written with group commit.
+
+    A writer adds its record to the pending batch and, unless a flush is under way, writes and fsyncs every pending
+    record in one go. Writers that arrive during a flush wait for it to finish and then share the next one, instead of
+    queueing behind an fsync each.
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        # Records appended after a torn final line would be glued to it, so it is cut off first.
+        truncate_torn_tail(self.__fd)
+
+        # Guards the pending batch and the counts of records; writers wait on it for their record to be flushed.
+        self.__condition = threading.Condition()
+        self.__flushing = False
+
+        self.__pending = list()
+        self.__appended = 0
+        self.__durable = 0
+        self.__batches = 0
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def records(self) -> int:
+        return self.__durable
+
+    @property
+    def batches(self) -> int:
+        return self.__batches
+
+    def append(self, record: dict):
+        """ Appends record, returning once it is on disk. """
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        with self.__condition:
+            self.__pending.append(line)
+            self.__appended += 1
+            sequence = self.__appended
+
+            while self.__durable < sequence:
+                if self.__flushing:
+                    self.__condition.wait()
+                    continue
+
+                # Lead a flush of everything pending, without holding the lock while writing.
+                self.__flushing = True
+                batch, self.__pending = self.__pending, list()
+                last = self.__appended
+                self.__condition.release()
+                written = False
+                try:
+                    self.__write(b''.join(batch))
+                    written = True
+                finally:
+                    self.__condition.acquire()
+                    self.__flushing = False
+                    if written:
+                        self.__durable = last
+                        self.__batches += 1
+                    else:
+                        # Put the batch back, so that its writers don't take a later flush as theirs.
+                        self.__pending[:0] = batch
+                    self.__condition.notify_all()
+
+    def __write(self, data: bytes):
+        # One write of the whole batch, so that lines from concurrent processes never interleave.
+        data = memoryview(data)
+        while data:
+            data = data[os.write(self.__fd, data):]
+        os.fsync(self.__fd)
+
+    def close(self):
+        with self.__condition:
+            while self.__flushing:
+                self.__condition.wait()
+            os.close(self.__fd)
+
+
+def truncate_torn_tail(fd: int, chunk_size: int = 64 * 1024):
+    """ Truncates the file open for reading and writing as fd after its last newline, removing a final line cut short
+    by a crash.
+    """
+    size = os.fstat(fd).st_size
+    end = size
+    while end > 0:
+        start = max(end - chunk_size, 0)
+        os.lseek(fd, start, os.SEEK_SET)
+        chunk = os.read(fd, end - start)
+        newline = chunk.rfind(b'\n')
+        if newline >= 0:
+            end = start + newline + 1
+            break
+        end = start
+    if end < size:
+        os.ftruncate(fd, end)
+        os.fsync(fd)
+
+
+def user_record(user: User) -> dict:
+    return {'type': 'user', 'user_name': user.user_name, 'password': user.password}
+
+
+def comment_record(comment: Comment) -> dict:
+    return {'type': 'comment', 'user_name': comment.user.user_name, 'rank': comment.movie.rank,
+            'comment': comment.comment, 'timestamp': comment.timestamp.isoformat()}
+
+
+def read_journal(path: str) -> Iterator[dict]:
+    """ Yields the records of the journal at path, if there is one.
+
+    A final line cut short by a crash part way through a write is ignored; it was never reported as written.
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, mode='rb') as infile:
+        lines = infile.read().split(b'\n')
+
+    # Every complete line ends with a newline, so the last item is empty unless a write was cut short.
+    for line in lines[:-1]:
+        yield json.loads(line.decode('utf-8'))
+
+
+def replay_journal(path: str, repo: AbstractRepository):
+    """ Applies the journal's records to repo, which must not have the journal attached. """
+    for record in read_journal(path):
+        if record['type'] == 'user':
+            repo.add_user(User(user_name=record['user_name'], password=record['password']))
+        elif record['type'] == 'comment':
+            user = repo.get_user(record['user_name'])
+            movie = repo.get_movie(record['rank'])
+            timestamp = datetime.fromisoformat(record['timestamp'])
+            # A compaction interrupted before emptying the journal leaves its comments in the data files as well.
+            if user is not None and movie is not None and \
+                    comment_key(user.user_name, record['comment'], timestamp) not in comment_keys(movie.comments):
+                repo.add_comment(make_comment(record['comment'], user, movie, timestamp))
+        else:
+            raise ValueError('Unknown journal record type {}'.format(record['type']))
+
+
+def comment_key(user_name: str, comment: str, timestamp: datetime) -> tuple:
+    # Identifies a comment across the journal and the data files, which strip the text of surrounding spaces.
+    return normalise_user_name(user_name), comment.strip(), timestamp
+
+
+def comment_keys(comments) -> set:
+    return {comment_key(comment.user.user_name, comment.comment, comment.timestamp) for comment in comments}
+
+
+def compact_journal(data_path: str, journal_path: str):
+    """ Folds the journal into the users and comments CSV files in data_path, then empties the journal.
+
+    The users file is converted to hold password hashes, as the journal does, if it holds plaintext passwords. Each
+    file is written to a temporary file, made durable and renamed over the original, so a crash leaves either version
+    whole; the journal is only emptied once both files are in place. Comments already in the comments file are not
+    added again, so compacting a journal that a crash left behind after its comments were folded in changes nothing.
+    """
+    records = list(read_journal(journal_path))
+    users_filename = os.path.join(data_path, 'users.csv')
+    comments_filename = os.path.join(data_path, 'comments.csv')
+
+    users = read_rows(users_filename)
+    if 'password' in users[0]:
+        hash_password_rows(users)
+    user_ids = {normalise_user_name(row[1]): row[0] for row in users[1:]}
+    next_user_id = max((int(row[0]) for row in users[1:]), default=0) + 1
+
+    comments = read_rows(comments_filename)
+    next_comment_id = max((int(row[0]) for row in comments[1:]), default=0) + 1
+    user_names = {row[0]: row[1] for row in users[1:]}
+    folded_comments = {(row[2], comment_key(user_names.get(row[1], ''), row[3], datetime.fromisoformat(row[4])))
+                       for row in comments[1:]}
+
+    for record in records:
+        if record['type'] == 'user':
+            name = normalise_user_name(record['user_name'])
+            if name not in user_ids:
+                users.append([str(next_user_id), record['user_name'], record['password']])
+                user_ids[name] = str(next_user_id)
+                next_user_id += 1
+        elif record['type'] == 'comment':
+            user_id = user_ids.get(normalise_user_name(record['user_name']))
+            timestamp = datetime.fromisoformat(record['timestamp'])
+            key = (str(record['rank']), comment_key(record['user_name'], record['comment'], timestamp))
+            if user_id is not None and key not in folded_comments:
+                comments.append([str(next_comment_id), user_id, str(record['rank']), record['comment'],
+                                 timestamp.isoformat(sep=' ')])
+                folded_comments.add(key)
+                next_comment_id += 1
+
+    write_rows(users_filename, users)
+    write_rows(comments_filename, comments)
+    with open(journal_path, mode='wb') as journal:
+        os.fsync(journal.fileno())
+
+
+def read_rows(filename: str):
+    with open(filename, mode='r', encoding='utf-8-sig', newline='') as infile:
+        return [[item.strip() for item in row] for row in csv.reader(infile) if row]
+
+
+def write_rows(filename: str, rows):
+    temp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+    with open(temp_filename, mode='w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(rows)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(temp_filename, filename)
+    sync_directory(os.path.dirname(os.path.abspath(filename)))
+
+
+def sync_directory(path: str):
+    # Makes a rename within the directory durable, where the platform allows directories to be opened.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fold a repository journal into the users and comments CSV files.')
+    parser.add_argument('data_path', help='directory holding users.csv and comments.csv')
+    parser.add_argument('journal', help='journal file to fold in and empty')
+    args = parser.parse_args(argv)
+
+    compact_journal(args.data_path, args.journal)
+
+
+if __name__ == '__main__':
+    main()
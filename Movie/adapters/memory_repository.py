@@ -1,193 +1,348 @@
 import csv
 import os
+import pickle
 from datetime import datetime
-from typing import List
+from typing import Iterable, List, Tuple
 
-from bisect import bisect, bisect_left, insort_left
+from bisect import insort_left
 
 from werkzeug.security import generate_password_hash
 
 from Movie.adapters.repository import AbstractRepository, RepositoryException
+from Movie.adapters.datafilereaders.movie_file_csv_reader import build_movies, read_movie_records
+from Movie.adapters.autocomplete import AutocompleteIndex
+from Movie.adapters.catalogue_view import CatalogueView
+from Movie.adapters.columnar import MovieColumns
+from Movie.adapters.costar_graph import CostarGraph
+from Movie.adapters.journal import Journal, comment_record, user_record
+from Movie.adapters.movie_query import (MovieQuery, NumericColumn, NUMERIC_ATTRIBUTES, PlanStep, execute_plan,
+                                         in_range, sort_movies)
+from Movie.adapters.rollups import CatalogueRollups
+from Movie.adapters.rwlock import ReadWriteLock, read_locked, write_locked
+from Movie.adapters.search_index import SearchIndex
+from Movie.adapters.similarity import SimilarMovies
 from Movie.domain.actor import Actor
 from Movie.domain.director import Director
 from Movie.domain.genre import Genre
 from Movie.domain.movie import Movie
-from Movie.domain.user import User
+from Movie.domain.user import User, normalise_user_name
 from Movie.domain.comment import Comment, make_comment
 
 
 class MemoryRepository(AbstractRepository):
-
-    def __init__(self):
-        self.__movies = list()
-        self.__actors = list()
-        self.__directors = list()
-        self.__users = list()
+    """ A repository held in memory, which request threads may share.
+
+    The movies are held in an immutable CatalogueView, which adding movies replaces with the next generation's, so
+    lookups by rank and pages of movies read the current view without locking. Other reads hold the read lock, so they
+    run alongside each other, and writes hold the write lock. The rollups and co-star graph handed out are updated in
+    place by add_movie, which runs while populating, before any requests are served. A subclass may pass the view
+    its movies are read from, leaving the indexes of this class empty.
+    """
+
+    def __init__(self, view: CatalogueView = None):
+        self.__lock = ReadWriteLock()
+        self.__view = view if view is not None else CatalogueView()
+        # Intern tables mapping each distinct Actor, Director and Genre to its canonical instance.
+        self.__actors = dict()
+        self.__directors = dict()
+        # Users keyed by normalised user name, and the names of users being journaled, which are taken but not yet
+        # published.
+        self.__users = dict()
+        self.__reserved_user_names = set()
         self.__comments = list()
-        self.__genres = list()
-        self.__movie_index = dict()
+        self.__genres = dict()
 
-    def add_user(self, user: User):
-        self.__users.append(user)
+        # Posting lists of rank-ordered Movies, keyed by Genre, Actor and Director.
+        self.__genre_index = dict()
+        self.__actor_index = dict()
+        self.__director_index = dict()
+
+        # Numeric attributes of the movies, each sorted by value for range queries.
+        self.__columns = {attribute: NumericColumn(attribute) for attribute in NUMERIC_ATTRIBUTES}
+
+        self.__search_index = SearchIndex()
+        self.__rollups = CatalogueRollups()
+        self.__costar_graph = CostarGraph()
+        self.__similar_movies = SimilarMovies()
+
+        # Built when first needed, and discarded whenever movies are added.
+        self.__autocomplete_index = None
+        self.__movie_columns = None
+
+        # Journal that user and comment writes are recorded in before they are applied, if one is attached.
+        self.__journal = None
+
+    def __getstate__(self):
+        # The journal is an open file belonging to this process, and the lock belongs to its threads, so snapshots
+        # leave them out.
+        state = self.__dict__.copy()
+        state['_MemoryRepository__journal'] = None
+        del state['_MemoryRepository__lock']
+        return state
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = ReadWriteLock()
+
+    @property
+    def lock(self) -> ReadWriteLock:
+        return self.__lock
+
+    def attach_journal(self, journal: Journal):
+        self.__journal = journal
+
+    def add_user(self, user: User):
+        user_name = normalise_user_name(user.user_name)
+        # Reserve the name, so that it is only ever journaled once, then journal outside the lock, so that reads don't
+        # wait on the fsync and concurrent writers share it, and publish the user once its record is durable.
+        with self.__lock.writing():
+            if user_name in self.__users or user_name in self.__reserved_user_names:
+                return
+            self.__reserved_user_names.add(user_name)
+        try:
+            if self.__journal is not None:
+                self.__journal.append(user_record(user))
+        except BaseException:
+            with self.__lock.writing():
+                self.__reserved_user_names.discard(user_name)
+            raise
+        with self.__lock.writing():
+            self.__users[user_name] = user
+            self.__reserved_user_names.discard(user_name)
+
+    @read_locked
     def get_user(self, username) -> User:
-        return next((user for user in self.__users if user.user_name == username), None)
+        return self.__users.get(normalise_user_name(username))
 
-    def add_movie(self, movie: Movie):
-        insort_left(self.__movies, movie)
-        #self.__movies.append(movie)
-        self.__movie_index[movie.rank] = movie
+    @write_locked
+    def watch_movie(self, user: User, movie: Movie):
+        user.watch_movie(movie)
+        user.watchlist.remove_movie(movie)
+
+    @write_locked
+    def add_to_watchlist(self, user: User, movie: Movie):
+        user.watchlist.add_movie(movie)
 
+    @write_locked
+    def remove_from_watchlist(self, user: User, movie: Movie):
+        user.watchlist.remove_movie(movie)
+
+    @write_locked
+    def add_movie(self, movie: Movie):
+        for posting_list in self.posting_lists(movie):
+            insort_left(posting_list, movie)
+        for column in self.__columns.values():
+            column.add_movie(movie)
+        self.__search_index.add_movie(movie)
+        self.__rollups.add_movie(movie)
+        self.__costar_graph.add_movie(movie)
+        self.__similar_movies.add_movie(movie)
+        self.__autocomplete_index = None
+        self.__movie_columns = None
+
+        # Publish the movie last, once the indexes that readers holding the lock consult include it.
+        self.__view = self.__view.with_movies([movie])
+
+    @write_locked
+    def add_movies(self, movies: Iterable[Movie]):
+        new_movies = sorted(movies)
+        view = self.__view.with_movies(new_movies)
+
+        touched_posting_lists = dict()
+        for movie in new_movies:
+            for posting_list in self.posting_lists(movie):
+                posting_list.append(movie)
+                touched_posting_lists[id(posting_list)] = posting_list
+            self.__search_index.add_movie(movie)
+            self.__rollups.add_movie(movie)
+            self.__costar_graph.add_movie(movie)
+
+        for posting_list in touched_posting_lists.values():
+            posting_list.sort()
+        self.__columns = {attribute: NumericColumn(attribute, view.movies) for attribute in NUMERIC_ATTRIBUTES}
+
+        # Recompute every movie's neighbours in one batch, rather than movie by movie.
+        self.__similar_movies = SimilarMovies(view.movies)
+        self.__autocomplete_index = None
+        self.__movie_columns = None
+        self.__view = view
+
+    # Lookups by rank read the published view, without locking; each takes the view once, so it reads one version.
     def get_movie(self, rank: int) -> Movie:
-        movie_to_return = None
-        try:
-            movie_to_return = self.__movie_index[rank]
-        except KeyError:
-            pass  # Ignore exception and return None.
+        return self.__view.get_movie(rank)
 
-        return movie_to_return
+    def get_movies(self) -> Tuple[Movie, ...]:
+        return self.__view.movies
 
-    def get_movies(self) -> List[Movie]:
-        return self.__movies
+    def get_catalogue_view(self) -> CatalogueView:
+        return self.__view
 
-    def get_movie_by_rank(self, target_rank: int) -> List[Movie]:
-        target_movie = Movie(
-            rank=target_rank,
-            title=None,
-            description=None,
-            year=None,
-            duration=None,
-            rating=None,
-            votes=None,
-            revenue=None,
-            metascore=None
-        )
-        matching_movies = list()
-        try:
-            """
-            movie = self.__movies[target_rank]
-            target_movie.append(movie)"""
-            rank = self.movie_index(target_movie)
-            for movie in self.__movies[rank:None]:
-                if movie.rank == target_rank:
-                    matching_movies.append(movie)
-                else:
-                    break
-        except IndexError or KeyError or ValueError:
-            pass
+    def get_catalogue_generation(self) -> int:
+        return self.__view.generation
 
+    def get_movie_by_rank(self, target_rank: int) -> List[Movie]:
+        matching_movies = list(self.__view.movies_with_rank(target_rank))
+        if not matching_movies:
+            raise ValueError('There is no movie with rank {}'.format(target_rank))
         return matching_movies
 
+    def get_movies_page(self, start_rank: int = None, limit: int = 1):
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+
+        # Keyset lookup: the page starts at the first movie whose rank is not less than start_rank.
+        movies, previous_rank, next_rank = self.__view.page(start_rank, limit)
+        return list(movies), previous_rank, next_rank
+
     def get_number_of_movies(self):
-        return len(self.__movies)
+        return len(self.__view)
 
     def get_first_movie(self):
-        if len(self.__movies) > 0:
-            return self.__movies[0]
+        movies = self.__view.movies
+        if len(movies) > 0:
+            return movies[0]
 
     def get_last_movie(self):
-        if len(self.__movies) > 0:
-            return self.__movies[-1]
+        movies = self.__view.movies
+        if len(movies) > 0:
+            return movies[-1]
 
+    @read_locked
     def get_movie_by_genre(self, genre: Genre):
-        movie_genre_li = []
-        for mov in self.__movies:
-            if isinstance(genre, Genre):
-                if genre in mov.genres:
-                    movie_genre_li.append(mov)
-                else:
-                    pass
-            else:
-                break
-        return movie_genre_li
+        if not isinstance(genre, Genre):
+            return []
+        return list(self.__genre_index.get(genre, []))
 
+    @read_locked
     def get_movie_by_actor(self, actor: Actor):
-        movie_actor_li = []
-        for mov in self.__movies:
-            if isinstance(actor, Actor):
-                if actor in mov.actors:
-                    movie_actor_li.append(mov)
-                else:
-                    pass
-            else:
-                break
-        return movie_actor_li
+        if not isinstance(actor, Actor):
+            return []
+        return list(self.__actor_index.get(actor, []))
 
+    @read_locked
     def get_movie_by_director(self, director: Director):
-        movie_director_li = []
-        for mov in self.__movies:
-            if isinstance(director, Director):
-                if director == mov.director():
-                    movie_director_li.append(mov)
-                else:
-                    pass
-            else:
-                break
-        return movie_director_li
+        if not isinstance(director, Director):
+            return []
+        return list(self.__director_index.get(director, []))
+
+    @read_locked
+    def search_movies(self, query: str, limit: int = 10) -> List[Movie]:
+        view = self.__view
+        return [view.get_movie(rank) for rank, _ in self.__search_index.search(query, limit)]
+
+    @read_locked
+    def query_movies(self, query: MovieQuery) -> List[Movie]:
+        steps = list()
+        for genre in query.genres:
+            steps.append(self.facet_step(self.__genre_index, genre, lambda movie, genre=genre: genre in movie.genres))
+        for actor in query.actors:
+            steps.append(self.facet_step(self.__actor_index, actor, lambda movie, actor=actor: actor in movie.actors))
+        if query.director is not None:
+            steps.append(self.facet_step(self.__director_index, query.director,
+                                         lambda movie: movie.director == query.director))
+        for attribute, bounds in query.ranges.items():
+            steps.append(self.range_step(attribute, bounds))
+
+        movies = execute_plan(steps, self.__view.movies)
+        return sort_movies(movies, query.sort_by, query.descending, query.limit)
+
+    # Helper method to plan a query filter on a genre, actor or director posting list.
+    def facet_step(self, index: dict, key, matches) -> PlanStep:
+        posting_list = index.get(key, [])
+        return PlanStep(len(posting_list), lambda: posting_list, matches)
+
+    # Helper method to plan a query filter on a range of a numeric column.
+    def range_step(self, attribute: str, bounds) -> PlanStep:
+        column = self.__columns[attribute]
+        low, high = bounds
+        return PlanStep(column.count_in_range(low, high),
+                        lambda: column.movies_in_range(low, high),
+                        lambda movie: in_range(getattr(movie, attribute), bounds))
+
+    @read_locked
+    def get_movie_columns(self) -> MovieColumns:
+        if self.__movie_columns is None:
+            self.__movie_columns = MovieColumns(self.__view.movies, self.__genre_index)
+        return self.__movie_columns
+
+    @read_locked
+    def get_catalogue_rollups(self) -> CatalogueRollups:
+        return self.__rollups
+
+    @read_locked
+    def get_costar_graph(self) -> CostarGraph:
+        return self.__costar_graph
+
+    @read_locked
+    def get_similar_movies(self, movie: Movie, limit: int = 10) -> List[Movie]:
+        return [similar_movie for similar_movie, _ in self.__similar_movies.similar_to(movie, limit)]
+
+    @read_locked
+    def autocomplete(self, prefix: str, limit: int = 10) -> dict:
+        if self.__autocomplete_index is None:
+            self.__autocomplete_index = AutocompleteIndex(self.__view.movies, self.__actors, self.__directors,
+                                                          self.get_movie_by_actor, self.get_movie_by_director)
+        return self.__autocomplete_index.complete(prefix, limit)
 
     def get_rank_of_previous_movie(self, movie: Movie):
-        previous_rank = None
-
-        try:
-            index = movie.rank
-            for stored_movie in reversed(self.__movies[0:index]):
-                if stored_movie.rank < movie.rank:
-                    previous_rank = stored_movie.rank
-                    break
-        except ValueError:
-            # No earlier articles, so return None.
-            pass
-
+        previous_rank, _ = self.neighbouring_ranks(movie.rank)
         return previous_rank
 
     def get_rank_of_next_movie(self, movie: Movie):
-        next_rank = None
-
-        try:
-            index = movie.rank
-            for stored_movie in self.__movies[index:len(self.__movies)]:
-                if stored_movie.rank > movie.rank:
-                    next_rank = stored_movie.rank
-                    break
-        except ValueError:
-            # No subsequent articles, so return None.
-            pass
-
+        _, next_rank = self.neighbouring_ranks(movie.rank)
         return next_rank
 
-    def add_actor(self, actor: Actor):
-        self.__actors.append(actor)
+    @write_locked
+    def add_actor(self, actor: Actor) -> Actor:
+        if isinstance(actor, Actor):
+            return self.__actors.setdefault(actor, actor)
 
+    @read_locked
     def get_actor(self) -> List[Actor]:
-        return self.__actors
+        return list(self.__actors)
 
-    def add_director(self, director: Director):
-        if director not in self.__directors and isinstance(director, Director):
-            self.__directors.append(director)
+    @write_locked
+    def add_director(self, director: Director) -> Director:
+        if isinstance(director, Director):
+            return self.__directors.setdefault(director, director)
 
+    @read_locked
     def get_director(self):
-        return self.__directors
+        return list(self.__directors)
 
+    @read_locked
     def get_genre(self) -> List[Genre]:
-        return self.__genres
+        return list(self.__genres)
 
-    def add_genre(self, genre: Genre):
-        if genre not in self.__genres and isinstance(genre, Genre):
-            self.__genres.append(genre)
+    @write_locked
+    def add_genre(self, genre: Genre) -> Genre:
+        if isinstance(genre, Genre):
+            return self.__genres.setdefault(genre, genre)
 
     def add_comment(self, comment: Comment):
         super().add_comment(comment)
-        self.__comments.append(comment)
+        if self.__journal is not None:
+            self.__journal.append(comment_record(comment))
+        with self.__lock.writing():
+            self.__comments.append(comment)
 
+    @read_locked
     def get_comments(self):
-        return self.__comments
+        return list(self.__comments)
 
-    # Helper method to return movie index.
-    def movie_index(self, movie: Movie):
-        index = bisect_left(self.__movies, movie)
-        if index != len(self.__movies) and self.__movies[index].rank == movie.rank:
-            return index
-        raise ValueError
+    # Helper method to return the ranks of the stored movies immediately before and after rank, or None where there
+    # is no such movie. Ranks need not be contiguous, and rank itself need not belong to a stored movie.
+    def neighbouring_ranks(self, rank: int):
+        return self.__view.neighbouring_ranks(rank)
+
+    # Helper method to return the genre, actor and director posting lists that movie belongs in, creating any that
+    # don't exist yet. Movies must have their genres, actors and director attached before they are indexed.
+    def posting_lists(self, movie: Movie):
+        posting_lists = [self.__genre_index.setdefault(genre, []) for genre in set(movie.genres)]
+        posting_lists += [self.__actor_index.setdefault(actor, []) for actor in set(movie.actors)]
+        if movie.director is not None:
+            posting_lists.append(self.__director_index.setdefault(movie.director, []))
+        return posting_lists
 
 
 def read_csv_file(filename: str):
@@ -204,56 +359,31 @@ def read_csv_file(filename: str):
             yield row
 
 
+def read_csv_header(filename: str) -> List[str]:
+    with open(filename, mode='r', encoding='utf-8-sig') as infile:
+        return [item.strip() for item in next(csv.reader(infile))]
+
+
 def load_movies(data_path: str, repo: MemoryRepository):
-    for row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
-        title = str(row[1])
-        year = int(row[6])
-        actors = row[5].split(",")
-        directors = Director(row[4])
-        genres = row[2].split(",")
-        description = str(row[3])
-        ranking = int(row[0])
-        duration = int(row[7])
-        ratings = float(row[8])
-        votes = int(row[9])
-        metascore = row[11]
-        revenue = row[10]
-
-        movie = Movie(rank=ranking,
-                      title=title,
-                      description=description,
-                      year=year,
-                      duration=duration,
-                      rating=ratings,
-                      votes=votes,
-                      revenue=revenue,
-                      metascore=metascore
-                      )
-        repo.add_movie(movie)
-        # add directors
-        repo.add_director(directors)
-        movie.director = directors
-
-        # add actors to movies and repo
-        for a in actors:
-            actor = Actor(a)
-            repo.add_actor(actor)
-            movie.add_actor(actor)
-
-        # add genres to movies and repo
-        for g in genres:
-            genre = Genre(g)
-            repo.add_genre(genre)
-            movie.add_genre(genre)
+    records = read_movie_records(os.path.join(data_path, 'Data1000Movies.csv'))
+
+    # Movies are built with the repository's canonical actors, directors and genres attached, and streamed into a
+    # single bulk add so that they are indexed under them.
+    repo.add_movies(build_movies(records, repo.add_actor, repo.add_director, repo.add_genre))
 
 
 def load_users(data_path: str, repo: MemoryRepository):
     users = dict()
+    filename = os.path.join(data_path, 'users.csv')
 
-    for data_row in read_csv_file(os.path.join(data_path, 'users.csv')):
+    # Seed files converted by hash_user_passwords store password hashes, which are used as they are.
+    passwords_are_hashed = 'password_hash' in read_csv_header(filename)
+
+    for data_row in read_csv_file(filename):
+        password = data_row[2] if passwords_are_hashed else generate_password_hash(data_row[2])
         user = User(
             user_name=data_row[1],
-            password=generate_password_hash(data_row[2])
+            password=password
         )
         repo.add_user(user)
         users[data_row[0]] = user
@@ -276,3 +406,78 @@ def populate(data_path: str, repo: MemoryRepository):
     load_movies(data_path, repo)
     users = load_users(data_path, repo)
     load_comments(data_path, repo, users)
+
+
+# Bump whenever the pickled layout of the repository or the domain model changes, so stale snapshots are rebuilt.
+SNAPSHOT_VERSION = 14
+
+# The source files a snapshot is built from, relative to the data path.
+SNAPSHOT_SOURCES = ('Data1000Movies.csv', 'users.csv', 'comments.csv')
+
+
+class SnapshotPickler(pickle.Pickler):
+    # Comments link Users and Movies to each other, so pickling them naively recurses once per link. Each Comment is
+    # instead written out of band as a flat record naming its user and movie.
+    def persistent_id(self, obj):
+        if isinstance(obj, Comment):
+            user_name = obj.user.user_name if obj.user is not None else None
+            rank = obj.movie.rank if obj.movie is not None else None
+            return 'comment', id(obj), user_name, rank, obj.comment, obj.timestamp
+        return None
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.comment_records = dict()
+
+    def persistent_load(self, pid):
+        tag, key, *record = pid
+        if tag != 'comment':
+            raise pickle.UnpicklingError('Unsupported persistent id {}'.format(tag))
+        if key not in self.comment_records:
+            # The Comment's user and movie may not be loaded yet; it is initialised once loading completes.
+            self.comment_records[key] = (Comment.__new__(Comment), record)
+        return self.comment_records[key][0]
+
+
+def save_snapshot(snapshot_path: str, repo: MemoryRepository):
+    # Write to a temporary file and rename it, so that concurrently starting workers never read a partial snapshot.
+    temp_path = '{}.{}.tmp'.format(snapshot_path, os.getpid())
+    with open(temp_path, mode='wb') as outfile:
+        SnapshotPickler(outfile, protocol=pickle.HIGHEST_PROTOCOL).dump((SNAPSHOT_VERSION, repo))
+    os.replace(temp_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path: str) -> MemoryRepository:
+    with open(snapshot_path, mode='rb') as infile:
+        unpickler = SnapshotUnpickler(infile)
+        version, repo = unpickler.load()
+
+    if version != SNAPSHOT_VERSION:
+        raise pickle.UnpicklingError('Snapshot version {} is not {}'.format(version, SNAPSHOT_VERSION))
+
+    for comment, (user_name, rank, comment_text, timestamp) in unpickler.comment_records.values():
+        comment.__init__(repo.get_user(user_name), repo.get_movie(rank), comment_text, timestamp)
+    return repo
+
+
+def snapshot_is_current(snapshot_path: str, data_path: str) -> bool:
+    if not os.path.exists(snapshot_path):
+        return False
+    snapshot_time = os.path.getmtime(snapshot_path)
+    return all(os.path.getmtime(os.path.join(data_path, source)) < snapshot_time for source in SNAPSHOT_SOURCES)
+
+
+def populate_from_snapshot(data_path: str, snapshot_path: str) -> MemoryRepository:
+    # Load the snapshot if it is newer than the source data; otherwise populate from the data and save a snapshot.
+    if snapshot_is_current(snapshot_path, data_path):
+        try:
+            return load_snapshot(snapshot_path)
+        except (pickle.UnpicklingError, AttributeError, EOFError, ImportError, TypeError, ValueError):
+            pass  # Ignore an unreadable or outdated snapshot and rebuild it.
+
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    save_snapshot(snapshot_path, repo)
+    return repo
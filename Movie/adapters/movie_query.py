@@ -0,0 +1,129 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+
+# Numeric Movie attributes that can be filtered by range, each kept as a sorted column.
+NUMERIC_ATTRIBUTES = ('year', 'duration', 'rating', 'votes', 'revenue', 'metascore')
+
+SORT_KEYS = ('rank', 'title') + NUMERIC_ATTRIBUTES
+
+
+class MovieQuery:
+    """ A selection of Movies, by facets and by inclusive ranges of numeric attributes, in a given order.
+
+    A Movie must have all of genres and all of actors. A range is a (low, high) pair where either bound may be None to
+    leave it open; Movies without a value for a ranged attribute are excluded. Movies are ordered by sort_by, in
+    descending order if descending is True, with Movies lacking a value last; ties are ordered by rank. At most limit
+    Movies are selected, unless limit is None.
+    """
+
+    def __init__(self, genres: Iterable[Genre] = (), actors: Iterable[Actor] = (), director: Director = None,
+                 year: Tuple = None, duration: Tuple = None, rating: Tuple = None, votes: Tuple = None,
+                 revenue: Tuple = None, metascore: Tuple = None, sort_by: str = 'rank', descending: bool = False,
+                 limit: int = None):
+        if sort_by not in SORT_KEYS:
+            raise ValueError('Movies cannot be sorted by {}'.format(sort_by))
+        if limit is not None and limit < 0:
+            raise ValueError('limit must not be negative')
+
+        self.genres = list(genres)
+        self.actors = list(actors)
+        self.director = director
+        self.ranges = dict()
+        for attribute, bounds in zip(NUMERIC_ATTRIBUTES, (year, duration, rating, votes, revenue, metascore)):
+            if bounds is not None and bounds != (None, None):
+                self.ranges[attribute] = bounds
+        self.sort_by = sort_by
+        self.descending = descending
+        self.limit = limit
+
+
+class NumericColumn:
+    """ The values of one numeric attribute of a set of Movies, in ascending order, alongside their Movies. """
+
+    def __init__(self, attribute: str, movies: Iterable[Movie] = ()):
+        self.__attribute = attribute
+        entries = sorted((value, movie.rank, movie) for movie, value in self.__valued(movies))
+        self.__keys = [(value, rank) for value, rank, _ in entries]
+        self.__movies = [movie for _, _, movie in entries]
+
+    def __valued(self, movies: Iterable[Movie]):
+        for movie in movies:
+            value = getattr(movie, self.__attribute)
+            if value is not None:
+                yield movie, value
+
+    def add_movie(self, movie: Movie):
+        value = getattr(movie, self.__attribute)
+        if value is not None:
+            position = bisect_left(self.__keys, (value, movie.rank))
+            self.__keys.insert(position, (value, movie.rank))
+            self.__movies.insert(position, movie)
+
+    def range_bounds(self, low, high) -> Tuple[int, int]:
+        # Ranks are integers, so (value, -inf) and (value, +inf) bracket every entry with the value.
+        start = 0 if low is None else bisect_left(self.__keys, (low, float('-inf')))
+        end = len(self.__keys) if high is None else bisect_right(self.__keys, (high, float('inf')))
+        return start, max(start, end)
+
+    def movies_in_range(self, low, high) -> List[Movie]:
+        start, end = self.range_bounds(low, high)
+        return self.__movies[start:end]
+
+    def count_in_range(self, low, high) -> int:
+        start, end = self.range_bounds(low, high)
+        return end - start
+
+
+def in_range(value, bounds) -> bool:
+    low, high = bounds
+    return value is not None and (low is None or value >= low) and (high is None or value <= high)
+
+
+def sort_movies(movies: Iterable[Movie], sort_by: str, descending: bool, limit: int = None) -> List[Movie]:
+    movies = list(movies)
+    present = [movie for movie in movies if getattr(movie, sort_by) is not None]
+    missing = sorted((movie for movie in movies if getattr(movie, sort_by) is None), key=lambda movie: movie.rank)
+
+    if limit is not None and sort_by != 'title':
+        # Select just the top limit movies; numeric values can be negated to sort in descending order.
+        sign = -1 if descending else 1
+        ordered = heapq.nsmallest(limit, present, key=lambda movie: (sign * getattr(movie, sort_by), movie.rank))
+    else:
+        # Sort by rank first, so that the stable sort on sort_by leaves ties in rank order either way.
+        ordered = sorted(present, key=lambda movie: movie.rank)
+        ordered.sort(key=lambda movie: getattr(movie, sort_by), reverse=descending)
+
+    ordered += missing
+    return ordered if limit is None else ordered[:limit]
+
+
+class PlanStep(NamedTuple):
+    """ One filter of a query: how many Movies it matches, a function returning them, and a test for one Movie. """
+    estimate: int
+    movies: Callable[[], List[Movie]]
+    matches: Callable[[Movie], bool]
+
+
+def execute_plan(steps: List[PlanStep], all_movies: List[Movie]) -> List[Movie]:
+    """ Returns the Movies matching every step.
+
+    The most selective step produces the candidate Movies, and every step, that one included, is tested against each
+    candidate, most selective first, so no step has to enumerate more Movies than the smallest one matches and a step
+    may produce a superset of the Movies it matches.
+    """
+    if len(steps) == 0:
+        return list(all_movies)
+
+    steps = sorted(steps, key=lambda step: step.estimate)
+    if steps[0].estimate == 0:
+        return []
+
+    tests = [step.matches for step in steps]
+    return [movie for movie in steps[0].movies() if all(test(movie) for test in tests)]
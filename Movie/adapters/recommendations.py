@@ -0,0 +1,114 @@
+import threading
+from heapq import nsmallest
+from typing import Dict, List
+
+from Movie.adapters.repository import AbstractRepository
+from Movie.domain.movie import Movie
+from Movie.domain.user import User
+
+
+# Score contributed to a movie by each genre, actor and director it shares with a movie in the user's history.
+FEATURE_WEIGHTS = {'genre': 1.0, 'actor': 2.0, 'director': 3.0}
+
+# Weight of a movie in the user's history: watched movies count fully, movies on the WatchList for half.
+WATCHED_WEIGHT = 1.0
+WATCHLIST_WEIGHT = 0.5
+
+
+class UserRecommendations:
+    """ Scores of the movies related to one user's history, kept up to date as the history changes.
+
+    A movie's score is the weighted number of genres, actors and director it shares with the movies the user has
+    watched or put on their WatchList. Because the score is a sum over the history, a change to the history updates
+    only the movies sharing a feature with the changed movie, found through the repository's posting lists.
+
+    The scores are cached between requests, whose threads may update and read them at once, so each method holds the
+    object's lock.
+    """
+
+    def __init__(self, user: User, repo: AbstractRepository):
+        self.__lock = threading.RLock()
+        self.__user = user
+        self.__repo = repo
+        self.__scores: Dict[int, float] = dict()
+
+        # Weight each movie in the history currently contributes, keyed by rank.
+        self.__history: Dict[int, float] = dict()
+
+        # Best scoring movies, kept until the history next changes, and how many were asked for.
+        self.__recommendations = None
+        self.__recommendations_limit = 0
+
+        for movie in user.watchlist:
+            self.update(movie)
+        for movie in user.watched_movies:
+            self.update(movie)
+
+    @property
+    def user(self) -> User:
+        return self.__user
+
+    @property
+    def repo(self) -> AbstractRepository:
+        return self.__repo
+
+    def follow(self, user: User):
+        """ Rebinds the scores to user, another instance of the same user, and brings them up to date with any changes
+        to the history it shows, such as those made by another process sharing the repository.
+        """
+        with self.__lock:
+            ranks = set(self.__history)
+            self.__user = user
+            for movie in list(user.watchlist) + list(user.watched_movies):
+                ranks.discard(movie.rank)
+                self.update(movie)
+
+            # Movies that have left the history since.
+            for rank in ranks:
+                movie = self.__repo.get_movie(rank)
+                if movie is not None:
+                    self.update(movie)
+
+    def update(self, movie: Movie):
+        """ Brings the scores up to date with movie's current place in the user's history. """
+        with self.__lock:
+            if self.__user.has_watched(movie):
+                weight = WATCHED_WEIGHT
+            elif movie in self.__user.watchlist:
+                weight = WATCHLIST_WEIGHT
+            else:
+                weight = 0.0
+
+            change = weight - self.__history.get(movie.rank, 0.0)
+            if change == 0:
+                return
+            if weight:
+                self.__history[movie.rank] = weight
+            else:
+                del self.__history[movie.rank]
+
+            for kind, related_movies in self.related_movies(movie):
+                for related_movie in related_movies:
+                    self.__scores[related_movie.rank] = self.__scores.get(related_movie.rank, 0.0) + \
+                        change * FEATURE_WEIGHTS[kind]
+            self.__recommendations = None
+
+    def related_movies(self, movie: Movie):
+        for genre in set(movie.genres):
+            yield 'genre', self.__repo.get_movie_by_genre(genre)
+        for actor in set(movie.actors):
+            yield 'actor', self.__repo.get_movie_by_actor(actor)
+        if movie.director is not None:
+            yield 'director', self.__repo.get_movie_by_director(movie.director)
+
+    def recommendations(self, limit: int) -> List[Movie]:
+        """ Returns up to limit movies outside the user's history, best scoring first, ties broken by rank. """
+        with self.__lock:
+            if self.__recommendations is None or limit > self.__recommendations_limit:
+                # Scores that should be zero may be left slightly off it by the sums of the updates.
+                candidates = ((rank, score) for rank, score in self.__scores.items()
+                              if score > 1e-9 and rank not in self.__history)
+                best = nsmallest(limit, candidates, key=lambda item: (-item[1], item[0]))
+                self.__recommendations = [self.__repo.get_movie(rank) for rank, _ in best]
+                self.__recommendations_limit = limit
+            return self.__recommendations[:limit]
@@ -1,7 +1,11 @@
 import abc
-from typing import List
+from typing import Iterable, List, Tuple
 from datetime import date
 
+from Movie.adapters.columnar import MovieColumns
+from Movie.adapters.costar_graph import CostarGraph
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.rollups import CatalogueRollups
 from Movie.domain.actor import Actor
 from Movie.domain.director import Director
 from Movie.domain.genre import Genre
@@ -32,15 +36,39 @@ class AbstractRepository(abc.ABC):
     def get_user(self, username) -> User:
         """ Returns the User named username from the repository.
 
-        If there is no User with the given username, this method returns None.
+        User names are matched case-insensitively, ignoring surrounding white space. If there is no User with the
+        given username, this method returns None.
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def watch_movie(self, user: User, movie: Movie):
+        """ Records that user has watched movie, taking it off their WatchList. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add_to_watchlist(self, user: User, movie: Movie):
+        """ Adds movie to user's WatchList. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remove_from_watchlist(self, user: User, movie: Movie):
+        """ Removes movie from user's WatchList. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_movie(self, movie: Movie):
         """ Adds a Movie to the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def add_movies(self, movies: Iterable[Movie]):
+        """ Adds many Movies to the repository at once.
+
+        This is equivalent to calling add_movie for each Movie, but is intended for bulk loading.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie(self, rank: int) -> Movie:
         """ Returns Movie from the repository.
@@ -50,10 +78,21 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movies(self) -> List[Movie]:
-        """ Returns list Movie from the repository.
+    def get_movies(self) -> Tuple[Movie, ...]:
+        """ Returns a tuple of the Movies in the repository, in rank order.
 
-        If there is no Movie, this method returns None.
+        If there is no Movie, this method returns an empty tuple.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalogue_generation(self) -> int:
+        """ Returns the catalogue's generation, which increases whenever Movies are added.
+
+        Anything derived from the catalogue can be cached under its generation, and is stale once the generation
+        changes. Comments don't change the generation of a repository held by one process, whose writes are seen by its
+        own caches; a repository shared between processes also advances it whenever users, comments or watched movies
+        are written, since caches in one process can't see writes made by another.
         """
         raise NotImplementedError
 
@@ -61,7 +100,17 @@ class AbstractRepository(abc.ABC):
     def get_movie_by_rank(self, target_rank: int) -> List[Movie]:
         """ Returns a Movies list that were published on target_rank.
 
-        If there are no Movies on the given rank, this method returns None.
+        If there are no Movies on the given rank, this method raises ValueError.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movies_page(self, start_rank: int = None, limit: int = 1):
+        """ Returns a page of up to limit Movies, in rank order, starting at the first Movie whose rank is not less
+        than start_rank, together with the ranks that start the previous and next pages.
+
+        The return value is a tuple (movies, previous_rank, next_rank). If start_rank is None the page starts at the
+        first Movie. previous_rank is None on the first page and next_rank is None on the last page.
         """
         raise NotImplementedError
 
@@ -88,7 +137,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_movie_by_genre(self, genre: Genre):
-        """ Returns a list of Movies, whose genre match those in genre, from the repository.
+        """ Returns a list of Movies, whose genre match those in genre, from the repository, ordered by rank.
 
         If there are no matches, this method returns an empty list.
         """
@@ -96,7 +145,7 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_movie_by_actor(self, actor: Actor):
-        """ Returns a list of Movies, whose actor match those in actor, from the repository.
+        """ Returns a list of Movies, whose actor match those in actor, from the repository, ordered by rank.
 
         If there are no matches, this method returns an empty list.
         """
@@ -104,12 +153,62 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_movie_by_director(self, director: Director):
-        """ Returns a list of Movies, whose director match those in director, from the repository.
+        """ Returns a list of Movies, whose director match those in director, from the repository, ordered by rank.
 
         If there are no matches, this method returns an empty list.
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def search_movies(self, query: str, limit: int = 10) -> List[Movie]:
+        """ Returns up to limit Movies whose title, description, actors, director or genres best match the words of
+        query, best match first.
+
+        If no Movies match, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def query_movies(self, query: MovieQuery) -> List[Movie]:
+        """ Returns the Movies selected by query, in the order it specifies.
+
+        If no Movies match, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_columns(self) -> MovieColumns:
+        """ Returns the numeric attributes of the repository's Movies, in rank order, as NumPy arrays. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalogue_rollups(self) -> CatalogueRollups:
+        """ Returns the per-genre, per-year and per-director aggregates, kept up to date as Movies are added. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_costar_graph(self) -> CostarGraph:
+        """ Returns the graph linking each Actor to the Actors they have shared a Movie with. """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_similar_movies(self, movie: Movie, limit: int = 10) -> List[Movie]:
+        """ Returns up to limit Movies most like movie by genres, cast, director and description, most similar first.
+
+        The neighbours are precomputed, so this does no similarity calculations.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def autocomplete(self, prefix: str, limit: int = 10) -> dict:
+        """ Returns the Movies, Actors and Directors with a word of their title or name beginning with prefix.
+
+        The return value is a dict with keys 'titles', 'actors' and 'directors', mapping to lists of at most limit
+        Movies, Actors and Directors. Movies are ordered by votes, and Actors and Directors by the total votes of their
+        Movies, most first.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_rank_of_previous_movie(self, movie: Movie):
         """ Returns the year of an Movie that immediately precedes movie.
@@ -129,8 +228,11 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def add_actor(self, actor: Actor):
-        """ Adds an actor to the repository. """
+    def add_actor(self, actor: Actor) -> Actor:
+        """ Adds an actor to the repository, unless an equal Actor is already stored.
+
+        Returns the canonical Actor held by the repository, which callers should reference in place of actor.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -139,8 +241,11 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def add_director(self, director: Director):
-        """ Adds a Director to the repository. """
+    def add_director(self, director: Director) -> Director:
+        """ Adds a Director to the repository, unless an equal Director is already stored.
+
+        Returns the canonical Director held by the repository, which callers should reference in place of director.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -149,8 +254,11 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def add_genre(self, genre: Genre):
-        """ Adds a Genre to the repository. """
+    def add_genre(self, genre: Genre) -> Genre:
+        """ Adds a Genre to the repository, unless an equal Genre is already stored.
+
+        Returns the canonical Genre held by the repository, which callers should reference in place of genre.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
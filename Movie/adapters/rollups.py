@@ -0,0 +1,111 @@
+from bisect import bisect_left, insort_left
+from typing import Dict, List, NamedTuple, Optional
+
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+
+# Directors with fewer movies than this are left out of the ranking, so one well-rated film doesn't top it.
+MIN_DIRECTOR_MOVIES = 2
+
+
+class GenreRollup(NamedTuple):
+    genre: Genre
+    movies: int
+    mean_rating: Optional[float]
+    total_revenue: float
+
+
+class DirectorRollup(NamedTuple):
+    director: Director
+    movies: int
+    mean_rating: float
+
+
+class Totals:
+    """ Running count and sums for one group of movies. """
+
+    __slots__ = ('movies', 'rated', 'rating_total', 'revenue_total')
+
+    def __init__(self):
+        self.movies = 0
+        self.rated = 0
+        self.rating_total = 0.0
+        self.revenue_total = 0.0
+
+    def add_movie(self, movie: Movie):
+        self.movies += 1
+        if movie.rating is not None:
+            self.rated += 1
+            self.rating_total += movie.rating
+        if movie.revenue is not None:
+            self.revenue_total += movie.revenue
+
+    @property
+    def mean_rating(self) -> Optional[float]:
+        return self.rating_total / self.rated if self.rated else None
+
+
+class CatalogueRollups:
+    """ Aggregates over the catalogue, updated as each movie is added so that reading them never scans the movies.
+
+    Each read costs time proportional to the number of genres, years or directors requested, not to the number
+    of movies.
+    """
+
+    def __init__(self):
+        self.__movies = 0
+        self.__genres: Dict[Genre, Totals] = dict()
+        self.__years: Dict[int, int] = dict()
+        self.__directors: Dict[Director, Totals] = dict()
+
+        # Ranked directors as (-mean rating, director name, Director) keys; a new movie moves only its own
+        # director's key.
+        self.__director_ranking: List[tuple] = list()
+
+    def add_movie(self, movie: Movie):
+        self.__movies += 1
+        for genre in movie.genres:
+            self.__genres.setdefault(genre, Totals()).add_movie(movie)
+        if movie.year is not None:
+            self.__years[movie.year] = self.__years.get(movie.year, 0) + 1
+        if movie.director is not None:
+            self.__add_directed_movie(movie)
+
+    def __add_directed_movie(self, movie: Movie):
+        director = movie.director
+        totals = self.__directors.setdefault(director, Totals())
+
+        old_key = self.__ranking_key(director, totals)
+        totals.add_movie(movie)
+        new_key = self.__ranking_key(director, totals)
+
+        if old_key is not None:
+            del self.__director_ranking[bisect_left(self.__director_ranking, old_key)]
+        if new_key is not None:
+            insort_left(self.__director_ranking, new_key)
+
+    @staticmethod
+    def __ranking_key(director: Director, totals: Totals):
+        if totals.movies < MIN_DIRECTOR_MOVIES or totals.mean_rating is None:
+            return None
+        return -totals.mean_rating, director.director_full_name, director
+
+    @property
+    def number_of_movies(self) -> int:
+        return self.__movies
+
+    def genres(self) -> List[GenreRollup]:
+        """ Returns a rollup for each genre, in genre name order. """
+        return [GenreRollup(genre, totals.movies, totals.mean_rating, totals.revenue_total)
+                for genre, totals in sorted(self.__genres.items())]
+
+    def movies_by_year(self) -> Dict[int, int]:
+        """ Returns the number of movies released each year, in year order. """
+        return dict(sorted(self.__years.items()))
+
+    def top_directors(self, n: int = 10) -> List[DirectorRollup]:
+        """ Returns the n directors with the highest mean rating across at least MIN_DIRECTOR_MOVIES movies. """
+        return [DirectorRollup(director, self.__directors[director].movies, -negated_rating)
+                for negated_rating, _, director in self.__director_ranking[:n]]
@@ -0,0 +1,112 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+
+class ReadWriteLock:
+    """ A lock that any number of readers may hold at once, or a single writer.
+
+    Writers take precedence: once a writer is waiting, new readers wait behind it, so a steady stream of reads can't
+    starve writes. Both modes are reentrant, and a thread holding the write lock may also read; a thread holding only
+    the read lock may not upgrade to writing, since two readers doing so would wait on each other forever.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__waiting_writers = 0
+
+        # Number of nested acquisitions held by each thread, of either mode.
+        self.__local = threading.local()
+
+    def acquire_read(self):
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if depth > 0:
+            local.depth = depth + 1
+            return
+
+        with self.__condition:
+            while self.__writer is not None or self.__waiting_writers > 0:
+                self.__condition.wait()
+            self.__readers += 1
+        local.depth = 1
+
+    def release_read(self):
+        local = self.__local
+        local.depth -= 1
+        if local.depth == 0:
+            with self.__condition:
+                self.__readers -= 1
+                if self.__readers == 0:
+                    self.__condition.notify_all()
+
+    def acquire_write(self):
+        local = self.__local
+        depth = getattr(local, 'depth', 0)
+        if self.__writer == threading.get_ident():
+            local.depth = depth + 1
+            return
+        if depth > 0:
+            raise RuntimeError('A read lock cannot be upgraded to a write lock')
+
+        with self.__condition:
+            self.__waiting_writers += 1
+            try:
+                while self.__writer is not None or self.__readers > 0:
+                    self.__condition.wait()
+            finally:
+                self.__waiting_writers -= 1
+            self.__writer = threading.get_ident()
+        local.depth = 1
+
+    def release_write(self):
+        local = self.__local
+        local.depth -= 1
+        if local.depth == 0:
+            with self.__condition:
+                self.__writer = None
+                self.__condition.notify_all()
+
+    @contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def read_locked(method):
+    """ Decorates a method of an object with a ReadWriteLock as its lock attribute to run holding the read lock. """
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_read()
+    return locked
+
+
+def write_locked(method):
+    """ Decorates a method of an object with a ReadWriteLock as its lock attribute to run holding the write lock. """
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+    return locked
@@ -0,0 +1,102 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+from Movie.domain.movie import Movie
+
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Words too common to distinguish one movie from another.
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'her', 'his', 'in', 'into', 'is',
+    'it', 'its', 'of', 'on', 'or', 'she', 'that', 'the', 'their', 'they', 'this', 'to', 'was', 'who', 'with'
+))
+
+# Weight of a term occurrence in each field, so that a title match counts for more than a description match.
+FIELD_WEIGHTS = (('title', 3.0), ('people', 2.0), ('genres', 2.0), ('description', 1.0))
+
+
+def tokenise(text: str) -> List[str]:
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def movie_fields(movie: Movie) -> dict:
+    people = [actor.actor_full_name or '' for actor in movie.actors]
+    if movie.director is not None:
+        people.append(movie.director.director_full_name or '')
+    return {
+        'title': movie.title,
+        'people': ' '.join(people),
+        'genres': ' '.join(genre.genre_name or '' for genre in movie.genres),
+        'description': movie.description
+    }
+
+
+class SearchIndex:
+    """ An inverted index over the titles, descriptions, people and genres of Movies, ranking matches by BM25.
+
+    Each term maps to a posting list of the ranks of the Movies containing it, with the term's field-weighted
+    frequency. A query only visits the posting lists of its own terms.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.__postings = dict()
+        self.__document_terms = dict()
+        self.__document_lengths = dict()
+        self.__total_length = 0.0
+
+    def add_movie(self, movie: Movie):
+        if movie.rank in self.__document_terms:
+            self.remove_movie(movie.rank)
+
+        fields = movie_fields(movie)
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenise(fields[field]):
+                frequencies[term] += weight
+
+        for term, frequency in frequencies.items():
+            self.__postings.setdefault(term, dict())[movie.rank] = frequency
+
+        length = sum(frequencies.values())
+        self.__document_terms[movie.rank] = tuple(frequencies)
+        self.__document_lengths[movie.rank] = length
+        self.__total_length += length
+
+    def remove_movie(self, rank: int):
+        for term in self.__document_terms.pop(rank, ()):
+            posting_list = self.__postings[term]
+            del posting_list[rank]
+            if len(posting_list) == 0:
+                del self.__postings[term]
+        self.__total_length -= self.__document_lengths.pop(rank, 0.0)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """ Returns up to limit (rank, score) pairs for the Movies best matching query, best first. """
+        number_of_documents = len(self.__document_lengths)
+        if number_of_documents == 0 or limit < 1:
+            return []
+        average_length = self.__total_length / number_of_documents
+
+        scores = Counter()
+        for term in set(tokenise(query)):
+            posting_list = self.__postings.get(term)
+            if posting_list is None:
+                continue
+
+            document_frequency = len(posting_list)
+            idf = math.log(1 + (number_of_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+            for rank, frequency in posting_list.items():
+                length_norm = self.K1 * (1 - self.B + self.B * self.__document_lengths[rank] / average_length)
+                scores[rank] += idf * frequency * (self.K1 + 1) / (frequency + length_norm)
+
+        # Break ties between equal scores by rank.
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
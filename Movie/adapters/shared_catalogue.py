@@ -0,0 +1,324 @@
+"""A read-only catalogue file that worker processes map into memory and share.
+
+The catalogue is written once, from the movie data file, as packed NumPy arrays: one column per numeric attribute,
+string ids for titles, descriptions and people, offsets into flat arrays of credits, rank-ordered rows for each
+actor, director and genre, and the rows of each movie's most similar movies. Every string is stored once, in a string
+table. Workers map the file read-only and read the arrays in place, so the operating system keeps a single copy in its
+page cache however many workers there are; Movie objects are built in a worker only for the rows it reads, and kept
+only while something in the worker refers to them.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Movie.adapters.columnar import COLUMN_TYPES, column_value
+from Movie.adapters.datafilereaders.movie_file_csv_reader import MovieRecord, build_movies, intern_table
+from Movie.adapters.similarity import SimilarMovies
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+MAGIC = b'MOVIECAT'
+
+# Bump whenever the layout of the file changes, so stale catalogue files are rebuilt.
+FORMAT_VERSION = 2
+
+# Arrays start on cache line boundaries.
+ALIGNMENT = 64
+
+# The kinds of facet with rows of movies in the file, and the MovieRecord field each is read from.
+FACETS = (('actor', 'actors'), ('director', 'director'), ('genre', 'genres'))
+
+
+class StringTable:
+    """ Assigns each distinct string an id, in the order first seen. """
+
+    def __init__(self):
+        self.__ids = dict()
+
+    def add(self, string: str) -> int:
+        return self.__ids.setdefault(string, len(self.__ids))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns the UTF-8 bytes of the strings, concatenated in id order, and the offset of each in them. """
+        encoded = [string.encode('utf-8') for string in self.__ids]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(data) for data in encoded])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def catalogue_arrays(records: Iterable[MovieRecord]) -> Dict[str, np.ndarray]:
+    """ Returns the arrays of the catalogue file for records, keyed by name. """
+    records = sorted(records, key=lambda record: record.rank)
+    strings = StringTable()
+    arrays = {attribute: np.array([column_value(getattr(record, attribute)) for record in records], dtype=dtype)
+              for attribute, dtype in COLUMN_TYPES}
+    arrays['title'] = np.array([strings.add(record.title) for record in records], dtype=np.int32)
+    arrays['description'] = np.array([strings.add(record.description) for record in records], dtype=np.int32)
+
+    for kind, field in FACETS:
+        names = [[getattr(record, field)] if kind == 'director' else getattr(record, field) for record in records]
+        credits = [[strings.add(name) for name in movie_names] for movie_names in names]
+        arrays[kind + '_offsets'] = np.cumsum([0] + [len(movie_credits) for movie_credits in credits], dtype=np.int64)
+        arrays[kind + '_credits'] = np.array([name for movie_credits in credits for name in movie_credits],
+                                             dtype=np.int32)
+
+        # Each name's rows, in rank order, for the facet's posting lists; names are ordered for binary search.
+        rows = dict()
+        for row, movie_names in enumerate(names):
+            for name in dict.fromkeys(movie_names):
+                rows.setdefault(name, list()).append(row)
+        keys = sorted(rows)
+        arrays[kind + '_keys'] = np.array([strings.add(name) for name in keys], dtype=np.int32)
+        arrays[kind + '_row_offsets'] = np.cumsum([0] + [len(rows[name]) for name in keys], dtype=np.int64)
+        arrays[kind + '_rows'] = np.array([row for name in keys for row in rows[name]], dtype=np.int32)
+
+    # Each movie's most similar movies, best first, computed once here rather than in every worker.
+    movies = list(build_movies(records, intern_table(dict()), intern_table(dict()), intern_table(dict())))
+    similar_movies = SimilarMovies(movies)
+    row_of = {movie.rank: row for row, movie in enumerate(movies)}
+    similar = [[row_of[other.rank] for other, _ in similar_movies.similar_to(movie)] for movie in movies]
+    arrays['similar_offsets'] = np.cumsum([0] + [len(rows) for rows in similar], dtype=np.int64)
+    arrays['similar_rows'] = np.array([row for rows in similar for row in rows], dtype=np.int32)
+
+    arrays['strings'], arrays['string_offsets'] = strings.arrays()
+    return arrays
+
+
+def write_catalogue(path: str, records: Iterable[MovieRecord]):
+    """ Writes the catalogue of records to path.
+
+    The file is a magic number, the length of a JSON header locating each array, the header, and the arrays. It is
+    written to a temporary file and renamed, so that processes starting concurrently never map a partial catalogue.
+    """
+    arrays = catalogue_arrays(records)
+
+    sections = dict()
+    offset = 0
+    for name, array in arrays.items():
+        sections[name] = {'dtype': array.dtype.str, 'count': len(array), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({'version': FORMAT_VERSION, 'sections': sections}).encode('utf-8')
+    start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, mode='wb') as outfile:
+        outfile.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for name, array in arrays.items():
+            outfile.seek(start + sections[name]['offset'])
+            outfile.write(array.tobytes())
+        outfile.truncate(start + offset)
+    os.replace(temp_path, path)
+
+
+class SharedCatalogue:
+    """ The arrays of a catalogue file, mapped read-only into memory. """
+
+    def __init__(self, path: str):
+        with open(path, mode='rb') as infile:
+            self.__map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.__map[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a catalogue file'.format(path))
+        header_length, = struct.unpack_from('<I', self.__map, len(MAGIC))
+        header = json.loads(self.__map[len(MAGIC) + 4:len(MAGIC) + 4 + header_length].decode('utf-8'))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError('{} has catalogue format version {}'.format(path, header['version']))
+
+        # Each array is a view of the mapped file; nothing is copied.
+        start = -(-(len(MAGIC) + 4 + header_length) // ALIGNMENT) * ALIGNMENT
+        self.__arrays = {name: np.frombuffer(self.__map, dtype=np.dtype(section['dtype']), count=section['count'],
+                                             offset=start + section['offset'])
+                         for name, section in header['sections'].items()}
+
+    def __len__(self):
+        return len(self.__arrays['rank'])
+
+    def array(self, name: str) -> np.ndarray:
+        return self.__arrays[name]
+
+    def string(self, string_id: int) -> str:
+        offsets = self.__arrays['string_offsets']
+        return self.__arrays['strings'][offsets[string_id]:offsets[string_id + 1]].tobytes().decode('utf-8')
+
+    def credits(self, kind: str, row: int) -> np.ndarray:
+        """ Returns the string ids of the names credited under kind for the movie at row. """
+        offsets = self.__arrays[kind + '_offsets']
+        return self.__arrays[kind + '_credits'][offsets[row]:offsets[row + 1]]
+
+    def similar_rows(self, row: int) -> np.ndarray:
+        """ Returns the rows of the movies most similar to the movie at row, best first. """
+        offsets = self.__arrays['similar_offsets']
+        return self.__arrays['similar_rows'][offsets[row]:offsets[row + 1]]
+
+    def facet_names(self, kind: str) -> List[str]:
+        return [self.string(string_id) for string_id in self.__arrays[kind + '_keys']]
+
+    def facet_rows(self, kind: str, name: str) -> np.ndarray:
+        """ Returns the rows, in rank order, of the movies crediting name under kind. """
+        keys = self.__arrays[kind + '_keys']
+        index = bisect_left(FacetNames(self, keys), name)
+        if index == len(keys) or self.string(keys[index]) != name:
+            return np.empty(0, dtype=np.int32)
+        offsets = self.__arrays[kind + '_row_offsets']
+        return self.__arrays[kind + '_rows'][offsets[index]:offsets[index + 1]]
+
+    def close(self):
+        # Arrays still viewing the map keep it open; it is closed once they are released.
+        self.__arrays = dict()
+        try:
+            self.__map.close()
+        except BufferError:
+            pass
+
+
+class FacetNames:
+    """ The names of a facet's keys, decoded as they are read, so that bisect can search them in place. """
+
+    def __init__(self, catalogue: SharedCatalogue, keys: np.ndarray):
+        self.__catalogue = catalogue
+        self.__keys = keys
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __getitem__(self, index: int) -> str:
+        return self.__catalogue.string(self.__keys[index])
+
+
+class SharedCatalogueView:
+    """ A CatalogueView over a SharedCatalogue, building each Movie when it is read.
+
+    A built Movie is held weakly: it is reused for as long as anything in the process refers to it, and is otherwise
+    dropped, to be built again when next read. Movies carrying per-process state are referred to by that state, by
+    their Comments and by the Users watching them, so readers always see the instance holding it. Actors, Directors and
+    Genres are few, and are built once per process and kept. The catalogue is read-only, so the view's generation never
+    changes.
+    """
+
+    def __init__(self, catalogue: SharedCatalogue, generation: int = 1):
+        self.__catalogue = catalogue
+        self.__generation = generation
+        self.__ranks = catalogue.array('rank')
+
+        # Instances built so far, keyed by row or string id; setdefault keeps the first when threads race to build one.
+        self.__movies = weakref.WeakValueDictionary()
+        self.__movies_lock = threading.Lock()
+        self.__actors: Dict[int, Actor] = dict()
+        self.__directors: Dict[int, Director] = dict()
+        self.__genres: Dict[int, Genre] = dict()
+
+    @property
+    def catalogue(self) -> SharedCatalogue:
+        return self.__catalogue
+
+    @property
+    def generation(self) -> int:
+        return self.__generation
+
+    @property
+    def movies(self) -> Tuple[Movie, ...]:
+        # Every Movie is built only when all of them are asked for, and the view doesn't keep them.
+        return tuple(self.movie_at(row) for row in range(len(self.__ranks)))
+
+    def movie_at(self, row: int) -> Movie:
+        movie = self.__movies.get(row)
+        if movie is None:
+            built = self.__build_movie(row)
+            with self.__movies_lock:
+                movie = self.__movies.setdefault(row, built)
+        return movie
+
+    def read_movie(self, row: int) -> Movie:
+        """ Returns the Movie at row if it has been built, and otherwise builds one that the view doesn't keep, for
+        reading every movie once, e.g. to index the catalogue, without keeping them all.
+        """
+        movie = self.__movies.get(row)
+        return movie if movie is not None else self.__build_movie(row)
+
+    def movies_at(self, rows: Iterable[int]) -> List[Movie]:
+        return [self.movie_at(int(row)) for row in rows]
+
+    def actor(self, string_id: int) -> Actor:
+        return self.__intern(self.__actors, string_id, Actor)
+
+    def director(self, string_id: int) -> Director:
+        return self.__intern(self.__directors, string_id, Director)
+
+    def genre(self, string_id: int) -> Genre:
+        return self.__intern(self.__genres, string_id, Genre)
+
+    def row(self, rank: int) -> Optional[int]:
+        row = int(np.searchsorted(self.__ranks, rank))
+        if row < len(self.__ranks) and self.__ranks[row] == rank:
+            return row
+        return None
+
+    def get_movie(self, rank: int) -> Optional[Movie]:
+        row = self.row(rank)
+        return self.movie_at(row) if row is not None else None
+
+    def movies_with_rank(self, rank: int) -> List[Movie]:
+        start, end = np.searchsorted(self.__ranks, [rank, rank + 1])
+        return self.movies_at(range(start, end))
+
+    def page(self, start_rank: int = None, limit: int = 1):
+        ranks = self.__ranks
+        start = 0 if start_rank is None else int(np.searchsorted(ranks, start_rank))
+        end = start + limit
+
+        previous_rank = int(ranks[max(start - limit, 0)]) if start > 0 else None
+        next_rank = int(ranks[end]) if end < len(ranks) else None
+        return self.movies_at(range(start, min(end, len(ranks)))), previous_rank, next_rank
+
+    def neighbouring_ranks(self, rank: int):
+        ranks = self.__ranks
+        before, after = np.searchsorted(ranks, [rank, rank + 1])
+
+        previous_rank = int(ranks[before - 1]) if before > 0 else None
+        next_rank = int(ranks[after]) if after < len(ranks) else None
+        return previous_rank, next_rank
+
+    def __len__(self):
+        return len(self.__ranks)
+
+    def __getitem__(self, row: int) -> Movie:
+        return self.movie_at(row)
+
+    def __intern(self, table: dict, string_id: int, entity_class):
+        string_id = int(string_id)
+        entity = table.get(string_id)
+        if entity is None:
+            entity = table.setdefault(string_id, entity_class(self.__catalogue.string(string_id)))
+        return entity
+
+    def __build_movie(self, row: int) -> Movie:
+        catalogue = self.__catalogue
+        revenue = float(catalogue.array('revenue')[row])
+        metascore = float(catalogue.array('metascore')[row])
+        movie = Movie(rank=int(self.__ranks[row]),
+                      title=catalogue.string(catalogue.array('title')[row]),
+                      description=catalogue.string(catalogue.array('description')[row]),
+                      year=int(catalogue.array('year')[row]),
+                      duration=int(catalogue.array('duration')[row]),
+                      rating=float(catalogue.array('rating')[row]),
+                      votes=int(catalogue.array('votes')[row]),
+                      revenue=None if np.isnan(revenue) else revenue,
+                      metascore=None if np.isnan(metascore) else int(metascore)
+                      )
+        for string_id in catalogue.credits('director', row):
+            movie.director = self.director(string_id)
+        for string_id in catalogue.credits('actor', row):
+            movie.add_actor(self.actor(string_id))
+        for string_id in catalogue.credits('genre', row):
+            movie.add_genre(self.genre(string_id))
+        return movie
@@ -0,0 +1,210 @@
+import os
+import threading
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+import numpy as np
+
+from Movie.adapters.autocomplete import AutocompleteIndex
+from Movie.adapters.columnar import COLUMN_TYPES, MovieColumns
+from Movie.adapters.costar_graph import CostarGraph
+from Movie.adapters.datafilereaders.movie_file_csv_reader import read_movie_records
+from Movie.adapters.memory_repository import MemoryRepository, load_comments, load_users
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.repository import RepositoryException
+from Movie.adapters.rollups import CatalogueRollups
+from Movie.adapters.search_index import SearchIndex
+from Movie.adapters.shared_catalogue import SharedCatalogue, SharedCatalogueView, write_catalogue
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+
+class CatalogueTitle(NamedTuple):
+    """ The title and votes of the movie at a row of a SharedCatalogue, for autocompleting titles. """
+    row: int
+    title: str
+    votes: int
+
+
+class SharedMemoryRepository(MemoryRepository):
+    """ A MemoryRepository whose movies are read from a SharedCatalogue that worker processes map from one file.
+
+    Lookups by rank, pages, the movies of a genre, actor or director, similar movies, queries and statistics read the
+    shared arrays, building only the Movies they return. Users, comments and watched movies are held by each process,
+    as in MemoryRepository. The search, autocomplete, rollup and co-star indexes are built by a process the first time
+    it needs them, reading each movie once without keeping it. The catalogue is read-only, so movies can't be added.
+    """
+
+    def __init__(self, catalogue: SharedCatalogue):
+        self.__view = SharedCatalogueView(catalogue)
+        super().__init__(self.__view)
+        self.__indexes = dict()
+        self.__indexes_lock = threading.Lock()
+
+    def add_movie(self, movie: Movie):
+        raise RepositoryException('Movies cannot be added to a shared catalogue')
+
+    def add_movies(self, movies: Iterable[Movie]):
+        raise RepositoryException('Movies cannot be added to a shared catalogue')
+
+    def get_first_movie(self):
+        if len(self.__view) > 0:
+            return self.__view.movie_at(0)
+
+    def get_last_movie(self):
+        if len(self.__view) > 0:
+            return self.__view.movie_at(len(self.__view) - 1)
+
+    def get_movie_by_genre(self, genre: Genre):
+        if not isinstance(genre, Genre):
+            return []
+        return self.__view.movies_at(self.__view.catalogue.facet_rows('genre', genre.genre_name))
+
+    def get_movie_by_actor(self, actor: Actor):
+        if not isinstance(actor, Actor):
+            return []
+        return self.__view.movies_at(self.__view.catalogue.facet_rows('actor', actor.actor_full_name))
+
+    def get_movie_by_director(self, director: Director):
+        if not isinstance(director, Director):
+            return []
+        return self.__view.movies_at(self.__view.catalogue.facet_rows('director', director.director_full_name))
+
+    def get_actor(self) -> List[Actor]:
+        return [self.__view.actor(string_id) for string_id in self.__view.catalogue.array('actor_keys')]
+
+    def get_director(self):
+        return [self.__view.director(string_id) for string_id in self.__view.catalogue.array('director_keys')]
+
+    def get_genre(self) -> List[Genre]:
+        return [self.__view.genre(string_id) for string_id in self.__view.catalogue.array('genre_keys')]
+
+    def search_movies(self, query: str, limit: int = 10) -> List[Movie]:
+        search_index = self.__index('search', self.__build_search_index)
+        return [self.__view.get_movie(rank) for rank, _ in search_index.search(query, limit)]
+
+    def query_movies(self, query: MovieQuery) -> List[Movie]:
+        catalogue = self.__view.catalogue
+        selected = np.ones(len(self.__view), dtype=bool)
+        facets = [('genre', genre.genre_name) for genre in query.genres] + \
+                 [('actor', actor.actor_full_name) for actor in query.actors]
+        if query.director is not None:
+            facets.append(('director', query.director.director_full_name))
+        for kind, name in facets:
+            facet_mask = np.zeros(len(selected), dtype=bool)
+            facet_mask[catalogue.facet_rows(kind, name)] = True
+            selected &= facet_mask
+
+        columns = self.get_movie_columns()
+        for attribute, (low, high) in query.ranges.items():
+            selected &= columns.range_mask(attribute, low, high)
+
+        rows = self.__sorted_rows(np.flatnonzero(selected), query.sort_by, query.descending)
+        return self.__view.movies_at(rows if query.limit is None else rows[:query.limit])
+
+    def get_movie_columns(self) -> MovieColumns:
+        return self.__index('columns', self.__build_movie_columns)
+
+    def get_catalogue_rollups(self) -> CatalogueRollups:
+        return self.__index('rollups', self.__build_rollups)
+
+    def get_costar_graph(self) -> CostarGraph:
+        return self.__index('costar_graph', lambda: CostarGraph(self.__read_movies()))
+
+    def get_similar_movies(self, movie: Movie, limit: int = 10) -> List[Movie]:
+        row = self.__view.row(movie.rank)
+        if row is None:
+            return []
+        return self.__view.movies_at(self.__view.catalogue.similar_rows(row)[:limit])
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> dict:
+        completions = self.__index('autocomplete', self.__build_autocomplete_index).complete(prefix, limit)
+        completions['titles'] = [self.__view.movie_at(title.row) for title in completions['titles']]
+        return completions
+
+    # Helper method to return the index built by build under name, building it the first time it is asked for.
+    def __index(self, name: str, build: Callable):
+        with self.__indexes_lock:
+            index = self.__indexes.get(name)
+            if index is None:
+                index = self.__indexes[name] = build()
+            return index
+
+    # Helper method to read every movie in rank order, building only those not already built, which aren't kept.
+    def __read_movies(self) -> Iterator[Movie]:
+        return (self.__view.read_movie(row) for row in range(len(self.__view)))
+
+    # Helper method to order rows as sort_movies orders their Movies: by sort_by, with rows lacking a value last and
+    # ties in rank order. Rows are in rank order, and are reordered without building their Movies.
+    def __sorted_rows(self, rows: np.ndarray, sort_by: str, descending: bool) -> np.ndarray:
+        catalogue = self.__view.catalogue
+        if sort_by == 'title':
+            titles = catalogue.array('title')
+            return np.array(sorted(rows, key=lambda row: catalogue.string(titles[row]), reverse=descending),
+                            dtype=np.int64)
+
+        values = catalogue.array(sort_by)[rows].astype(np.float64)
+        present = ~np.isnan(values)
+        sign = -1 if descending else 1
+        order = np.lexsort((rows[present], sign * values[present]))
+        return np.concatenate((rows[present][order], rows[~present]))
+
+    def __build_search_index(self) -> SearchIndex:
+        search_index = SearchIndex()
+        for movie in self.__read_movies():
+            search_index.add_movie(movie)
+        return search_index
+
+    def __build_movie_columns(self) -> MovieColumns:
+        catalogue = self.__view.catalogue
+        row_offsets = catalogue.array('genre_row_offsets')
+        return MovieColumns.from_arrays(self.__view,
+                                        {attribute: catalogue.array(attribute) for attribute, _ in COLUMN_TYPES},
+                                        self.get_genre(),
+                                        catalogue.array('genre_rows'),
+                                        np.repeat(np.arange(len(row_offsets) - 1), np.diff(row_offsets)))
+
+    def __build_rollups(self) -> CatalogueRollups:
+        rollups = CatalogueRollups()
+        for movie in self.__read_movies():
+            rollups.add_movie(movie)
+        return rollups
+
+    def __build_autocomplete_index(self) -> AutocompleteIndex:
+        catalogue = self.__view.catalogue
+        titles = [CatalogueTitle(row, catalogue.string(string_id), int(votes))
+                  for row, (string_id, votes) in enumerate(zip(catalogue.array('title'), catalogue.array('votes')))]
+        return AutocompleteIndex(
+            titles, self.get_actor(), self.get_director(),
+            lambda actor: [titles[row] for row in catalogue.facet_rows('actor', actor.actor_full_name)],
+            lambda director: [titles[row] for row in catalogue.facet_rows('director', director.director_full_name)])
+
+
+def shared_catalogue_is_current(catalogue_path: str, data_path: str) -> bool:
+    if not os.path.exists(catalogue_path):
+        return False
+    return os.path.getmtime(os.path.join(data_path, 'Data1000Movies.csv')) < os.path.getmtime(catalogue_path)
+
+
+def populate_from_shared_catalogue(data_path: str, catalogue_path: str) -> SharedMemoryRepository:
+    """ Returns a repository over the shared catalogue at catalogue_path, with the users and comments in data_path.
+
+    The catalogue is written from the movie data file first if it is missing, older than the data file, or in another
+    format. Run this in the master process before workers are forked, e.g. with gunicorn's --preload, so that it is
+    written once and every worker inherits the same mapping.
+    """
+    catalogue = None
+    if shared_catalogue_is_current(catalogue_path, data_path):
+        try:
+            catalogue = SharedCatalogue(catalogue_path)
+        except ValueError:
+            pass  # Ignore a catalogue in an outdated format and rewrite it.
+    if catalogue is None:
+        write_catalogue(catalogue_path, read_movie_records(os.path.join(data_path, 'Data1000Movies.csv')))
+        catalogue = SharedCatalogue(catalogue_path)
+
+    repo = SharedMemoryRepository(catalogue)
+    users = load_users(data_path, repo)
+    load_comments(data_path, repo, users)
+    return repo
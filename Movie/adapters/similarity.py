@@ -0,0 +1,167 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from Movie.adapters.search_index import tokenise
+from Movie.domain.movie import Movie
+
+
+# Number of similar movies kept for each movie.
+NEIGHBOURS = 10
+
+# Relative weight of each kind of feature. Each kind is normalised separately, so the similarity of two movies is the
+# weighted mean of their cosine similarities over genres, actors, director and description terms.
+FEATURE_WEIGHTS = {'genre': 1.0, 'actor': 1.0, 'director': 0.5, 'term': 1.0}
+
+# Catalogues with at least this many movies have their neighbours computed across a pool of processes.
+PARALLEL_MIN_MOVIES = 20000
+
+# Upper bound on the number of similarity scores held in memory by one block of the batch job.
+BLOCK_SCORES = 1 << 22
+
+
+def movie_features(movie: Movie) -> Dict[str, List[str]]:
+    features = {
+        'genre': [genre.genre_name for genre in movie.genres],
+        'actor': [actor.actor_full_name for actor in movie.actors],
+        'director': [movie.director.director_full_name] if movie.director is not None else [],
+        'term': tokenise(movie.description)
+    }
+    return {kind: values for kind, values in features.items() if values}
+
+
+class SimilarMovies:
+    """ The most similar movies to each movie, computed in one batch as cosine similarities of sparse feature
+    vectors, and extended incrementally as movies are added. """
+
+    def __init__(self, movies: Iterable[Movie] = (), neighbours: int = NEIGHBOURS, processes: int = None):
+        self.__neighbours = neighbours
+        self.__movies: List[Movie] = list(movies)
+
+        # Column of each (kind, value) feature, and the number of movies each description term occurs in.
+        self.__vocabulary: Dict[Tuple[str, str], int] = dict()
+        self.__term_frequencies: Dict[str, int] = dict()
+        for movie in self.__movies:
+            for term in set(movie_features(movie).get('term', ())):
+                self.__term_frequencies[term] = self.__term_frequencies.get(term, 0) + 1
+
+        rows = [self.__feature_row(movie) for movie in self.__movies]
+        self.__matrix = rows_to_matrix(rows, len(self.__vocabulary))
+
+        # Best first lists of (score, Movie), keyed by movie rank.
+        self.__similar: Dict[int, List[Tuple[float, Movie]]] = dict()
+        positions, scores = nearest_neighbours(self.__matrix, neighbours, processes)
+        for movie, movie_positions, movie_scores in zip(self.__movies, positions, scores):
+            self.__similar[movie.rank] = [(float(score), self.__movies[position])
+                                          for position, score in zip(movie_positions, movie_scores) if score > 0]
+
+    def __feature_row(self, movie: Movie) -> Dict[int, float]:
+        features = movie_features(movie)
+        row = dict()
+        for kind, values in features.items():
+            counts = dict()
+            for value in values:
+                weight = self.__idf(value) if kind == 'term' else 1.0
+                column = self.__vocabulary.setdefault((kind, value), len(self.__vocabulary))
+                counts[column] = counts.get(column, 0.0) + weight
+
+            # Scale each kind of feature to unit length, weighted, so that long casts or descriptions don't dominate.
+            norm = math.sqrt(sum(value * value for value in counts.values()))
+            for column, value in counts.items():
+                row[column] = value / norm * math.sqrt(FEATURE_WEIGHTS[kind])
+
+        total_weight = sum(FEATURE_WEIGHTS[kind] for kind in features)
+        return {column: value / math.sqrt(total_weight) for column, value in row.items()}
+
+    def __idf(self, term: str) -> float:
+        return math.log((len(self.__movies) + 1) / (self.__term_frequencies.get(term, 0) + 1)) + 1
+
+    def add_movie(self, movie: Movie):
+        """ Adds movie, finding its neighbours and entering it into the lists of the movies it is closer to than their
+        current neighbours. Term weights are not recomputed for the movies already present. """
+        for term in set(movie_features(movie).get('term', ())):
+            self.__term_frequencies[term] = self.__term_frequencies.get(term, 0) + 1
+        self.__movies.append(movie)
+
+        row = rows_to_matrix([self.__feature_row(movie)], len(self.__vocabulary))
+        self.__matrix.resize((self.__matrix.shape[0], len(self.__vocabulary)))
+        scores = (self.__matrix @ row.T).toarray().ravel()
+        self.__matrix = sparse.vstack([self.__matrix, row], format='csr')
+
+        for other, score in zip(self.__movies, scores):
+            if score <= 0:
+                continue
+            similar = self.__similar.get(other.rank, [])
+            if len(similar) < self.__neighbours or score > similar[-1][0]:
+                similar.append((float(score), movie))
+                similar.sort(key=lambda item: (-item[0], item[1].rank))
+                del similar[self.__neighbours:]
+
+        top = np.argsort(-scores, kind='stable')[:self.__neighbours]
+        self.__similar[movie.rank] = [(float(scores[position]), self.__movies[position])
+                                      for position in top if scores[position] > 0]
+
+    def similar_to(self, movie: Movie, limit: int = NEIGHBOURS) -> List[Tuple[Movie, float]]:
+        return [(other, score) for score, other in self.__similar.get(movie.rank, [])[:limit]]
+
+
+def rows_to_matrix(rows: List[Dict[int, float]], columns: int) -> sparse.csr_matrix:
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.fromiter((column for row in rows for column in row), dtype=np.int64, count=indptr[-1])
+    data = np.fromiter((value for row in rows for value in row.values()), dtype=np.float64, count=indptr[-1])
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), columns))
+
+
+def nearest_neighbours(matrix: sparse.csr_matrix, k: int, processes: int = None):
+    """ Returns, for each row of matrix, the positions and scores of the k rows with the highest cosine similarity,
+    best first and excluding the row itself. Large matrices are split into blocks shared across a process pool. """
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64), np.zeros((n, 0))
+
+    # Each block multiplies a slice of rows by the whole matrix, so bound the slice by the size of the result.
+    block_rows = max(1, BLOCK_SCORES // n)
+    blocks = [(start, min(start + block_rows, n)) for start in range(0, n, block_rows)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if n < PARALLEL_MIN_MOVIES or processes <= 1 or len(blocks) == 1:
+        results = [neighbour_block(matrix, k, start, stop) for start, stop in blocks]
+    else:
+        with ProcessPoolExecutor(processes, initializer=start_worker, initargs=(matrix, k)) as pool:
+            results = list(pool.map(worker_neighbour_block, blocks))
+
+    return np.vstack([positions for positions, _ in results]), np.vstack([scores for _, scores in results])
+
+
+def neighbour_block(matrix: sparse.csr_matrix, k: int, start: int, stop: int):
+    scores = (matrix[start:stop] @ matrix.T).toarray()
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = -np.inf
+
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+
+    # Order best first, breaking ties by rank order.
+    order = np.lexsort((top, -top_scores), axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+# The matrix and neighbour count, sent to each worker process once rather than with every block.
+worker_state = None
+
+
+def start_worker(matrix: sparse.csr_matrix, k: int):
+    global worker_state
+    worker_state = (matrix, k)
+
+
+def worker_neighbour_block(block: Tuple[int, int]):
+    matrix, k = worker_state
+    return neighbour_block(matrix, k, *block)
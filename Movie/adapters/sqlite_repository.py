@@ -0,0 +1,659 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from Movie.adapters.repository import AbstractRepository
+from Movie.adapters.columnar import MovieColumns
+from Movie.adapters.costar_graph import CostarGraph
+from Movie.adapters.memory_repository import MemoryRepository, populate
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.rollups import CatalogueRollups
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+from Movie.domain.user import User, normalise_user_name
+from Movie.domain.comment import Comment, make_comment
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    is_actor INTEGER NOT NULL DEFAULT 0,
+    is_director INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS movies (
+    rank INTEGER PRIMARY KEY,
+    title TEXT,
+    description TEXT,
+    year INTEGER,
+    duration INTEGER,
+    rating REAL,
+    votes INTEGER,
+    revenue REAL,
+    metascore INTEGER,
+    director_id INTEGER REFERENCES people (id)
+);
+CREATE INDEX IF NOT EXISTS movies_by_director ON movies (director_id, rank);
+CREATE INDEX IF NOT EXISTS movies_by_year ON movies (year, rank);
+CREATE INDEX IF NOT EXISTS movies_by_rating ON movies (rating, rank);
+CREATE INDEX IF NOT EXISTS movies_by_votes ON movies (votes, rank);
+CREATE INDEX IF NOT EXISTS movies_by_revenue ON movies (revenue, rank);
+CREATE INDEX IF NOT EXISTS movies_by_metascore ON movies (metascore, rank);
+CREATE TABLE IF NOT EXISTS credits (
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    person_id INTEGER NOT NULL REFERENCES people (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (movie_rank, person_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS credits_by_person ON credits (person_id, movie_rank);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    genre_id INTEGER NOT NULL REFERENCES genres (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (movie_rank, genre_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_by_genre ON movie_genres (genre_id, movie_rank);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    normalised_name TEXT NOT NULL UNIQUE,
+    user_name TEXT,
+    password TEXT
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    comment TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_by_movie ON comments (movie_rank, id);
+CREATE INDEX IF NOT EXISTS comments_by_user ON comments (user_id, id);
+CREATE TABLE IF NOT EXISTS watched_movies (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    UNIQUE (user_id, movie_rank)
+);
+CREATE TABLE IF NOT EXISTS watchlist_movies (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    movie_rank INTEGER NOT NULL REFERENCES movies (rank),
+    UNIQUE (user_id, movie_rank)
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO metadata (key, value) VALUES ('catalogue_version', 0);
+INSERT OR IGNORE INTO metadata (key, value) VALUES ('data_version', 0);
+INSERT OR IGNORE INTO metadata (key, value) VALUES ('populated', 0);
+"""
+
+# Statements are kept as constants so that each connection compiles them once and reuses them from its statement
+# cache.
+SELECT_MOVIES = """
+    SELECT movies.rank, title, description, year, duration, rating, votes, revenue, metascore, people.name
+    FROM movies LEFT JOIN people ON people.id = movies.director_id"""
+SELECT_ALL_MOVIES = SELECT_MOVIES + " ORDER BY rank"
+SELECT_MOVIES_BY_RANK = SELECT_MOVIES + " WHERE rank IN ({}) ORDER BY rank"
+SELECT_ALL_ACTORS = """
+    SELECT movie_rank, name FROM credits JOIN people ON people.id = credits.person_id ORDER BY movie_rank, position"""
+SELECT_ACTORS_BY_RANK = """
+    SELECT movie_rank, name FROM credits JOIN people ON people.id = credits.person_id
+    WHERE movie_rank IN ({}) ORDER BY movie_rank, position"""
+SELECT_ALL_GENRES = """
+    SELECT movie_rank, name FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id
+    ORDER BY movie_rank, position"""
+SELECT_GENRES_BY_RANK = """
+    SELECT movie_rank, name FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id
+    WHERE movie_rank IN ({}) ORDER BY movie_rank, position"""
+SELECT_ALL_MOVIE_COMMENTS = """
+    SELECT movie_rank, user_name, password, comment, timestamp FROM comments JOIN users ON users.id = comments.user_id
+    ORDER BY comments.id"""
+SELECT_MOVIE_COMMENTS_BY_RANK = """
+    SELECT movie_rank, user_name, password, comment, timestamp FROM comments JOIN users ON users.id = comments.user_id
+    WHERE movie_rank IN ({}) ORDER BY comments.id"""
+
+SELECT_RANKS_BY_GENRE = """
+    SELECT movie_rank FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id
+    WHERE genres.name = ? ORDER BY movie_rank"""
+SELECT_RANKS_BY_ACTOR = """
+    SELECT movie_rank FROM credits JOIN people ON people.id = credits.person_id
+    WHERE people.name = ? ORDER BY movie_rank"""
+SELECT_RANKS_BY_DIRECTOR = """
+    SELECT rank FROM movies JOIN people ON people.id = movies.director_id WHERE people.name = ? ORDER BY rank"""
+SELECT_RANKS_FROM = "SELECT rank FROM movies WHERE rank >= ? ORDER BY rank LIMIT ?"
+SELECT_RANKS_BEFORE = "SELECT rank FROM movies WHERE rank < ? ORDER BY rank DESC LIMIT ?"
+SELECT_FIRST_RANK = "SELECT MIN(rank) FROM movies"
+SELECT_LAST_RANK = "SELECT MAX(rank) FROM movies"
+SELECT_PREVIOUS_RANK = "SELECT MAX(rank) FROM movies WHERE rank < ?"
+SELECT_NEXT_RANK = "SELECT MIN(rank) FROM movies WHERE rank > ?"
+COUNT_MOVIES = "SELECT COUNT(*) FROM movies"
+
+INSERT_PERSON = "INSERT OR IGNORE INTO people (name) VALUES (?)"
+MARK_ACTOR = "UPDATE people SET is_actor = 1 WHERE name = ?"
+MARK_DIRECTOR = "UPDATE people SET is_director = 1 WHERE name = ?"
+INSERT_GENRE = "INSERT OR IGNORE INTO genres (name) VALUES (?)"
+INSERT_MOVIE = """
+    INSERT INTO movies (rank, title, description, year, duration, rating, votes, revenue, metascore, director_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT id FROM people WHERE name = ?))"""
+INSERT_CREDIT = """
+    INSERT OR IGNORE INTO credits (movie_rank, person_id, position) VALUES (?, (SELECT id FROM people WHERE name = ?), ?)"""
+INSERT_MOVIE_GENRE = """
+    INSERT OR IGNORE INTO movie_genres (movie_rank, genre_id, position)
+    VALUES (?, (SELECT id FROM genres WHERE name = ?), ?)"""
+BUMP_CATALOGUE_VERSION = "UPDATE metadata SET value = value + 1 WHERE key = 'catalogue_version'"
+SELECT_CATALOGUE_VERSION = "SELECT value FROM metadata WHERE key = 'catalogue_version'"
+BUMP_DATA_VERSION = "UPDATE metadata SET value = value + 1 WHERE key = 'data_version'"
+SELECT_DATA_VERSION = "SELECT value FROM metadata WHERE key = 'data_version'"
+SELECT_POPULATED = "SELECT value OR EXISTS (SELECT 1 FROM movies) FROM metadata WHERE key = 'populated'"
+MARK_POPULATED = "UPDATE metadata SET value = 1 WHERE key = 'populated'"
+SELECT_ACTOR_NAMES = "SELECT name FROM people WHERE is_actor ORDER BY id"
+SELECT_DIRECTOR_NAMES = "SELECT name FROM people WHERE is_director ORDER BY id"
+SELECT_GENRE_NAMES = "SELECT name FROM genres ORDER BY id"
+
+INSERT_USER = "INSERT OR IGNORE INTO users (normalised_name, user_name, password) VALUES (?, ?, ?)"
+SELECT_USER = "SELECT id, user_name, password FROM users WHERE normalised_name = ?"
+SELECT_USER_COMMENTS = "SELECT movie_rank, comment, timestamp FROM comments WHERE user_id = ? ORDER BY id"
+SELECT_WATCHED_RANKS = "SELECT movie_rank FROM watched_movies WHERE user_id = ? ORDER BY id"
+SELECT_WATCHLIST_RANKS = "SELECT movie_rank FROM watchlist_movies WHERE user_id = ? ORDER BY id"
+INSERT_WATCHED = """
+    INSERT OR IGNORE INTO watched_movies (user_id, movie_rank)
+    SELECT id, ? FROM users WHERE normalised_name = ?"""
+INSERT_WATCHLIST = """
+    INSERT OR IGNORE INTO watchlist_movies (user_id, movie_rank)
+    SELECT id, ? FROM users WHERE normalised_name = ?"""
+DELETE_WATCHLIST = """
+    DELETE FROM watchlist_movies WHERE movie_rank = ? AND user_id = (SELECT id FROM users WHERE normalised_name = ?)"""
+INSERT_COMMENT = """
+    INSERT INTO comments (user_id, movie_rank, comment, timestamp)
+    SELECT id, ?, ?, ? FROM users WHERE normalised_name = ?"""
+SELECT_COMMENTED_RANKS = "SELECT movie_rank FROM comments ORDER BY id"
+
+# SQLite limits the number of parameters of a statement, so long lists of ranks are fetched in batches.
+RANK_BATCH_SIZE = 500
+
+# Number of compiled statements each connection keeps for reuse.
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionPool:
+    """ Lends each thread an SQLite connection of its own, on first use. SQLite connections can't be used by two
+    threads at once.
+
+    A thread hands its connection back with release(), e.g. when a request ends, and later threads reuse it, so that a
+    server starting a thread per request doesn't open a connection per request. At most max_idle connections are kept
+    open while no thread holds them.
+    """
+
+    def __init__(self, database_path: str, timeout: float = 30.0, max_idle: int = 8):
+        self.__database_path = database_path
+        self.__timeout = timeout
+        self.__max_idle = max_idle
+        self.__local = threading.local()
+        self.__connections = list()
+        self.__idle = list()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        # Number of open connections, lent or idle.
+        with self.__lock:
+            return len(self.__connections)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            with self.__lock:
+                connection = self.__idle.pop() if self.__idle else None
+            if connection is None:
+                connection = self.__connect()
+                with self.__lock:
+                    self.__connections.append(connection)
+            self.__local.connection = connection
+        return connection
+
+    def release(self):
+        """ Takes back this thread's connection, if it has one, rolling back any transaction it left open. """
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            return
+        self.__local.connection = None
+        if connection.in_transaction:
+            connection.rollback()
+        with self.__lock:
+            if len(self.__idle) < self.__max_idle:
+                self.__idle.append(connection)
+                return
+            self.__connections.remove(connection)
+        connection.close()
+
+    def close(self):
+        with self.__lock:
+            for connection in self.__connections:
+                connection.close()
+            self.__connections.clear()
+            self.__idle.clear()
+        self.__local = threading.local()
+
+    def __connect(self) -> sqlite3.Connection:
+        # A connection is used by one thread at a time, but may pass between threads, and close() may be called from
+        # any.
+        connection = sqlite3.connect(self.__database_path, timeout=self.__timeout,
+                                     cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        # Write-ahead logging lets readers in other processes carry on while one process writes.
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA foreign_keys = ON')
+        return connection
+
+
+class SqliteRepository(AbstractRepository):
+    """ A repository stored in an SQLite database, which any number of processes can share.
+
+    Every read returns freshly built domain objects, so that users, comments and watched movies written by one
+    process are seen by the others. The search, autocomplete, analytics, co-star and similarity indexes are built
+    over the movie catalogue in each process when first needed, and rebuilt when the catalogue changes.
+    """
+
+    def __init__(self, database_path: str):
+        self.__pool = ConnectionPool(database_path)
+        self.__pool.connection().executescript(SCHEMA)
+
+        # Canonical instances of the Actors, Directors and Genres added by this process, for add_actor and co.
+        self.__actors = dict()
+        self.__directors = dict()
+        self.__genres = dict()
+
+        # Movies and derived indexes of the catalogue, with the catalogue version they were built from.
+        self.__catalogue = None
+        self.__catalogue_version = None
+        self.__catalogue_lock = threading.Lock()
+
+        # Whether each thread's writes are being batched into the transaction of populate_if_empty.
+        self.__batch = threading.local()
+
+    def close(self):
+        self.__pool.close()
+
+    def release_connection(self):
+        """ Hands this thread's connection back to the pool, for another thread to reuse; call it when a request ends.
+        """
+        self.__pool.release()
+
+    def populate_if_empty(self, data_path: str) -> bool:
+        """ Populates the database from the data files in data_path unless it has been populated already, returning
+        whether it was populated here.
+
+        The check and the whole population are one transaction, begun by taking the database's write lock, so that of
+        several processes starting on an empty database exactly one populates it while the others wait and then find
+        it populated.
+        """
+        connection = self.__connection()
+        connection.execute('BEGIN IMMEDIATE')
+        self.__batch.open = True
+        try:
+            populated = connection.execute(SELECT_POPULATED).fetchone()[0]
+            if not populated:
+                populate(data_path, self)
+                connection.execute(MARK_POPULATED)
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            self.__batch.open = False
+        return not populated
+
+    def add_user(self, user: User):
+        with self.__transaction() as connection:
+            connection.execute(INSERT_USER, (normalise_user_name(user.user_name), user.user_name, user.password))
+
+    def get_user(self, username) -> User:
+        connection = self.__connection()
+        row = connection.execute(SELECT_USER, (normalise_user_name(username),)).fetchone()
+        if row is None:
+            return None
+
+        user_id, user_name, password = row
+        user = User(user_name, password)
+
+        comment_rows = connection.execute(SELECT_USER_COMMENTS, (user_id,)).fetchall()
+        movies = self.__movies_by_rank([rank for rank, _, _ in comment_rows], with_comments=False)
+        for rank, comment_text, timestamp in comment_rows:
+            user.add_comment(Comment(user, movies[rank], comment_text, datetime.fromisoformat(timestamp)))
+
+        watched_ranks = [rank for rank, in connection.execute(SELECT_WATCHED_RANKS, (user_id,))]
+        for movie in self.__movies_in_order(watched_ranks, with_comments=False):
+            user.watch_movie(movie)
+
+        watchlist_ranks = [rank for rank, in connection.execute(SELECT_WATCHLIST_RANKS, (user_id,))]
+        for movie in self.__movies_in_order(watchlist_ranks, with_comments=False):
+            user.watchlist.add_movie(movie)
+        return user
+
+    def watch_movie(self, user: User, movie: Movie):
+        with self.__transaction() as connection:
+            connection.execute(INSERT_WATCHED, (movie.rank, normalise_user_name(user.user_name)))
+            connection.execute(DELETE_WATCHLIST, (movie.rank, normalise_user_name(user.user_name)))
+        user.watch_movie(movie)
+        user.watchlist.remove_movie(movie)
+
+    def add_to_watchlist(self, user: User, movie: Movie):
+        with self.__transaction() as connection:
+            connection.execute(INSERT_WATCHLIST, (movie.rank, normalise_user_name(user.user_name)))
+        user.watchlist.add_movie(movie)
+
+    def remove_from_watchlist(self, user: User, movie: Movie):
+        with self.__transaction() as connection:
+            connection.execute(DELETE_WATCHLIST, (movie.rank, normalise_user_name(user.user_name)))
+        user.watchlist.remove_movie(movie)
+
+    def add_movie(self, movie: Movie):
+        self.add_movies([movie])
+
+    def add_movies(self, movies: Iterable[Movie]):
+        movies = list(movies)
+        people = {actor.actor_full_name for movie in movies for actor in movie.actors}
+        directors = {movie.director.director_full_name for movie in movies if movie.director is not None}
+        genres = {genre.genre_name for movie in movies for genre in movie.genres}
+
+        # One transaction for the whole batch, with each statement run over all its rows.
+        with self.__transaction() as connection:
+            connection.executemany(INSERT_PERSON, ((name,) for name in people | directors))
+            connection.executemany(MARK_ACTOR, ((name,) for name in people))
+            connection.executemany(MARK_DIRECTOR, ((name,) for name in directors))
+            connection.executemany(INSERT_GENRE, ((name,) for name in genres))
+            connection.executemany(INSERT_MOVIE, (
+                (movie.rank, movie.title, movie.description, movie.year, movie.duration, movie.rating, movie.votes,
+                 movie.revenue, movie.metascore,
+                 movie.director.director_full_name if movie.director is not None else None) for movie in movies))
+            connection.executemany(INSERT_CREDIT, (
+                (movie.rank, actor.actor_full_name, position)
+                for movie in movies for position, actor in enumerate(movie.actors)))
+            connection.executemany(INSERT_MOVIE_GENRE, (
+                (movie.rank, genre.genre_name, position)
+                for movie in movies for position, genre in enumerate(movie.genres)))
+            connection.execute(BUMP_CATALOGUE_VERSION)
+
+    def get_movie(self, rank: int) -> Movie:
+        return self.__movies_by_rank([rank]).get(rank)
+
+    def get_movies(self) -> Tuple[Movie, ...]:
+        return tuple(self.__load_movies())
+
+    def get_catalogue_generation(self) -> int:
+        # Other processes may have written users and comments too, so every write to the database advances it.
+        return self.__connection().execute(SELECT_DATA_VERSION).fetchone()[0]
+
+    def get_movie_by_rank(self, target_rank: int) -> List[Movie]:
+        movie = self.get_movie(target_rank)
+        if movie is None:
+            raise ValueError('There is no movie with rank {}'.format(target_rank))
+        return [movie]
+
+    def get_movies_page(self, start_rank: int = None, limit: int = 1):
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+
+        connection = self.__connection()
+        if start_rank is None:
+            start_rank = connection.execute(SELECT_FIRST_RANK).fetchone()[0]
+            if start_rank is None:
+                return [], None, None
+
+        # Keyset lookups on the rank index: this page and the first rank of the next, then the previous page.
+        ranks = [rank for rank, in connection.execute(SELECT_RANKS_FROM, (start_rank, limit + 1))]
+        previous_ranks = [rank for rank, in connection.execute(SELECT_RANKS_BEFORE, (start_rank, limit))]
+
+        movies = self.__movies_in_order(ranks[:limit])
+        previous_rank = previous_ranks[-1] if previous_ranks else None
+        next_rank = ranks[limit] if len(ranks) > limit else None
+        return movies, previous_rank, next_rank
+
+    def get_number_of_movies(self):
+        return self.__connection().execute(COUNT_MOVIES).fetchone()[0]
+
+    def get_first_movie(self):
+        rank = self.__connection().execute(SELECT_FIRST_RANK).fetchone()[0]
+        return self.get_movie(rank) if rank is not None else None
+
+    def get_last_movie(self):
+        rank = self.__connection().execute(SELECT_LAST_RANK).fetchone()[0]
+        return self.get_movie(rank) if rank is not None else None
+
+    def get_movie_by_genre(self, genre: Genre):
+        if not isinstance(genre, Genre):
+            return []
+        return self.__movies_in_order(self.__ranks(SELECT_RANKS_BY_GENRE, genre.genre_name))
+
+    def get_movie_by_actor(self, actor: Actor):
+        if not isinstance(actor, Actor):
+            return []
+        return self.__movies_in_order(self.__ranks(SELECT_RANKS_BY_ACTOR, actor.actor_full_name))
+
+    def get_movie_by_director(self, director: Director):
+        if not isinstance(director, Director):
+            return []
+        return self.__movies_in_order(self.__ranks(SELECT_RANKS_BY_DIRECTOR, director.director_full_name))
+
+    def search_movies(self, query: str, limit: int = 10) -> List[Movie]:
+        return self.__current_movies(self.__catalogue_repository().search_movies(query, limit))
+
+    def query_movies(self, query: MovieQuery) -> List[Movie]:
+        sql, parameters = query_to_sql(query)
+        return self.__movies_in_order([rank for rank, in self.__connection().execute(sql, parameters)])
+
+    def get_movie_columns(self) -> MovieColumns:
+        return self.__catalogue_repository().get_movie_columns()
+
+    def get_catalogue_rollups(self) -> CatalogueRollups:
+        return self.__catalogue_repository().get_catalogue_rollups()
+
+    def get_costar_graph(self) -> CostarGraph:
+        return self.__catalogue_repository().get_costar_graph()
+
+    def get_similar_movies(self, movie: Movie, limit: int = 10) -> List[Movie]:
+        return self.__current_movies(self.__catalogue_repository().get_similar_movies(movie, limit))
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> dict:
+        return self.__catalogue_repository().autocomplete(prefix, limit)
+
+    def get_rank_of_previous_movie(self, movie: Movie):
+        return self.__connection().execute(SELECT_PREVIOUS_RANK, (movie.rank,)).fetchone()[0]
+
+    def get_rank_of_next_movie(self, movie: Movie):
+        return self.__connection().execute(SELECT_NEXT_RANK, (movie.rank,)).fetchone()[0]
+
+    def add_actor(self, actor: Actor) -> Actor:
+        if isinstance(actor, Actor):
+            with self.__transaction() as connection:
+                connection.execute(INSERT_PERSON, (actor.actor_full_name,))
+                connection.execute(MARK_ACTOR, (actor.actor_full_name,))
+            return self.__actors.setdefault(actor, actor)
+
+    def get_actor(self) -> List[Actor]:
+        return [Actor(name) for name, in self.__connection().execute(SELECT_ACTOR_NAMES)]
+
+    def add_director(self, director: Director) -> Director:
+        if isinstance(director, Director):
+            with self.__transaction() as connection:
+                connection.execute(INSERT_PERSON, (director.director_full_name,))
+                connection.execute(MARK_DIRECTOR, (director.director_full_name,))
+            return self.__directors.setdefault(director, director)
+
+    def get_director(self):
+        return [Director(name) for name, in self.__connection().execute(SELECT_DIRECTOR_NAMES)]
+
+    def get_genre(self) -> List[Genre]:
+        return [Genre(name) for name, in self.__connection().execute(SELECT_GENRE_NAMES)]
+
+    def add_genre(self, genre: Genre) -> Genre:
+        if isinstance(genre, Genre):
+            with self.__transaction() as connection:
+                connection.execute(INSERT_GENRE, (genre.genre_name,))
+            return self.__genres.setdefault(genre, genre)
+
+    def add_comment(self, comment: Comment):
+        super().add_comment(comment)
+        with self.__transaction() as connection:
+            connection.execute(INSERT_COMMENT, (comment.movie.rank, comment.comment, comment.timestamp.isoformat(),
+                                                normalise_user_name(comment.user.user_name)))
+
+    def get_comments(self):
+        ranks = [rank for rank, in self.__connection().execute(SELECT_COMMENTED_RANKS)]
+        movies = self.__movies_by_rank(ranks)
+
+        # Each movie's comments are built in the order they were added, so the nth comment on a movie in the overall
+        # order is the nth of its comments.
+        movie_comments = {rank: iter(movie.comments) for rank, movie in movies.items()}
+        return [next(movie_comments[rank]) for rank in ranks]
+
+    # Helper method to return this thread's connection.
+    def __connection(self) -> sqlite3.Connection:
+        return self.__pool.connection()
+
+    # Helper method to run writes in a transaction, committed on success and rolled back on error, or in the batch
+    # transaction that this thread has open. Each advances the version of the data, for get_catalogue_generation.
+    @contextmanager
+    def __transaction(self):
+        connection = self.__connection()
+        if getattr(self.__batch, 'open', False):
+            yield connection
+            connection.execute(BUMP_DATA_VERSION)
+        else:
+            with connection:
+                yield connection
+                connection.execute(BUMP_DATA_VERSION)
+
+    # Helper method to return the ranks selected by a one-parameter statement.
+    def __ranks(self, sql: str, parameter) -> List[int]:
+        return [rank for rank, in self.__connection().execute(sql, (parameter,))]
+
+    # Helper method to return Movies from the database in the order of ranks, skipping ranks with no Movie.
+    def __movies_in_order(self, ranks: List[int], with_comments: bool = True) -> List[Movie]:
+        movies = self.__movies_by_rank(ranks, with_comments)
+        return [movies[rank] for rank in ranks if rank in movies]
+
+    # Helper method to replace Movies of the catalogue indexes with current copies from the database.
+    def __current_movies(self, movies: List[Movie]) -> List[Movie]:
+        return self.__movies_in_order([movie.rank for movie in movies])
+
+    # Helper method to build Movies, keyed by rank, for the given ranks.
+    def __movies_by_rank(self, ranks: Iterable[int], with_comments: bool = True) -> dict:
+        ranks = list(dict.fromkeys(ranks))
+        movies = dict()
+        for start in range(0, len(ranks), RANK_BATCH_SIZE):
+            batch = ranks[start:start + RANK_BATCH_SIZE]
+            for movie in self.__load_movies(batch, with_comments):
+                movies[movie.rank] = movie
+        return movies
+
+    # Helper method to build Movies, with their genres, actors, director and comments, from a few set-based queries.
+    def __load_movies(self, ranks: List[int] = None, with_comments: bool = True) -> List[Movie]:
+        connection = self.__connection()
+        if ranks is None:
+            statements = (SELECT_ALL_MOVIES, SELECT_ALL_ACTORS, SELECT_ALL_GENRES, SELECT_ALL_MOVIE_COMMENTS)
+            parameters = ()
+        elif len(ranks) == 0:
+            return []
+        else:
+            placeholders = ', '.join('?' * len(ranks))
+            statements = (SELECT_MOVIES_BY_RANK.format(placeholders), SELECT_ACTORS_BY_RANK.format(placeholders),
+                          SELECT_GENRES_BY_RANK.format(placeholders), SELECT_MOVIE_COMMENTS_BY_RANK.format(placeholders))
+            parameters = ranks
+        select_movies, select_actors, select_genres, select_comments = statements
+
+        # Equal people and genres share one instance within a load.
+        actors = dict()
+        directors = dict()
+        genres = dict()
+        users = dict()
+
+        movies = dict()
+        for rank, title, description, year, duration, rating, votes, revenue, metascore, director_name in \
+                connection.execute(select_movies, parameters):
+            movie = Movie(rank, title, description, year, duration, rating, votes, revenue, metascore)
+            if director_name is not None:
+                movie.director = directors.setdefault(director_name, Director(director_name))
+            movies[rank] = movie
+
+        for rank, name in connection.execute(select_actors, parameters):
+            movies[rank].add_actor(actors.setdefault(name, Actor(name)))
+        for rank, name in connection.execute(select_genres, parameters):
+            movies[rank].add_genre(genres.setdefault(name, Genre(name)))
+
+        if with_comments:
+            # Commenting users are built with just their name and password.
+            for rank, user_name, password, comment_text, timestamp in connection.execute(select_comments, parameters):
+                user = users.get(user_name)
+                if user is None:
+                    user = users[user_name] = User(user_name, password)
+                make_comment(comment_text, user, movies[rank], datetime.fromisoformat(timestamp))
+
+        return list(movies.values())
+
+    # Helper method to return an in-memory repository of the catalogue, for the indexes that SQL doesn't provide.
+    # It is rebuilt whenever any process has changed the catalogue since it was built.
+    def __catalogue_repository(self) -> MemoryRepository:
+        version = self.__connection().execute(SELECT_CATALOGUE_VERSION).fetchone()[0]
+        with self.__catalogue_lock:
+            if self.__catalogue is None or self.__catalogue_version != version:
+                catalogue = MemoryRepository()
+                movies = self.__load_movies(with_comments=False)
+                for movie in movies:
+                    for actor in movie.actors:
+                        catalogue.add_actor(actor)
+                    if movie.director is not None:
+                        catalogue.add_director(movie.director)
+                    for genre in movie.genres:
+                        catalogue.add_genre(genre)
+                catalogue.add_movies(movies)
+                self.__catalogue = catalogue
+                self.__catalogue_version = version
+            return self.__catalogue
+
+
+def query_to_sql(query: MovieQuery):
+    """ Returns an SQL statement selecting the ranks of the Movies matching query, in its order, and its parameters.
+
+    Each facet is an EXISTS test answered by the genre, credit or director index, and None values sort last in
+    either direction, ties in rank order, as in sort_movies.
+    """
+    conditions = list()
+    parameters = list()
+    for genre in query.genres:
+        conditions.append('EXISTS (SELECT 1 FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id '
+                          'WHERE movie_genres.movie_rank = movies.rank AND genres.name = ?)')
+        parameters.append(genre.genre_name)
+    for actor in query.actors:
+        conditions.append('EXISTS (SELECT 1 FROM credits JOIN people ON people.id = credits.person_id '
+                          'WHERE credits.movie_rank = movies.rank AND people.name = ?)')
+        parameters.append(actor.actor_full_name)
+    if query.director is not None:
+        conditions.append('director_id = (SELECT id FROM people WHERE name = ?)')
+        parameters.append(query.director.director_full_name)
+    # Attribute names are columns of the movies table; MovieQuery accepts no others.
+    for attribute, (low, high) in query.ranges.items():
+        conditions.append('{} IS NOT NULL'.format(attribute))
+        if low is not None:
+            conditions.append('{} >= ?'.format(attribute))
+            parameters.append(low)
+        if high is not None:
+            conditions.append('{} <= ?'.format(attribute))
+            parameters.append(high)
+
+    sql = 'SELECT rank FROM movies'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY {0} IS NULL, {0} {1}, rank'.format(query.sort_by, 'DESC' if query.descending else 'ASC')
+    if query.limit is not None:
+        sql += ' LIMIT ?'
+        parameters.append(query.limit)
+    return sql, parameters
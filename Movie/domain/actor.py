@@ -1,6 +1,12 @@
+from types import MappingProxyType
+
+
 class Actor:
+    __slots__ = ('__actor_full_name', '__actor_colleagues')
+
     def __init__(self, actor_full_name: str):
-        self.__actor_colleague_li = []
+        # Number of movies shared with each colleague.
+        self.__actor_colleagues = dict()
         if actor_full_name == "" or type(actor_full_name) != str:
             self.__actor_full_name = None
         else:
@@ -14,6 +20,10 @@ class Actor:
     def actor_full_name(self, other: str):
         self.__actor_full_name = other
 
+    @property
+    def actor_colleagues(self):
+        return MappingProxyType(self.__actor_colleagues)
+
     def __repr__(self) -> str:
         return "<Actor {}>".format(self.__actor_full_name)
 
@@ -26,16 +36,25 @@ class Actor:
     def __hash__(self):
         return hash(self.__actor_full_name)
 
-    def add_actor_colleague(self, colleague: 'Actor'):
+    def __getstate__(self):
+        # Colleagues are left out so that pickling an actor doesn't recurse through the whole co-star graph; the
+        # graph restores them.
+        return (self.__actor_full_name,)
+
+    def __setstate__(self, state):
+        self.__actor_full_name, = state
+        self.__actor_colleagues = dict()
+
+    def add_actor_colleague(self, colleague: 'Actor', shared_movies: int = 1):
         if isinstance(colleague, Actor):
-            self.__actor_colleague_li.append(colleague)
+            self.__actor_colleagues[colleague] = self.__actor_colleagues.get(colleague, 0) + shared_movies
         else:
             raise TypeError
 
     def check_if_this_actor_worked_with(self, colleague: 'Actor') -> bool:
-        if isinstance(colleague, Actor) and colleague in self.__actor_colleague_li:
-            return True
-        else:
-            return False
+        return isinstance(colleague, Actor) and colleague in self.__actor_colleagues
+
+    def number_of_shared_movies(self, colleague: 'Actor') -> int:
+        return self.__actor_colleagues.get(colleague, 0)
 
 
@@ -3,6 +3,8 @@ from Movie.domain.user import User
 
 
 class Comment:
+    __slots__ = ('_user', '_movie', '_comment', '_timestamp')
+
     def __init__(self, user: User, movie, comment: str, timestamp: datetime):
         self._user: User = user
         self._movie = movie
@@ -1,4 +1,5 @@
 class Director:
+    __slots__ = ('__director_full_name',)
 
     def __init__(self, director_full_name: str):
         if director_full_name == "" or type(director_full_name) is not str:
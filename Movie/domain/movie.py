@@ -2,10 +2,13 @@ from Movie.domain.genre import Genre
 from Movie.domain.actor import Actor
 from Movie.domain.director import Director
 from Movie.domain.comment import Comment
-from typing import List, Iterable
+from typing import List, Iterable, Tuple
 
 
 class Movie:
+    __slots__ = ('__rank', '__title', '__description', '__year', '__duration', '__rating', '__votes', '__revenue',
+                 '__metascore', '__actors', '__director', '__genres', '__comments', '__weakref__')
+
     def __init__(self, rank, title: str, description: str, year: int, duration: int,
                  rating: float, votes: int, revenue: float = None, metascore: int = None):
 
@@ -18,9 +21,11 @@ class Movie:
         self.__votes = votes
         self.__revenue = revenue
         self.__metascore = metascore
-        self.__actors: List[Actor] = []
+        # Actors and genres are tuples, replaced rather than changed in place, so callers can't alter them and a reader
+        # never sees one part way through an update.
+        self.__actors: Tuple[Actor, ...] = ()
         self.__director: Director = None
-        self.__genres: List[Genre] = []
+        self.__genres: Tuple[Genre, ...] = ()
         self.__comments: List[Comment] = []
 
     @property
@@ -73,11 +78,11 @@ class Movie:
             raise TypeError
 
     @property
-    def actors(self):
+    def actors(self) -> Tuple[Actor, ...]:
         return self.__actors
 
     @property
-    def genres(self):
+    def genres(self) -> Tuple[Genre, ...]:
         return self.__genres
 
     @property
@@ -153,14 +158,15 @@ class Movie:
 
     def add_actor(self, actor: 'Actor'):
         if isinstance(actor, Actor):
-            self.__actors.append(actor)
+            self.__actors += (actor,)
         else:
             raise TypeError
 
     def remove_actor(self, actor: 'Actor'):
         if isinstance(actor, Actor):
             if actor in self.__actors:
-                self.__actors.remove(actor)
+                index = self.__actors.index(actor)
+                self.__actors = self.__actors[:index] + self.__actors[index + 1:]
             else:
                 pass
         else:
@@ -168,14 +174,15 @@ class Movie:
 
     def add_genre(self, genre: 'Genre'):
         if isinstance(genre, Genre):
-            self.__genres.append(genre)
+            self.__genres += (genre,)
         else:
             raise TypeError
 
     def remove_genre(self, genre: 'Genre'):
         if isinstance(genre, Genre):
             if genre in self.__genres:
-                self.__genres.remove(genre)
+                index = self.__genres.index(genre)
+                self.__genres = self.__genres[:index] + self.__genres[index + 1:]
             else:
                 pass
         else:
@@ -1,10 +1,22 @@
 from typing import List, Iterable
 
+
+def normalise_user_name(name):
+    """ Returns name in the canonical form used for user names: stripped and lower case. """
+    if name == "" or type(name) is not str:
+        return None
+    return name.strip().lower()
+
+
 class User:
     def __init__(self, user_name: str, password: str):
+        # Imported here as the Movie domain module imports this one, through Comment.
+        from Movie.domain.watchlist import WatchList
+
         self.__user_name = user_name
         self.__password = password
         self.__watched_movies = []
+        self.__watchlist = WatchList()
         self.__comments = []
         self.__time_spent_watching_movies_minutes: int = 0
 
@@ -14,10 +26,7 @@ class User:
 
     @user_name.setter
     def user_name(self, name):
-        if name == "" or type(name) is not str:
-            self.__user_name = None
-        else:
-            self.__user_name = name.strip().lower()
+        self.__user_name = normalise_user_name(name)
 
     @property
     def password(self) -> str:
@@ -41,6 +50,10 @@ class User:
         else:
             raise TypeError
 
+    @property
+    def watchlist(self) -> 'WatchList':
+        return self.__watchlist
+
     @property
     def comments(self) -> Iterable['Comment']:
         return iter(self.__comments)
@@ -78,15 +91,20 @@ class User:
         return hash(self.__user_name)
 
     def watch_movie(self, movie: 'Movie'):
-        if isinstance(movie, 'Movie'):
+        from Movie.domain.movie import Movie
+
+        if isinstance(movie, Movie):
             if movie not in self.__watched_movies:
                 self.__watched_movies.append(movie)
-                self.__time_spent_watching_movies_minutes += movie.runtime_minutes
+                self.__time_spent_watching_movies_minutes += movie.duration or 0
             else:
                 pass
         else:
             raise TypeError
 
+    def has_watched(self, movie: 'Movie') -> bool:
+        return movie in self.__watched_movies
+
     def add_comment(self, comment: 'Comment'):
         self.__comments.append(comment)
 
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import FrozenSet, NamedTuple
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: datetime
+    ranks: FrozenSet[int]
+
+
+class LRUCache:
+    """ A bounded cache that evicts its least recently used entries, and counts hits and misses.
+
+    The cache holds at most max_entries entries. If max_size is given, it also holds entries whose sizes, as measured by
+    sizeof, total at most max_size. Request threads may share the cache; each operation holds its lock.
+    """
+
+    def __init__(self, max_entries: int, max_size: int = None, sizeof=None):
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__sizes = dict()
+        self.__max_entries = max_entries
+        self.__max_size = max_size
+        self.__sizeof = sizeof if sizeof is not None else (lambda value: 1)
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def get(self, key, default=None):
+        with self.__lock:
+            try:
+                value = self.__entries[key]
+            except KeyError:
+                self.__misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self.__sizeof(value)
+        with self.__lock:
+            self.__pop(key)
+            if self.__max_size is not None and size > self.__max_size:
+                return
+
+            self.__entries[key] = value
+            self.__sizes[key] = size
+            self.__size += size
+            while len(self.__entries) > self.__max_entries or \
+                    (self.__max_size is not None and self.__size > self.__max_size):
+                self.__pop(next(iter(self.__entries)))
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            return self.__pop(key, default)
+
+    def __pop(self, key, default=None):
+        value = self.__entries.pop(key, default)
+        self.__size -= self.__sizes.pop(key, 0)
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__sizes.clear()
+            self.__size = 0
+
+    def items(self):
+        """ Returns a list of the cached (key, value) pairs, without counting hits or updating recency. """
+        with self.__lock:
+            return list(self.__entries.items())
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'entries': len(self.__entries),
+                'size': self.__size
+            }
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
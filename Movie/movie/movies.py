@@ -1,7 +1,8 @@
-from datetime import date
+import hashlib
+from datetime import date, datetime
 
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import request, render_template, redirect, url_for, session, make_response
 
 from better_profanity import profanity
 from flask_wtf import FlaskForm
@@ -10,6 +11,7 @@ from wtforms.validators import DataRequired, Length, ValidationError
 
 import Movie.adapters.repository as repo
 import Movie.movie.services as services
+from Movie.movie.cache import CachedPage
 
 from Movie.authentication.authentication import login_required
 
@@ -20,55 +22,93 @@ movies_blueprint = Blueprint(
     'movies_bp', __name__)
 
 
+# Upper bound on the number of movies shown on one page.
+MAX_PAGE_SIZE = 50
+
+# Number of similar movies suggested for each movie.
+SIMILAR_MOVIES = 5
+
+
 @movies_blueprint.route('/movies_by_rank', methods=['GET'])
 def movies_by_rank():
-    target_rank = request.args.get('rank')
-    movie_to_show_comments = request.args.get('view_comments_for')
-
+    # Arguments that aren't whole numbers are ignored, as if they were missing.
+    target_rank = request.args.get('rank', type=int)
+    movie_to_show_comments = request.args.get('view_comments_for', -1, type=int)
+    page_size = min(max(request.args.get('page_size', 1, type=int), 1), MAX_PAGE_SIZE)
+
+    # Serve the page from the cache unless it hasn't been rendered since its movies were last commented on. The page
+    # greets a logged-in user by name, so the user is part of the key, and links to the neighbouring pages, which
+    # change as movies are added, so the catalogue's generation is too. A repository shared between workers advances
+    # its generation on comments as well, as this worker can't invalidate pages for comments written by another.
+    cache_key = (services.get_catalogue_generation(repo.repo_instance), target_rank, page_size, movie_to_show_comments,
+                 session.get('username'))
+    page = services.get_rendered_page(cache_key)
+
+    if page is None:
+        page = render_movies_page(target_rank, page_size, movie_to_show_comments)
+        if page is None:
+            return redirect(url_for('home_bp.home'))
+        services.cache_rendered_page(cache_key, page)
+
+    # Answer conditional requests for an unchanged page with 304 Not Modified.
+    response = make_response(page.body)
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+
+def render_movies_page(target_rank, page_size, movie_to_show_comments):
     first_movie = services.get_first_movie(repo.repo_instance)
     last_movie = services.get_last_movie(repo.repo_instance)
 
     if target_rank is None:
         target_rank = first_movie['rank']
-    else:
-        target_rank = int(target_rank)
 
-    if movie_to_show_comments is None:
-        movie_to_show_comments = -1
-    else:
-        movie_to_show_comments = int(movie_to_show_comments)
+    # Fetch the whole page of movies, and the ranks starting its neighbouring pages, in one call.
+    movies, previous_rank, next_rank = services.get_movies_page(target_rank, page_size, repo.repo_instance)
 
-    movies, previous_rank, next_rank = services.get_movie_by_rank(target_rank, repo.repo_instance)
+    if len(movies) == 0:
+        return None
 
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
     prev_movie_url = None
 
-    if len(movies) > 0:
-        if previous_rank is not None:
-            prev_movie_url = url_for('movies_bp.movies_by_rank', rank=previous_rank)
-            first_movie_url = url_for('movies_bp.movies_by_rank', rank=first_movie['rank'])
-
-        if next_rank is not None:
-            next_movie_url = url_for('movies_bp.movies_by_rank', rank=next_rank)
-            last_movie_url = url_for('movies_bp.movies_by_rank', rank=last_movie['rank'])
-
-        for movie in movies:
-            movie['view_comment_url'] = url_for('movies_bp.movies_by_rank', rank=target_rank, view_comments_for=movie['rank'])
-            movie['add_comment_url'] = url_for('movies_bp.comment_on_movie', movie=movie['rank'])
-
-        return render_template(
-            'news/articles.html',
-            title='Movies',
-            movies=movies,
-            first_movie_url=first_movie_url,
-            last_movie_url=last_movie_url,
-            prev_movie_url=prev_movie_url,
-            next_movie_url=next_movie_url,
-            show_comments_for_movie=movie_to_show_comments)
-
-    return redirect(url_for('home_bp.home'))
+    if previous_rank is not None:
+        prev_movie_url = url_for('movies_bp.movies_by_rank', rank=previous_rank, page_size=page_size)
+        first_movie_url = url_for('movies_bp.movies_by_rank', rank=first_movie['rank'], page_size=page_size)
+
+    if next_rank is not None:
+        next_movie_url = url_for('movies_bp.movies_by_rank', rank=next_rank, page_size=page_size)
+        last_movie_url = url_for('movies_bp.movies_by_rank', rank=last_movie['rank'], page_size=page_size)
+
+    for movie in movies:
+        movie['view_comment_url'] = url_for('movies_bp.movies_by_rank', rank=target_rank, page_size=page_size,
+                                            view_comments_for=movie['rank'])
+        movie['add_comment_url'] = url_for('movies_bp.comment_on_movie', movie=movie['rank'])
+        movie['watch_url'] = url_for('recommendations_bp.watch_movie', movie=movie['rank'])
+        movie['similar_movies'] = services.get_similar_movies(movie['rank'], repo.repo_instance, SIMILAR_MOVIES)
+        for similar in movie['similar_movies']:
+            similar['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=similar['rank'])
+
+    html = render_template(
+        'news/articles.html',
+        title='Movies',
+        movies=movies,
+        first_movie_url=first_movie_url,
+        last_movie_url=last_movie_url,
+        prev_movie_url=prev_movie_url,
+        next_movie_url=next_movie_url,
+        show_comments_for_movie=movie_to_show_comments)
+
+    body = html.encode('utf-8')
+    return CachedPage(
+        body=body,
+        etag=hashlib.sha1(body).hexdigest(),
+        last_modified=datetime.utcnow().replace(microsecond=0),
+        ranks=frozenset(movie['rank'] for movie in movies))
 
 
 @movies_blueprint.route('/comment', methods=['GET', 'POST'])
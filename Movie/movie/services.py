@@ -1,6 +1,7 @@
 from typing import List, Iterable
 
 from Movie.adapters.repository import AbstractRepository
+from Movie.movie.cache import LRUCache
 from Movie.domain.comment import make_comment, Comment
 from Movie.domain.movie import Movie
 from Movie.domain.genre import Genre
@@ -24,12 +25,19 @@ def add_comment(movie_rank: int, comment_text: str, username: str, repo: Abstrac
     if user is None:
         raise UnknownUserException
 
+    # Drop the movie's cached dictionary form, which the comment makes stale.
+    invalidate_movie_dict(movie)
+
     # Create comment.
     comment = make_comment(comment_text, user, movie)
 
     # Update the repository.
     repo.add_comment(comment)
 
+    # Drop the rendered pages showing the movie. This follows the update, so that a page rendered by another thread
+    # in the meantime isn't left cached.
+    invalidate_pages_showing(movie.rank)
+
 
 def get_movie(movie_rank: int, repo: AbstractRepository):
     movie = repo.get_movie(movie_rank)
@@ -68,6 +76,23 @@ def get_movie_by_rank(rank, repo: AbstractRepository):
     return movies_data, prev_rank, next_rank
 
 
+def get_movies_page(start_rank, page_size, repo: AbstractRepository):
+    movies, prev_rank, next_rank = repo.get_movies_page(start_rank, page_size)
+
+    # Convert Movies to dictionary form.
+    return movies_to_dict(movies), prev_rank, next_rank
+
+
+def get_similar_movies(movie_rank: int, repo: AbstractRepository, limit: int = 10):
+    movie = repo.get_movie(movie_rank)
+
+    if movie is None:
+        raise NonExistentMovieException
+
+    return [{'rank': similar.rank, 'title': similar.title, 'year': similar.year}
+            for similar in repo.get_similar_movies(movie, limit)]
+
+
 def get_comments_for_movie(movie_id, repo: AbstractRepository):
     movie = repo.get_movie(movie_id)
 
@@ -77,11 +102,79 @@ def get_comments_for_movie(movie_id, repo: AbstractRepository):
     return comments_to_dict(movie.comments)
 
 
+def get_movie_cache_stats():
+    return movie_dict_cache.stats()
+
+
+# ======================
+# Rendered page caching
+# ======================
+
+# Rendered movie pages, keyed by the page's arguments and bounded by count and total size. Each entry records the
+# ranks of the movies the page shows, so that commenting on a movie drops just the pages that show it.
+rendered_page_cache = LRUCache(max_entries=1024, max_size=32 * 1024 * 1024, sizeof=lambda page: len(page.body))
+
+
+def get_catalogue_generation(repo: AbstractRepository) -> int:
+    return repo.get_catalogue_generation()
+
+
+def get_rendered_page(key):
+    return rendered_page_cache.get(key)
+
+
+def cache_rendered_page(key, page):
+    rendered_page_cache.put(key, page)
+
+
+def invalidate_pages_showing(movie_rank: int):
+    for key, page in rendered_page_cache.items():
+        if movie_rank in page.ranks:
+            rendered_page_cache.pop(key)
+
+
+def clear_rendered_pages():
+    rendered_page_cache.clear()
+
+
+def clear_movie_dicts():
+    movie_dict_cache.clear()
+
+
+def get_page_cache_stats():
+    return rendered_page_cache.stats()
+
+
 # ============================================
 # Functions to convert model entities to dicts
 # ============================================
 
+# Dictionary forms of Movies, keyed by the Movie's rank, title and number of comments, so that an entry is never served
+# for a Movie with comments it doesn't include. The key names the movie rather than the Movie instance, so that it is
+# shared by the instances a repository builds afresh for each read, as SqliteRepository does.
+movie_dict_cache = LRUCache(max_entries=4096)
+
+
+def movie_dict_cache_key(movie: Movie):
+    return movie.rank, movie.title, movie.number_of_comments()
+
+
+def invalidate_movie_dict(movie: Movie):
+    movie_dict_cache.pop(movie_dict_cache_key(movie))
+
+
 def movie_to_dict(movie: 'Movie'):
+    key = movie_dict_cache_key(movie)
+    movie_dict = movie_dict_cache.get(key)
+    if movie_dict is None:
+        movie_dict = build_movie_dict(movie)
+        movie_dict_cache.put(key, movie_dict)
+
+    # Return a copy, so that callers adding to the dictionary don't alter the cached entry.
+    return dict(movie_dict)
+
+
+def build_movie_dict(movie: 'Movie'):
     movie_dict = {
         'rank': movie.rank,
         'title': movie.title,
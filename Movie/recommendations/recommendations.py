@@ -0,0 +1,76 @@
+from flask import Blueprint
+from flask import request, render_template, redirect, url_for, session
+
+from flask_wtf import FlaskForm
+from wtforms import HiddenField, SubmitField
+
+import Movie.adapters.repository as repo
+import Movie.movie.services as movie_services
+import Movie.recommendations.services as services
+
+from Movie.authentication.authentication import login_required
+
+
+# Configure Blueprint.
+recommendations_blueprint = Blueprint(
+    'recommendations_bp', __name__)
+
+
+# Number of movies recommended on the recommendations page.
+RECOMMENDATIONS = 10
+
+
+@recommendations_blueprint.route('/recommendations', methods=['GET'])
+@login_required
+def recommendations():
+    username = session['username']
+
+    movies = services.get_recommendations(username, repo.repo_instance, RECOMMENDATIONS)
+    history = services.get_history(username, repo.repo_instance)
+    for movie in movies + history['watched'] + history['watchlist']:
+        movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+
+    return render_template(
+        'recommendations/recommendations.html',
+        title='Recommended for you',
+        movies=movies,
+        watched=history['watched'],
+        watchlist=history['watchlist'])
+
+
+@recommendations_blueprint.route('/watch', methods=['GET', 'POST'])
+@login_required
+def watch_movie():
+    username = session['username']
+    form = WatchForm()
+
+    if form.validate_on_submit():
+        movie_rank = int(form.movie_id.data)
+        if form.watched.data:
+            services.watch_movie(movie_rank, username, repo.repo_instance)
+        elif form.add_to_watchlist.data:
+            services.add_to_watchlist(movie_rank, username, repo.repo_instance)
+        else:
+            services.remove_from_watchlist(movie_rank, username, repo.repo_instance)
+        return redirect(url_for('recommendations_bp.recommendations'))
+
+    if request.method == 'GET':
+        movie_rank = int(request.args.get('movie'))
+        form.movie_id.data = movie_rank
+    else:
+        movie_rank = int(form.movie_id.data)
+
+    movie = movie_services.get_movie(movie_rank, repo.repo_instance)
+    return render_template(
+        'recommendations/watch_movie.html',
+        title='Watch movie',
+        movie=movie,
+        form=form,
+        handler_url=url_for('recommendations_bp.watch_movie'))
+
+
+class WatchForm(FlaskForm):
+    movie_id = HiddenField("Movie rank")
+    watched = SubmitField('I watched this')
+    add_to_watchlist = SubmitField('Add to WatchList')
+    remove_from_watchlist = SubmitField('Remove from WatchList')
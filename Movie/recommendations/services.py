@@ -0,0 +1,93 @@
+from Movie.adapters.recommendations import UserRecommendations
+from Movie.adapters.repository import AbstractRepository
+from Movie.movie.cache import LRUCache
+from Movie.movie.services import NonExistentMovieException, UnknownUserException
+
+
+# Each user's recommendation scores, updated as they watch movies rather than recomputed for every page view.
+recommendations_cache = LRUCache(1024)
+
+
+def watch_movie(movie_rank: int, username: str, repo: AbstractRepository):
+    user, movie = get_user_and_movie(movie_rank, username, repo)
+    repo.watch_movie(user, movie)
+    history_changed(user, movie, repo)
+
+
+def add_to_watchlist(movie_rank: int, username: str, repo: AbstractRepository):
+    user, movie = get_user_and_movie(movie_rank, username, repo)
+    repo.add_to_watchlist(user, movie)
+    history_changed(user, movie, repo)
+
+
+def remove_from_watchlist(movie_rank: int, username: str, repo: AbstractRepository):
+    user, movie = get_user_and_movie(movie_rank, username, repo)
+    repo.remove_from_watchlist(user, movie)
+    history_changed(user, movie, repo)
+
+
+def get_recommendations(username: str, repo: AbstractRepository, limit: int = 10):
+    user = repo.get_user(username)
+    if user is None:
+        raise UnknownUserException
+
+    return movies_to_summary_dicts(user_recommendations(user, repo).recommendations(limit))
+
+
+def get_history(username: str, repo: AbstractRepository):
+    user = repo.get_user(username)
+    if user is None:
+        raise UnknownUserException
+
+    return {
+        'watched': movies_to_summary_dicts(user.watched_movies),
+        'watchlist': movies_to_summary_dicts(user.watchlist)
+    }
+
+
+def clear_recommendations():
+    recommendations_cache.clear()
+
+
+# ============================================
+# Functions to convert model entities to dicts
+# ============================================
+
+def movies_to_summary_dicts(movies):
+    return [{'rank': movie.rank, 'title': movie.title, 'year': movie.year} for movie in movies]
+
+
+def get_user_and_movie(movie_rank: int, username: str, repo: AbstractRepository):
+    movie = repo.get_movie(movie_rank)
+    if movie is None:
+        raise NonExistentMovieException
+
+    user = repo.get_user(username)
+    if user is None:
+        raise UnknownUserException
+
+    return user, movie
+
+
+def user_recommendations(user, repo: AbstractRepository) -> UserRecommendations:
+    recommendations = recommendations_cache.get(user.user_name)
+
+    # Scores for a user of another repository don't apply. A repository may build a fresh User for each read, as
+    # SqliteRepository does, so another instance of the user is followed, updating just what its history changed.
+    if recommendations is None or recommendations.repo is not repo:
+        recommendations = UserRecommendations(user, repo)
+        recommendations_cache.put(user.user_name, recommendations)
+    elif recommendations.user is not user:
+        recommendations.follow(user)
+    return recommendations
+
+
+def history_changed(user, movie, repo: AbstractRepository):
+    # Update cached scores in place; scores not yet cached are built from the whole history when next needed.
+    recommendations = recommendations_cache.get(user.user_name)
+    if recommendations is None or recommendations.repo is not repo:
+        return
+    if recommendations.user is user:
+        recommendations.update(movie)
+    else:
+        recommendations.follow(user)
@@ -0,0 +1,89 @@
+import math
+
+from flask import Blueprint
+from flask import request, render_template, url_for, jsonify, abort
+
+import Movie.adapters.repository as repo
+import Movie.search.services as services
+
+
+# Configure Blueprint.
+search_blueprint = Blueprint(
+    'search_bp', __name__)
+
+
+# Upper bound on the number of search results shown.
+MAX_RESULTS = 50
+
+
+# Returns the (low, high) bounds given by the name_min and name_max request arguments, converted by convert; a missing
+# bound is None. Raises ValueError for a bound that isn't a finite number.
+def range_argument(name: str, convert):
+    bounds = list()
+    for suffix in ('_min', '_max'):
+        value = request.args.get(name + suffix)
+        if value is not None:
+            value = convert(value)
+            if not math.isfinite(value):
+                raise ValueError('{} must be a finite number'.format(name + suffix))
+        bounds.append(value)
+    return tuple(bounds)
+
+
+@search_blueprint.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    # A limit that isn't a number is ignored, as if it were missing.
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_RESULTS)
+
+    movies = list()
+    if query != '':
+        movies = services.search_movies(query, repo.repo_instance, limit)
+
+    for movie in movies:
+        movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+
+    return render_template(
+        'search/search.html',
+        title='Search',
+        query=query,
+        movies=movies,
+        handler_url=url_for('search_bp.search'))
+
+
+@search_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    prefix = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 10)
+
+    completions = services.autocomplete(prefix, repo.repo_instance, limit)
+    for movie in completions['titles']:
+        movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+
+    return jsonify(completions)
+
+
+@search_blueprint.route('/query', methods=['GET'])
+def query_movies():
+    # Answers e.g. /query?genre=Action&year_min=2010&year_max=2016&rating_min=7&sort=revenue&order=desc&limit=10
+    try:
+        movies = services.query_movies(
+            repo.repo_instance,
+            genres=request.args.getlist('genre'),
+            actors=request.args.getlist('actor'),
+            director=request.args.get('director'),
+            year=range_argument('year', int),
+            duration=range_argument('runtime', int),
+            rating=range_argument('rating', float),
+            metascore=range_argument('metascore', int),
+            sort_by=request.args.get('sort', 'rank'),
+            descending=request.args.get('order', 'asc') == 'desc',
+            limit=request.args.get('limit', type=int)
+        )
+    except ValueError as error:
+        abort(400, str(error))
+
+    for movie in movies:
+        movie['hyperlink'] = url_for('movies_bp.movies_by_rank', rank=movie['rank'])
+
+    return jsonify(movies)
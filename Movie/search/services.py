@@ -0,0 +1,67 @@
+from typing import Iterable
+
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.repository import AbstractRepository
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+from Movie.movie.services import movies_to_dict
+
+
+def search_movies(query: str, repo: AbstractRepository, limit: int = 10):
+    movies = repo.search_movies(query, limit)
+
+    # Convert Movies to dictionary form.
+    return movies_to_dict(movies)
+
+
+def autocomplete(prefix: str, repo: AbstractRepository, limit: int = 10):
+    completions = repo.autocomplete(prefix, limit)
+
+    return {
+        'titles': [{'rank': movie.rank, 'title': movie.title, 'year': movie.year} for movie in completions['titles']],
+        'actors': [actor.actor_full_name for actor in completions['actors']],
+        'directors': [director.director_full_name for director in completions['directors']]
+    }
+
+
+def query_movies(repo: AbstractRepository, genres: Iterable[str] = (), actors: Iterable[str] = (),
+                 director: str = None, year=None, duration=None, rating=None, metascore=None, sort_by='rank',
+                 descending=False, limit=None):
+    query = MovieQuery(
+        genres=[Genre(name) for name in genres],
+        actors=[Actor(name) for name in actors],
+        director=Director(director) if director is not None else None,
+        year=year,
+        duration=duration,
+        rating=rating,
+        metascore=metascore,
+        sort_by=sort_by,
+        descending=descending,
+        limit=limit
+    )
+    movies = repo.query_movies(query)
+
+    return [movie_to_summary_dict(movie) for movie in movies]
+
+
+# ==============================================================
+# Functions to convert model entities to JSON-serialisable dicts
+# ==============================================================
+
+def movie_to_summary_dict(movie: Movie):
+    movie_dict = {
+        'rank': movie.rank,
+        'title': movie.title,
+        'genres': [genre.genre_name for genre in movie.genres],
+        'director': movie.director.director_full_name if movie.director is not None else None,
+        'actors': [actor.actor_full_name for actor in movie.actors],
+        'year': movie.year,
+        'duration': movie.duration,
+        'rating': movie.rating,
+        'votes': movie.votes,
+        'revenue': movie.revenue,
+        'metascore': movie.metascore
+    }
+    return movie_dict
@@ -0,0 +1,58 @@
+import math
+
+from Movie.adapters.repository import AbstractRepository
+from Movie.domain.genre import Genre
+
+
+# Attributes that top movie lists can be ranked by.
+TOP_MOVIE_ATTRIBUTES = ('year', 'duration', 'rating', 'votes', 'revenue', 'metascore')
+
+
+def get_analytics(repo: AbstractRepository, genre: str = None, year=None, rating=None, top_by: str = 'rating',
+                  top_k: int = 10):
+    """ Returns aggregates over the Movies in genre whose year and rating lie in the given (low, high) ranges. """
+    if top_by not in TOP_MOVIE_ATTRIBUTES:
+        raise ValueError('Movies cannot be ranked by {}'.format(top_by))
+
+    columns = repo.get_movie_columns()
+
+    # Select the movies with one vectorised mask per filter.
+    mask = columns.range_mask('year', *(year or (None, None))) & columns.range_mask('rating', *(rating or (None, None)))
+    if genre is not None:
+        mask &= columns.genre_mask(Genre(genre))
+
+    top_positions = columns.top_k(top_by, top_k, mask)
+    top_values = columns.column(top_by)[top_positions]
+
+    return {
+        'number_of_movies': int(mask.sum()),
+        'mean_rating_by_genre': {genre.genre_name: mean
+                                 for genre, mean in columns.mean_by_genre('rating', mask).items()},
+        'movies_by_year': columns.total_by('year', mask=mask),
+        'revenue_by_year': columns.total_by('year', 'revenue', mask),
+        'top_movies': [{'rank': movie.rank, 'title': movie.title, top_by: json_number(value)}
+                       for movie, value in zip(columns.movies_at(top_positions), top_values)]
+    }
+
+
+def json_number(value):
+    # NaN isn't valid JSON, so missing values are reported as None.
+    value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def get_catalogue_stats(repo: AbstractRepository, top_directors: int = 10):
+    """ Returns the repository's precomputed rollups; the cost doesn't grow with the number of movies. """
+    rollups = repo.get_catalogue_rollups()
+
+    return {
+        'number_of_movies': rollups.number_of_movies,
+        'genres': [{'genre': rollup.genre.genre_name,
+                    'movies': rollup.movies,
+                    'mean_rating': rollup.mean_rating,
+                    'total_revenue': rollup.total_revenue} for rollup in rollups.genres()],
+        'movies_by_year': rollups.movies_by_year(),
+        'top_directors': [{'director': rollup.director.director_full_name,
+                           'movies': rollup.movies,
+                           'mean_rating': rollup.mean_rating} for rollup in rollups.top_directors(top_directors)]
+    }
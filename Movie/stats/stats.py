@@ -0,0 +1,47 @@
+from flask import Blueprint
+from flask import render_template, request, jsonify, abort
+
+import Movie.adapters.repository as repo
+import Movie.stats.services as services
+from Movie.search.search import range_argument
+
+
+# Configure Blueprint.
+stats_blueprint = Blueprint(
+    'stats_bp', __name__)
+
+
+# Number of directors listed on the stats page.
+TOP_DIRECTORS = 10
+
+
+@stats_blueprint.route('/stats', methods=['GET'])
+def stats():
+    return render_template(
+        'stats/stats.html',
+        title='Catalogue statistics',
+        stats=services.get_catalogue_stats(repo.repo_instance, TOP_DIRECTORS))
+
+
+@stats_blueprint.route('/stats.json', methods=['GET'])
+def stats_json():
+    top_directors = min(max(request.args.get('directors', TOP_DIRECTORS, type=int), 0), 100)
+    return jsonify(services.get_catalogue_stats(repo.repo_instance, top_directors))
+
+
+@stats_blueprint.route('/analytics', methods=['GET'])
+def analytics():
+    # Answers e.g. /analytics?genre=Action&year_min=2010&year_max=2016&rating_min=7&top=revenue&k=5
+    try:
+        result = services.get_analytics(
+            repo.repo_instance,
+            genre=request.args.get('genre'),
+            year=range_argument('year', int),
+            rating=range_argument('rating', float),
+            top_by=request.args.get('top', 'rating'),
+            top_k=min(max(request.args.get('k', 10, type=int), 0), 100)
+        )
+    except ValueError as error:
+        abort(400, str(error))
+
+    return jsonify(result)
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, render_template, redirect, url_for, session
+from flask import Blueprint, render_template, redirect, url_for, session
 
 import Movie.adapters.repository as repo
 import Movie.utilities.services as services
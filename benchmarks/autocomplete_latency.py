@@ -0,0 +1,47 @@
+"""Measure the in-process latency of autocomplete queries.
+
+Every prefix of one to six characters of each movie title, actor name and director name in the catalogue is
+completed once, and the 50th, 99th and 100th percentile latencies are printed.
+
+Usage, from the project directory:
+
+    python -m benchmarks.autocomplete_latency [data_path]
+"""
+
+import os
+import sys
+import time
+
+from Movie.adapters.memory_repository import MemoryRepository, load_movies
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def measure(data_path: str):
+    repo = MemoryRepository()
+    load_movies(data_path, repo)
+
+    names = [movie.title for movie in repo.get_movies()]
+    names += [actor.actor_full_name for actor in repo.get_actor()]
+    names += [director.director_full_name for director in repo.get_director()]
+    prefixes = sorted({name[:length] for name in names if name for length in range(1, 7)})
+
+    start = time.perf_counter()
+    repo.autocomplete('a')
+    print('Index built in {:.1f} ms'.format((time.perf_counter() - start) * 1000))
+
+    latencies = list()
+    for prefix in prefixes:
+        start = time.perf_counter()
+        repo.autocomplete(prefix, 10)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print('{} prefixes: p50 {:.3f} ms, p99 {:.3f} ms, max {:.3f} ms'.format(
+        len(latencies), percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, latencies[-1] * 1000))
+
+
+if __name__ == '__main__':
+    measure(sys.argv[1] if len(sys.argv) > 1 else os.path.join('Movie', 'adapters', 'data'))
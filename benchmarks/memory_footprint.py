@@ -0,0 +1,59 @@
+"""Report the memory held by the domain objects of a fully loaded catalogue.
+
+For each domain class, prints the number of distinct instances and the bytes each instance occupies itself, including
+its attribute dictionary where it has one but excluding the values it refers to. Also prints the total memory
+allocated while populating the repository.
+
+Usage, from the project directory:
+
+    python -m benchmarks.memory_footprint [data_path]
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+from Movie.adapters.memory_repository import MemoryRepository, populate
+from Movie.domain.actor import Actor
+from Movie.domain.comment import Comment
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+from Movie.domain.movie import Movie
+
+DOMAIN_CLASSES = (Movie, Actor, Director, Genre, Comment)
+
+
+def instance_size(obj) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def measure(data_path: str):
+    gc.collect()
+    tracemalloc.start()
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    instances = {cls: dict() for cls in DOMAIN_CLASSES}
+    for obj in gc.get_objects():
+        if type(obj) in instances:
+            instances[type(obj)][id(obj)] = obj
+
+    print('{:<10} {:>10} {:>14} {:>14}'.format('Class', 'Instances', 'Bytes/object', 'Total bytes'))
+    for cls, objects in instances.items():
+        sizes = [instance_size(obj) for obj in objects.values()]
+        per_object = sum(sizes) / len(sizes) if sizes else 0
+        print('{:<10} {:>10} {:>14.1f} {:>14}'.format(cls.__name__, len(sizes), per_object, sum(sizes)))
+    print('Allocated while populating: {:.1f} KiB'.format(allocated / 1024))
+
+    return repo
+
+
+if __name__ == '__main__':
+    measure(sys.argv[1] if len(sys.argv) > 1 else os.path.join('Movie', 'adapters', 'data'))
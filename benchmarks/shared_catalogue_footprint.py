@@ -0,0 +1,58 @@
+"""Compare the memory each worker allocates for a private catalogue and for a shared catalogue file.
+
+For each kind of repository, prints the memory allocated to start the application, and then to serve a rendered page
+of movies from /movies_by_rank, with the similar movies it suggests, as each worker would. The shared catalogue file
+itself is mapped rather than allocated, so it is printed separately; the operating system holds one copy of it for
+every worker.
+
+Usage, from the project directory:
+
+    python -m benchmarks.shared_catalogue_footprint [data_path]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import Movie.adapters.repository as repo
+from Movie import create_app
+
+PAGE_SIZE = 10
+
+
+def allocated_by(function):
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, allocated
+
+
+def report(name: str, config: dict):
+    app, loaded = allocated_by(lambda: create_app(config))
+    client = app.test_client()
+    response, served = allocated_by(lambda: client.get('/movies_by_rank?page_size={}'.format(PAGE_SIZE)))
+    if response.status_code != 200:
+        raise RuntimeError('/movies_by_rank answered {}'.format(response.status_code))
+    print('{:<10} {:>14.1f} {:>14.1f}'.format(name, loaded / 1024, served / 1024))
+
+
+def measure(data_path: str):
+    config = {'TESTING': True, 'TEST_DATA_PATH': data_path, 'WTF_CSRF_ENABLED': False}
+    with tempfile.TemporaryDirectory() as directory:
+        catalogue_path = os.path.join(directory, 'movies.catalogue')
+
+        print('{:<10} {:>14} {:>14}'.format('Catalogue', 'Started KiB', 'Page KiB'))
+        report('private', dict(config, REPOSITORY='memory'))
+        report('shared', dict(config, REPOSITORY='shared', SHARED_CATALOGUE=catalogue_path))
+        print('Shared catalogue file: {:.1f} KiB, mapped once for every worker'.format(
+            os.path.getsize(catalogue_path) / 1024))
+        repo.repo_instance.get_catalogue_view().catalogue.close()
+
+
+if __name__ == '__main__':
+    measure(sys.argv[1] if len(sys.argv) > 1 else os.path.join('Movie', 'adapters', 'data'))
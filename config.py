@@ -15,3 +15,16 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+    # Path of the repository snapshot file. If unset, the repository is populated from the data files on every start.
+    REPOSITORY_SNAPSHOT = environ.get('REPOSITORY_SNAPSHOT')
+
+    # Path of the journal of users and comments written since the data files were last compacted, for the memory
+    # repository. If unset, they are lost when the application stops.
+    REPOSITORY_JOURNAL = environ.get('REPOSITORY_JOURNAL')
+
+    # Repository implementation: 'memory' (the default) keeps a copy in each worker; 'sqlite' shares the database file
+    # SQLITE_DATABASE between workers; 'shared' keeps users and comments in each worker, and maps the catalogue file
+    # SHARED_CATALOGUE, which every worker shares.
+    REPOSITORY = environ.get('REPOSITORY', 'memory')
+    SQLITE_DATABASE = environ.get('SQLITE_DATABASE', 'movies.sqlite3')
+    SHARED_CATALOGUE = environ.get('SHARED_CATALOGUE', 'movies.catalogue')
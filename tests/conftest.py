@@ -4,6 +4,10 @@ import pytest
 from Movie import create_app
 from Movie.adapters import memory_repository
 from Movie.adapters.memory_repository import MemoryRepository
+from Movie.adapters.shared_repository import populate_from_shared_catalogue
+from Movie.adapters.sqlite_repository import SqliteRepository
+from Movie.movie import services as movie_services
+from Movie.recommendations import services as recommendation_services
 
 """
 TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'ianwo', 'OneDrive', 'Documents', 'PythonDev', 'repo 02.07.2020',
@@ -11,6 +15,20 @@ TEST_DATA_PATH = os.path.join('C:', os.sep, 'Users', 'ianwo', 'OneDrive', 'Docum
 TEST_DATA_PATH = os.path.join('D:', os.sep, 'Desktop', 'CS235A2', 'tests', 'data')
 
 
+@pytest.fixture
+def data_path():
+    return TEST_DATA_PATH
+
+
+@pytest.fixture(autouse=True)
+def clear_service_caches():
+    # The services cache movies by rank and recommendations by user name, for the one repository of an app; each test
+    # has repositories of its own.
+    movie_services.clear_rendered_pages()
+    movie_services.clear_movie_dicts()
+    recommendation_services.clear_recommendations()
+
+
 @pytest.fixture
 def in_memory_repo():
     repo = MemoryRepository()
@@ -18,6 +36,19 @@ def in_memory_repo():
     return repo
 
 
+@pytest.fixture
+def sqlite_repo(tmp_path):
+    repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    memory_repository.populate(TEST_DATA_PATH, repo)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def shared_repo(tmp_path):
+    return populate_from_shared_catalogue(TEST_DATA_PATH, str(tmp_path / 'movies.catalogue'))
+
+
 @pytest.fixture
 def client():
     my_app = create_app({
@@ -29,6 +60,20 @@ def client():
     return my_app.test_client()
 
 
+@pytest.fixture
+def client_factory():
+    # Makes clients of separate apps with extra configuration, e.g. to share files as separate workers would.
+    def make_client(**config):
+        my_app = create_app(dict({
+            'TESTING': True,
+            'TEST_DATA_PATH': TEST_DATA_PATH,
+            'WTF_CSRF_ENABLED': False
+        }, **config))
+        return my_app.test_client()
+
+    return make_client
+
+
 class AuthenticationManager:
     def __init__(self, client):
         self._client = client
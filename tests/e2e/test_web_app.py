@@ -2,6 +2,9 @@ import pytest
 
 from flask import session
 
+from Movie.adapters.sqlite_repository import SqliteRepository
+from Movie.domain.comment import make_comment
+
 
 def test_register(client):
     # Check that we retrieve the register page.
@@ -134,3 +137,248 @@ def test_movies_with_comment(client):
     assert b'This an intense, fairly riveting story' in response.data
 
 
+def test_movies_with_page_size(client):
+    # Check that a page of several movies can be retrieved in one request.
+    response = client.get('/movies_by_rank?rank=1&page_size=3')
+    assert response.status_code == 200
+
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'Prometheus' in response.data
+    assert b'Split' in response.data
+    assert b'Sing' not in response.data
+    assert b'/movies_by_rank?rank=4&amp;page_size=3' in response.data
+
+
+def test_movies_with_rank_beyond_last_movie(client):
+    response = client.get('/movies_by_rank?rank=1001')
+    assert response.headers['Location'] == 'http://localhost/'
+
+
+def test_movies_page_supports_conditional_requests(client):
+    response = client.get('/movies_by_rank?rank=5')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified'] is not None
+
+    response = client.get('/movies_by_rank?rank=5', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = client.get('/movies_by_rank?rank=5',
+                          headers={'If-Modified-Since': client.get('/movies_by_rank?rank=5').headers['Last-Modified']})
+    assert response.status_code == 304
+
+
+def test_commenting_invalidates_cached_movies_page(client, auth):
+    response = client.get('/movies_by_rank?rank=5&view_comments_for=5')
+    etag = response.headers['ETag']
+    assert b'a truly suspenseful movie' not in response.data
+
+    auth.login()
+    client.post('/comment', data={'comment': 'a truly suspenseful movie', 'movie_id': 5})
+    auth.logout()
+
+    response = client.get('/movies_by_rank?rank=5&view_comments_for=5', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'a truly suspenseful movie' in response.data
+
+
+def test_movies_page_greets_logged_in_user(client, auth):
+    assert b'Welcome, thorke' not in client.get('/movies_by_rank?rank=6').data
+
+    auth.login()
+    assert b'Welcome, thorke' in client.get('/movies_by_rank?rank=6').data
+
+
+def test_search(client):
+    response = client.get('/search?q=galaxy')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'/movies_by_rank?rank=1' in response.data
+
+
+def test_search_without_matches(client):
+    response = client.get('/search?q=zzzzyzzx')
+    assert response.status_code == 200
+    assert b'No movies match' in response.data
+
+
+def test_search_with_invalid_limit(client):
+    response = client.get('/search?q=man&limit=abc')
+    assert response.status_code == 200
+    assert response.data.count(b'/movies_by_rank?rank=') == 10
+
+
+def test_autocomplete(client):
+    response = client.get('/autocomplete?q=ridley&limit=3')
+    assert response.status_code == 200
+
+    completions = response.get_json()
+    assert completions['directors'] == ['Ridley Scott']
+    assert completions['titles'] == []
+
+
+def test_autocomplete_with_invalid_limit(client):
+    response = client.get('/autocomplete?q=ch&limit=x')
+    assert response.status_code == 200
+    assert 0 < len(response.get_json()['titles']) <= 5
+
+
+def test_query_movies(client):
+    response = client.get(
+        '/query?genre=Action&year_min=2010&year_max=2016&rating_min=7&sort=revenue&order=desc&limit=2')
+    assert response.status_code == 200
+
+    movies = response.get_json()
+    assert [movie['title'] for movie in movies] == ['Star Wars: Episode VII - The Force Awakens', 'Jurassic World']
+    assert movies[0]['hyperlink'] == '/movies_by_rank?rank=51'
+
+
+def test_query_movies_with_invalid_arguments(client):
+    assert client.get('/query?sort=colour').status_code == 400
+    assert client.get('/query?year_min=recent').status_code == 400
+    assert client.get('/query?rating_min=nan').status_code == 400
+    assert client.get('/query?rating_max=inf').status_code == 400
+    assert client.get('/analytics?rating_min=nan').status_code == 400
+
+
+def test_analytics(client):
+    response = client.get('/analytics?genre=Sci-Fi&year_min=2014&year_max=2014&top=votes&k=1')
+    assert response.status_code == 200
+
+    analytics = response.get_json()
+    assert analytics['top_movies'] == [{'rank': 37, 'title': 'Interstellar', 'votes': 1047747}]
+    assert list(analytics['movies_by_year']) == ['2014']
+
+
+def test_analytics_with_invalid_arguments(client):
+    assert client.get('/analytics?top=colour').status_code == 400
+
+
+def test_stats_page(client):
+    response = client.get('/stats')
+    assert response.status_code == 200
+    assert b'Catalogue statistics' in response.data
+    assert b'Christopher Nolan' in response.data
+
+
+def test_stats_json(client):
+    stats = client.get('/stats.json?directors=1').get_json()
+
+    assert stats['number_of_movies'] == 1000
+    assert [director['director'] for director in stats['top_directors']] == ['Christopher Nolan']
+    assert stats['movies_by_year']['2016'] > 0
+
+
+def test_actors_worked_with(client):
+    response = client.get('/actors/worked_with?actor=Christian+Bale&colleague=Michael+Caine')
+    assert response.get_json()['shared_movies'] == 2
+
+    assert client.get('/actors/worked_with?actor=Christian+Bale&colleague=Nobody').status_code == 404
+
+
+def test_actors_collaborators(client):
+    response = client.get('/actors/collaborators?actor=Christian+Bale&limit=1')
+    assert response.get_json() == {'actor': 'Christian Bale',
+                                   'collaborators': [{'actor': 'Amy Adams', 'shared_movies': 2}]}
+
+
+def test_actors_separation(client):
+    result = client.get('/actors/separation?from=Chris+Pratt&to=Zoe+Saldana').get_json()
+
+    assert result['degrees'] == 1
+    assert result['path'][0]['movie']['hyperlink'] == '/movies_by_rank?rank={}'.format(result['path'][0]['movie']['rank'])
+
+
+def test_movie_page_shows_similar_movies(client):
+    response = client.get('/movies_by_rank?rank=37')
+    assert b'More like this' in response.data
+    assert b'<a href="/movies_by_rank?rank=103">The Martian</a>' in response.data
+
+
+def test_login_required_to_see_recommendations(client):
+    response = client.get('/recommendations')
+    assert response.headers['Location'] == 'http://localhost/authentication/login'
+
+
+def test_watching_a_movie_updates_recommendations(client, auth):
+    auth.login()
+
+    response = client.get('/watch?movie=37')
+    assert b'I watched this' in response.data
+
+    response = client.post('/watch', data={'movie_id': 37, 'watched': 'I watched this'})
+    assert response.headers['Location'] == 'http://localhost/recommendations'
+
+    response = client.post('/watch', data={'movie_id': 1, 'add_to_watchlist': 'Add to WatchList'})
+    response = client.get('/recommendations')
+    assert b'Recommended for you' in response.data
+    assert b'<a href="/movies_by_rank?rank=37">Interstellar</a>' in response.data
+    assert b'<a href="/movies_by_rank?rank=1">Guardians of the Galaxy</a>' in response.data
+    assert b'The Prestige' in response.data
+
+
+
+def test_app_can_use_sqlite_repository(client_factory, tmp_path):
+    config = {'REPOSITORY': 'sqlite', 'SQLITE_DATABASE': str(tmp_path / 'movies.sqlite3')}
+    client = client_factory(**config)
+    client.post('authentication/login', data={'username': 'thorke', 'password': 'cLQ^C#oFXloS'})
+
+    response = client.post('/comment', data={'comment': 'Who needs quarantine?', 'movie_id': 2})
+    assert response.status_code == 302
+
+    # Another app on the same database sees the comment.
+    response = client_factory(**config).get('/movies_by_rank?rank=2&view_comments_for=2')
+    assert b'Who needs quarantine?' in response.data
+
+
+def test_app_can_use_shared_catalogue(client_factory, tmp_path):
+    config = {'REPOSITORY': 'shared', 'SHARED_CATALOGUE': str(tmp_path / 'movies.catalogue')}
+    client = client_factory(**config)
+
+    response = client.get('/movies_by_rank?rank=2&view_comments_for=2')
+    assert response.status_code == 200
+    assert b'Prometheus' in response.data
+
+    # Another app maps the catalogue file the first wrote.
+    response = client_factory(**config).get('/search?q=galaxy')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+
+
+def test_sqlite_movies_page_shows_comments_written_by_another_worker(client_factory, tmp_path):
+    database_path = str(tmp_path / 'movies.sqlite3')
+    client = client_factory(REPOSITORY='sqlite', SQLITE_DATABASE=database_path)
+    assert b'Written elsewhere' not in client.get('/movies_by_rank?rank=2&view_comments_for=2').data
+
+    # Another worker's repository writes a comment, which this worker's page cache never hears about.
+    other_repo = SqliteRepository(database_path)
+    try:
+        user = other_repo.get_user('thorke')
+        other_repo.add_comment(make_comment('Written elsewhere', user, other_repo.get_movie(2)))
+    finally:
+        other_repo.close()
+
+    assert b'Written elsewhere' in client.get('/movies_by_rank?rank=2&view_comments_for=2').data
+
+
+def test_comments_survive_restart_with_journal(client_factory, tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+
+    client = client_factory(REPOSITORY_JOURNAL=journal_path)
+    client.post('/authentication/register', data={'username': 'gmichael', 'password': 'CarelessWh1sper'})
+    client.post('authentication/login', data={'username': 'gmichael', 'password': 'CarelessWh1sper'})
+    client.post('/comment', data={'comment': 'Who needs quarantine?', 'movie_id': 2})
+
+    restarted_client = client_factory(REPOSITORY_JOURNAL=journal_path)
+    response = restarted_client.get('/movies_by_rank?rank=2&view_comments_for=2')
+    assert b'Who needs quarantine?, by gmichael' in response.data
+
+    response = restarted_client.post('authentication/login',
+                                     data={'username': 'gmichael', 'password': 'CarelessWh1sper'})
+    assert response.headers['Location'] == 'http://localhost/'
+
+
+def test_movies_by_rank_ignores_malformed_arguments(client):
+    response = client.get('/movies_by_rank?rank=abc&page_size=abc&view_comments_for=x')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
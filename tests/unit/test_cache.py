@@ -0,0 +1,45 @@
+from Movie.movie.cache import LRUCache
+
+
+def test_cache_counts_hits_and_misses():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1, 'size': 1}
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+
+
+def test_cache_evicts_entries_to_stay_within_size():
+    cache = LRUCache(max_entries=10, max_size=10, sizeof=len)
+    cache.put('a', b'12345')
+    cache.put('b', b'1234')
+    cache.put('c', b'123')
+
+    assert 'a' not in cache
+    assert cache.size == 7
+
+    cache.put('d', b'12345678901')
+    assert 'd' not in cache
+
+
+def test_cache_can_pop_and_clear_entries():
+    cache = LRUCache(max_entries=10)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.pop('a') == 1
+    assert 'a' not in cache
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
@@ -0,0 +1,62 @@
+import numpy as np
+
+from Movie.domain.genre import Genre
+
+
+def test_columns_hold_typed_attributes_in_rank_order(in_memory_repo):
+    columns = in_memory_repo.get_movie_columns()
+
+    assert len(columns) == 1000
+    assert list(columns.column('rank')[:3]) == [1, 2, 3]
+    assert columns.column('year').dtype == np.int32
+    assert columns.column('rating')[0] == 8.1
+    assert columns.column('revenue')[0] == 333.13
+
+
+def test_columns_hold_missing_values_as_nan(in_memory_repo):
+    columns = in_memory_repo.get_movie_columns()
+
+    # Mindhorn, ranked 8, has no revenue.
+    assert np.isnan(columns.column('revenue')[7])
+    assert columns.column('metascore')[7] == 71
+
+
+def test_columns_range_mask_excludes_missing_values(in_memory_repo):
+    columns = in_memory_repo.get_movie_columns()
+    mask = columns.range_mask('revenue', None, 1)
+
+    movies = columns.movies_at(np.flatnonzero(mask))
+    assert len(movies) > 0
+    assert all(movie.revenue is not None and movie.revenue <= 1 for movie in movies)
+
+
+def test_columns_top_k_matches_sort(in_memory_repo):
+    columns = in_memory_repo.get_movie_columns()
+    mask = columns.genre_mask(Genre('Action')) & columns.range_mask('year', 2010, 2016)
+
+    movies = columns.movies_at(columns.top_k('revenue', 5, mask))
+
+    expected = sorted((movie for movie in in_memory_repo.get_movie_by_genre(Genre('Action'))
+                       if 2010 <= movie.year <= 2016 and movie.revenue is not None),
+                      key=lambda movie: -movie.revenue)[:5]
+    assert movies == expected
+
+
+def test_columns_mean_by_genre_matches_scan(in_memory_repo):
+    means = in_memory_repo.get_movie_columns().mean_by_genre('rating')
+
+    for genre in in_memory_repo.get_genre():
+        ratings = [movie.rating for movie in in_memory_repo.get_movie_by_genre(genre)]
+        assert abs(means[genre] - sum(ratings) / len(ratings)) < 1e-9
+
+
+def test_columns_total_by_year(in_memory_repo):
+    columns = in_memory_repo.get_movie_columns()
+
+    counts = columns.total_by('year')
+    assert sum(counts.values()) == 1000
+    assert counts[2016] == len([movie for movie in in_memory_repo.get_movies() if movie.year == 2016])
+
+    revenues = columns.total_by('year', 'revenue')
+    expected = sum(movie.revenue for movie in in_memory_repo.get_movies() if movie.year == 2014 and movie.revenue)
+    assert abs(revenues[2014] - expected) < 1e-6
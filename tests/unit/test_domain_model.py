@@ -53,6 +53,23 @@ def test_movie_construction(movie: Movie):
     assert repr(movie) == '<Movie Guardians of the Galaxy, 2014>'
 
 
+def test_movie_actors_and_genres_are_immutable(movie):
+    movie.add_actor(Actor('Chris Pratt'))
+    movie.add_genre(Genre('Action'))
+    actors, genres = movie.actors, movie.genres
+
+    with pytest.raises(AttributeError):
+        actors.append(Actor('Vin Diesel'))
+
+    movie.add_actor(Actor('Vin Diesel'))
+    movie.remove_genre(Genre('Action'))
+
+    # Tuples already read are unaffected by later changes.
+    assert actors == (Actor('Chris Pratt'),) and genres == (Genre('Action'),)
+    assert movie.actors == (Actor('Chris Pratt'), Actor('Vin Diesel'))
+    assert movie.genres == ()
+
+
 def test_article_less_than_operator():
     movie_1 = Movie(
         1, None, None, 0, 0, 0, 0, None, None
@@ -82,6 +99,41 @@ def test_make_comment_establishes_relationships(movie, user):
     assert comment.movie is movie
 
 
+def test_domain_entities_are_slotted(movie, user):
+    comment = make_comment('enjoyable movie', user, movie)
+    for entity in (movie, Actor('Chris Pratt'), Director('James Gunn'), Genre('Action'), comment):
+        assert not hasattr(entity, '__dict__')
+
+
+def test_actor_counts_shared_movies_with_colleagues():
+    actor = Actor('Chris Pratt')
+    colleague = Actor('Zoe Saldana')
+    actor.add_actor_colleague(colleague)
+    actor.add_actor_colleague(colleague)
+
+    assert actor.check_if_this_actor_worked_with(Actor('Zoe Saldana'))
+    assert not actor.check_if_this_actor_worked_with(Actor('Vin Diesel'))
+    assert actor.number_of_shared_movies(colleague) == 2
+    assert dict(actor.actor_colleagues) == {colleague: 2}
+
+    with pytest.raises(TypeError):
+        actor.add_actor_colleague('Zoe Saldana')
+
+
+def test_user_watch_movie(user, movie):
+    user.watch_movie(movie)
+    user.watch_movie(movie)
+
+    assert user.watched_movies == [movie]
+    assert user.has_watched(movie)
+    assert user.time_spent_watching_movies_minutes == movie.duration
+
+    with pytest.raises(TypeError):
+        user.watch_movie('Guardians of the Galaxy')
 
 
+def test_user_has_a_watchlist(user, movie):
+    user.watchlist.add_movie(movie)
 
+    assert movie in user.watchlist
+    assert user.watchlist.first_movie_in_watchlist() is movie
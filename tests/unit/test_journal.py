@@ -0,0 +1,243 @@
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from Movie.adapters import journal as journal_module
+from Movie.adapters import memory_repository
+from Movie.adapters.journal import Journal, compact_journal, read_journal, replay_journal
+from Movie.adapters.memory_repository import MemoryRepository
+from Movie.domain.comment import make_comment
+from Movie.domain.user import User
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'journal.jsonl')
+
+
+def test_journal_appends_records(journal_path):
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'dave', 'password': 'hash'})
+    journal.append({'type': 'user', 'user_name': 'prince', 'password': 'hash'})
+    journal.close()
+
+    assert [record['user_name'] for record in read_journal(journal_path)] == ['dave', 'prince']
+    assert journal.records == 2
+
+
+def test_journal_groups_concurrent_writes_into_one_fsync(journal_path, monkeypatch):
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(0.005)
+        fsync(fd)
+
+    monkeypatch.setattr(journal_module.os, 'fsync', slow_fsync)
+    journal = Journal(journal_path)
+
+    def write_records(thread):
+        for number in range(25):
+            journal.append({'type': 'user', 'user_name': '{}-{}'.format(thread, number), 'password': 'hash'})
+
+    threads = [threading.Thread(target=write_records, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    records = list(read_journal(journal_path))
+    assert len(records) == 200
+    assert len({record['user_name'] for record in records}) == 200
+
+    # Writers arriving during a flush share the next one.
+    assert journal.batches < 200 / 2
+
+
+def test_journal_ignores_a_torn_final_line(journal_path):
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'dave', 'password': 'hash'})
+    journal.close()
+    with open(journal_path, mode='ab') as outfile:
+        outfile.write(b'{"type": "user", "user_na')
+
+    assert [record['user_name'] for record in read_journal(journal_path)] == ['dave']
+
+
+def test_journal_cuts_off_a_torn_final_line_before_appending(journal_path):
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'dave', 'password': 'hash'})
+    journal.close()
+    with open(journal_path, mode='ab') as outfile:
+        outfile.write(b'{"type":"comm')
+
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'prince', 'password': 'hash'})
+    journal.close()
+
+    assert [record['user_name'] for record in read_journal(journal_path)] == ['dave', 'prince']
+
+
+def test_torn_tail_is_found_across_chunks(journal_path):
+    with open(journal_path, mode='wb') as outfile:
+        outfile.write(b'{"a":1}\n' + b'x' * 100)
+    fd = os.open(journal_path, os.O_RDWR)
+    journal_module.truncate_torn_tail(fd, chunk_size=7)
+    os.close(fd)
+
+    with open(journal_path, mode='rb') as infile:
+        assert infile.read() == b'{"a":1}\n'
+
+
+def test_journal_does_not_exist_until_written(journal_path):
+    assert list(read_journal(journal_path)) == []
+
+
+def test_repository_journals_users_and_comments(data_path, journal_path):
+    repo = MemoryRepository()
+    memory_repository.populate(data_path, repo)
+    repo.attach_journal(Journal(journal_path))
+
+    user = User('dave', 'hash')
+    repo.add_user(user)
+    repo.add_user(User('Dave', 'other hash'))
+    repo.add_comment(make_comment('Loved it', user, repo.get_movie(3), datetime(2020, 3, 4, 5, 6, 7)))
+
+    # A restarted repository gets the writes back from the journal.
+    restarted_repo = MemoryRepository()
+    memory_repository.populate(data_path, restarted_repo)
+    replay_journal(journal_path, restarted_repo)
+
+    assert restarted_repo.get_user('dave').password == 'hash'
+    comment = restarted_repo.get_comments()[-1]
+    assert (comment.user.user_name, comment.movie.rank, comment.comment) == ('dave', 3, 'Loved it')
+    assert comment.timestamp == datetime(2020, 3, 4, 5, 6, 7)
+    assert comment in restarted_repo.get_movie(3).comments
+
+
+def test_repository_journals_a_name_registered_concurrently_once(journal_path):
+    repo = MemoryRepository()
+    repo.attach_journal(Journal(journal_path))
+    start = threading.Barrier(8)
+
+    def register(number):
+        start.wait()
+        repo.add_user(User('dave', 'hash {}'.format(number)))
+
+    threads = [threading.Thread(target=register, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = list(read_journal(journal_path))
+    assert len(records) == 1
+    assert repo.get_user('dave').password == records[0]['password']
+
+
+def test_repository_reads_while_a_user_is_journaled(journal_path):
+    class SlowJournal:
+        def __init__(self):
+            self.started = threading.Event()
+            self.release = threading.Event()
+
+        def append(self, record):
+            self.started.set()
+            self.release.wait(5)
+
+    journal = SlowJournal()
+    repo = MemoryRepository()
+    repo.add_user(User('thorke', 'hash'))
+    repo.attach_journal(journal)
+
+    registration = threading.Thread(target=repo.add_user, args=(User('dave', 'hash'),))
+    registration.start()
+    assert journal.started.wait(5)
+
+    # Reads go on while the record is being flushed; the user is published once it is durable.
+    assert repo.get_user('thorke') is not None
+    assert repo.get_user('dave') is None
+    journal.release.set()
+    registration.join()
+    assert repo.get_user('dave') is not None
+
+
+def test_compact_journal_folds_writes_into_data_files(data_path, journal_path, tmp_path):
+    compacted_path = str(tmp_path / 'data')
+    shutil.copytree(data_path, compacted_path)
+
+    repo = MemoryRepository()
+    memory_repository.populate(compacted_path, repo)
+    repo.attach_journal(Journal(journal_path))
+    user = User('dave', 'hash')
+    repo.add_user(user)
+    repo.add_comment(make_comment('Loved it', user, repo.get_movie(3), datetime(2020, 3, 4, 5, 6, 7)))
+    repo.add_comment(make_comment('Not bad', repo.get_user('thorke'), repo.get_movie(4)))
+
+    compact_journal(compacted_path, journal_path)
+    assert list(read_journal(journal_path)) == []
+
+    compacted_repo = MemoryRepository()
+    memory_repository.populate(compacted_path, compacted_repo)
+    assert compacted_repo.get_user('dave').password == 'hash'
+    assert [comment.comment for comment in compacted_repo.get_comments()][-2:] == ['Loved it', 'Not bad']
+    assert compacted_repo.get_comments()[-2].timestamp == datetime(2020, 3, 4, 5, 6, 7)
+
+    # Seed users keep their passwords, now hashed.
+    assert memory_repository.read_csv_header(os.path.join(compacted_path, 'users.csv'))[2] == 'password_hash'
+    assert check_password_hash(compacted_repo.get_user('thorke').password, 'cLQ^C#oFXloS')
+
+
+def test_compact_journal_leaves_data_and_journal_whole_if_interrupted(data_path, journal_path, tmp_path, monkeypatch):
+    compacted_path = str(tmp_path / 'data')
+    shutil.copytree(data_path, compacted_path)
+    users_filename = os.path.join(compacted_path, 'users.csv')
+    with open(users_filename, mode='rb') as infile:
+        users_data = infile.read()
+
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'dave', 'password': 'hash'})
+    journal.close()
+
+    def crash(source, target):
+        raise OSError('Crashed before the rename')
+
+    monkeypatch.setattr(journal_module.os, 'replace', crash)
+    with pytest.raises(OSError):
+        compact_journal(compacted_path, journal_path)
+
+    with open(users_filename, mode='rb') as infile:
+        assert infile.read() == users_data
+    assert [record['user_name'] for record in read_journal(journal_path)] == ['dave']
+
+
+def test_compaction_interrupted_before_emptying_the_journal_adds_nothing_twice(data_path, journal_path, tmp_path):
+    compacted_path = str(tmp_path / 'data')
+    shutil.copytree(data_path, compacted_path)
+    journal = Journal(journal_path)
+    journal.append({'type': 'user', 'user_name': 'dave', 'password': 'hash'})
+    journal.append({'type': 'comment', 'user_name': 'dave', 'rank': 3, 'comment': 'Loved it',
+                    'timestamp': datetime(2020, 3, 4, 5, 6, 7, 89).isoformat()})
+    journal.close()
+
+    # The data files are replaced, but the process dies before the journal is emptied.
+    with open(journal_path, mode='rb') as infile:
+        journal_data = infile.read()
+    compact_journal(compacted_path, journal_path)
+    with open(journal_path, mode='wb') as outfile:
+        outfile.write(journal_data)
+
+    repo = MemoryRepository()
+    memory_repository.populate(compacted_path, repo)
+    replay_journal(journal_path, repo)
+    assert [comment.comment for comment in repo.get_movie(3).comments].count('Loved it') == 1
+
+    compact_journal(compacted_path, journal_path)
+    compacted_repo = MemoryRepository()
+    memory_repository.populate(compacted_path, compacted_repo)
+    assert [comment.comment for comment in compacted_repo.get_comments()].count('Loved it') == 1
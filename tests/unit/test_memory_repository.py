@@ -1,7 +1,12 @@
+import os
+import shutil
+import threading
+from collections import deque
 from datetime import date, datetime
 from typing import List
 
 import pytest
+from werkzeug.security import check_password_hash
 
 from Movie.domain.genre import Genre
 from Movie.domain.actor import Actor
@@ -10,6 +15,13 @@ from Movie.domain.comment import Comment, make_comment
 from Movie.domain.movie import Movie
 from Movie.domain.user import User
 from Movie.adapters.repository import RepositoryException
+from Movie.adapters import memory_repository
+from Movie.adapters.hash_user_passwords import hash_user_passwords
+from Movie.adapters.memory_repository import MemoryRepository
+from Movie.adapters.movie_query import MovieQuery, PlanStep, execute_plan
+from Movie.adapters.recommendations import UserRecommendations
+from Movie.adapters import similarity
+from Movie.adapters.similarity import SimilarMovies
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -153,4 +165,626 @@ def test_repository_can_retrieve_comments(in_memory_repo):
     assert len(in_memory_repo.get_comments()) == 4
 
 
+def test_repository_can_retrieve_movies_by_genre(in_memory_repo):
+    movies = in_memory_repo.get_movie_by_genre(Genre('Sci-Fi'))
 
+    assert len(movies) > 0
+    assert movies[0].title == 'Guardians of the Galaxy'
+    assert all(Genre('Sci-Fi') in movie.genres for movie in movies)
+    assert [movie.rank for movie in movies] == sorted(movie.rank for movie in movies)
+
+
+def test_repository_can_retrieve_movies_by_actor(in_memory_repo):
+    movies = in_memory_repo.get_movie_by_actor(Actor('Chris Pratt'))
+
+    assert movies[0].title == 'Guardians of the Galaxy'
+    assert all(Actor('Chris Pratt') in movie.actors for movie in movies)
+    assert [movie.rank for movie in movies] == sorted(movie.rank for movie in movies)
+
+
+def test_repository_can_retrieve_movies_by_director(in_memory_repo):
+    movies = in_memory_repo.get_movie_by_director(Director('Ridley Scott'))
+
+    assert movies[0].title == 'Prometheus'
+    assert all(movie.director == Director('Ridley Scott') for movie in movies)
+
+
+def test_repository_indexes_added_movie_by_genre_actor_and_director(in_memory_repo):
+    movie = Movie(1001, 'Some Movie', 'yes some movie', 2015, 100, 5.4, 1234, 543.3, 67)
+    movie.director = Director('Some Director')
+    movie.add_actor(Actor('Chris Pratt'))
+    movie.add_genre(Genre('Action'))
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_movie_by_director(Director('Some Director')) == [movie]
+    assert in_memory_repo.get_movie_by_actor(Actor('Chris Pratt'))[-1] is movie
+    assert in_memory_repo.get_movie_by_genre(Genre('Action'))[-1] is movie
+
+
+def test_repository_does_not_retrieve_movies_for_unknown_facets(in_memory_repo):
+    assert in_memory_repo.get_movie_by_genre(Genre('Nonexistent')) == []
+    assert in_memory_repo.get_movie_by_actor(Actor('Nobody')) == []
+    assert in_memory_repo.get_movie_by_director('Ridley Scott') == []
+
+
+def test_repository_stores_each_actor_once(in_memory_repo):
+    actors = in_memory_repo.get_actor()
+
+    assert len(actors) == len(set(actors))
+    assert Actor('Chris Pratt') in actors
+
+
+def test_repository_add_actor_returns_canonical_instance(in_memory_repo):
+    canonical = in_memory_repo.get_movie(1).actors[0]
+    actor = in_memory_repo.add_actor(Actor(canonical.actor_full_name))
+
+    assert actor is canonical
+
+
+def test_movies_share_canonical_entities(in_memory_repo):
+    pratt_movies = in_memory_repo.get_movie_by_actor(Actor('Chris Pratt'))
+    pratts = {id(actor) for movie in pratt_movies for actor in movie.actors if actor == Actor('Chris Pratt')}
+    assert len(pratt_movies) > 1 and len(pratts) == 1
+
+    scott_movies = in_memory_repo.get_movie_by_director(Director('Ridley Scott'))
+    assert len({id(movie.director) for movie in scott_movies}) == 1
+
+    genres = in_memory_repo.get_genre()
+    assert len(genres) == len(set(genres))
+    assert in_memory_repo.add_genre(Genre('Sci-Fi')) is in_memory_repo.get_movie(1).genres[2]
+
+
+def test_repository_retrieves_a_user_regardless_of_case(in_memory_repo):
+    user = in_memory_repo.get_user(' FMercury ')
+    assert user is in_memory_repo.get_user('fmercury')
+
+
+def test_repository_keeps_first_user_with_a_given_name(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    in_memory_repo.add_user(User('Thorke', 'abcd1A23'))
+
+    assert in_memory_repo.get_user('thorke') is user
+
+
+def test_repository_returns_a_page_of_movies(in_memory_repo):
+    movies, previous_rank, next_rank = in_memory_repo.get_movies_page(11, 5)
+
+    assert [movie.rank for movie in movies] == [11, 12, 13, 14, 15]
+    assert previous_rank == 6
+    assert next_rank == 16
+
+
+def test_repository_returns_first_page_without_start_rank(in_memory_repo):
+    movies, previous_rank, next_rank = in_memory_repo.get_movies_page(None, 3)
+
+    assert [movie.rank for movie in movies] == [1, 2, 3]
+    assert previous_rank is None
+    assert next_rank == 4
+
+
+def test_repository_returns_partial_last_page(in_memory_repo):
+    movies, previous_rank, next_rank = in_memory_repo.get_movies_page(998, 5)
+
+    assert [movie.rank for movie in movies] == [998, 999, 1000]
+    assert previous_rank == 993
+    assert next_rank is None
+
+
+def test_repository_returns_empty_page_beyond_last_movie(in_memory_repo):
+    movies, previous_rank, next_rank = in_memory_repo.get_movies_page(1001, 5)
+
+    assert movies == []
+    assert next_rank is None
+
+
+def test_repository_does_not_return_page_with_invalid_limit(in_memory_repo):
+    with pytest.raises(ValueError):
+        in_memory_repo.get_movies_page(1, 0)
+
+
+@pytest.fixture
+def sparse_repo():
+    repo = MemoryRepository()
+    for rank in (40, 3, 17, 8, 9):
+        repo.add_movie(Movie(rank, 'Movie {}'.format(rank), None, 2000, 90, 5.0, 10))
+    return repo
+
+
+def test_repository_returns_neighbouring_ranks_over_gaps(sparse_repo):
+    assert sparse_repo.get_rank_of_previous_movie(sparse_repo.get_movie(17)) == 9
+    assert sparse_repo.get_rank_of_next_movie(sparse_repo.get_movie(17)) == 40
+    assert sparse_repo.get_rank_of_previous_movie(sparse_repo.get_movie(9)) == 8
+    assert sparse_repo.get_rank_of_next_movie(sparse_repo.get_movie(8)) == 9
+
+
+def test_repository_returns_none_at_ends_of_sparse_ranks(sparse_repo):
+    assert sparse_repo.get_rank_of_previous_movie(sparse_repo.get_movie(3)) is None
+    assert sparse_repo.get_rank_of_next_movie(sparse_repo.get_movie(40)) is None
+
+
+def test_repository_returns_neighbouring_ranks_of_missing_rank(sparse_repo):
+    assert sparse_repo.neighbouring_ranks(10) == (9, 17)
+    assert sparse_repo.neighbouring_ranks(1) == (None, 3)
+    assert sparse_repo.neighbouring_ranks(100) == (40, None)
+
+
+def test_repository_returns_page_over_sparse_ranks(sparse_repo):
+    movies, previous_rank, next_rank = sparse_repo.get_movies_page(5, 2)
+
+    assert [movie.rank for movie in movies] == [8, 9]
+    assert previous_rank == 3
+    assert next_rank == 17
+
+
+def test_repository_can_add_many_movies(sparse_repo):
+    movies = [Movie(rank, 'Movie {}'.format(rank), None, 2000, 90, 5.0, 10) for rank in (12, 1, 50)]
+    for movie in movies:
+        movie.add_genre(Genre('Drama'))
+    sparse_repo.add_movies(movies)
+
+    assert [movie.rank for movie in sparse_repo.get_movies()] == [1, 3, 8, 9, 12, 17, 40, 50]
+    assert sparse_repo.get_movie(12) is movies[0]
+    assert [movie.rank for movie in sparse_repo.get_movie_by_genre(Genre('Drama'))] == [1, 12, 50]
+    assert sparse_repo.neighbouring_ranks(12) == (9, 17)
+
+
+def test_repository_bulk_loaded_indexes_match_incremental_indexes(in_memory_repo):
+    repo = MemoryRepository()
+    for movie in reversed(in_memory_repo.get_movies()):
+        repo.add_movie(movie)
+
+    assert repo.get_movies() == in_memory_repo.get_movies()
+    for actor in in_memory_repo.get_actor()[:50]:
+        assert repo.get_movie_by_actor(actor) == in_memory_repo.get_movie_by_actor(actor)
+    for genre in in_memory_repo.get_genre():
+        assert repo.get_movie_by_genre(genre) == in_memory_repo.get_movie_by_genre(genre)
+
+
+def test_repository_snapshot_round_trip(in_memory_repo, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    memory_repository.save_snapshot(snapshot_path, in_memory_repo)
+    repo = memory_repository.load_snapshot(snapshot_path)
+
+    assert repo.get_number_of_movies() == 1000
+    assert repo.get_movie(1).title == 'Guardians of the Galaxy'
+    assert repo.get_movie_by_actor(Actor('Chris Pratt')) == in_memory_repo.get_movie_by_actor(Actor('Chris Pratt'))
+    assert len(repo.get_actor()) == len(in_memory_repo.get_actor())
+    assert repo.get_user('thorke').password == in_memory_repo.get_user('thorke').password
+
+    # Check that comments are restored with their links to users and movies.
+    assert len(repo.get_comments()) == 4
+    comment = next(comment for comment in repo.get_comments() if comment.movie.rank == 2)
+    assert comment.user is repo.get_user('thorke')
+    assert comment in comment.movie.comments
+    assert comment in comment.user.comments
+    assert comment.movie is repo.get_movie(2)
+
+
+def test_populate_from_snapshot_uses_current_snapshot(data_path, tmp_path, monkeypatch):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    repo = memory_repository.populate_from_snapshot(data_path, snapshot_path)
+    assert os.path.exists(snapshot_path)
+
+    def populate(data_path, repo):
+        assert False, 'A current snapshot should be loaded instead of populating the repository'
+
+    monkeypatch.setattr(memory_repository, 'populate', populate)
+    snapshot_repo = memory_repository.populate_from_snapshot(data_path, snapshot_path)
+
+    assert snapshot_repo.get_number_of_movies() == repo.get_number_of_movies()
+    assert len(snapshot_repo.get_comments()) == len(repo.get_comments())
+
+
+def test_populate_from_snapshot_rebuilds_stale_snapshot(data_path, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    with open(snapshot_path, 'wb') as snapshot:
+        snapshot.write(b'not a snapshot')
+    os.utime(snapshot_path, (0, 0))
+
+    repo = memory_repository.populate_from_snapshot(data_path, snapshot_path)
+
+    assert repo.get_number_of_movies() == 1000
+    assert memory_repository.load_snapshot(snapshot_path).get_number_of_movies() == 1000
+
+
+def test_repository_loads_users_with_hashed_passwords(data_path, tmp_path, monkeypatch):
+    shutil.copytree(data_path, str(tmp_path / 'data'))
+    users_path = str(tmp_path / 'data' / 'users.csv')
+    hash_user_passwords(os.path.join(data_path, 'users.csv'), users_path)
+
+    def generate_password_hash(password):
+        assert False, 'Hashed passwords should not be hashed again'
+
+    monkeypatch.setattr(memory_repository, 'generate_password_hash', generate_password_hash)
+    repo = MemoryRepository()
+    memory_repository.populate(str(tmp_path / 'data'), repo)
+
+    user = repo.get_user('thorke')
+    assert check_password_hash(user.password, 'cLQ^C#oFXloS')
+    assert len(repo.get_comments()) == 4
+
+
+def test_repository_can_search_movies_by_title(in_memory_repo):
+    movies = in_memory_repo.search_movies('galaxy')
+
+    assert movies[0].title == 'Guardians of the Galaxy'
+
+
+def test_repository_can_search_movies_by_person_and_genre(in_memory_repo):
+    movies = in_memory_repo.search_movies('Chris Pratt', limit=3)
+    assert len(movies) == 3
+    assert all(Actor('Chris Pratt') in movie.actors for movie in movies)
+
+    movies = in_memory_repo.search_movies('ridley scott sci-fi')
+    assert movies[0].director == Director('Ridley Scott')
+    assert Genre('Sci-Fi') in movies[0].genres
+
+
+def test_repository_search_ignores_case_and_stop_words(in_memory_repo):
+    assert in_memory_repo.search_movies('GUARDIANS of THE galaxy', limit=1) == in_memory_repo.search_movies('guardians galaxy', limit=1)
+    assert in_memory_repo.search_movies('the of and') == []
+
+
+def test_repository_does_not_find_unmatched_query(in_memory_repo):
+    assert in_memory_repo.search_movies('zzzzyzzx') == []
+
+
+def test_repository_search_includes_added_movie(in_memory_repo):
+    movie = Movie(1001, 'Quokka Island', 'A quokka saves the day.', 2015, 100, 5.4, 1234, 543.3, 67)
+    movie.director = Director('Some Director')
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.search_movies('quokka') == [movie]
+
+
+def test_repository_autocompletes_titles_and_people(in_memory_repo):
+    completions = in_memory_repo.autocomplete('galax')
+    assert completions['titles'] == [in_memory_repo.get_movie(1)]
+
+    completions = in_memory_repo.autocomplete('Chris P')
+    assert Actor('Chris Pratt') in completions['actors']
+
+    completions = in_memory_repo.autocomplete('ridley')
+    assert completions['directors'] == [Director('Ridley Scott')]
+
+
+def test_repository_autocompletes_most_voted_first(in_memory_repo):
+    titles = in_memory_repo.autocomplete('the', limit=5)['titles']
+
+    assert len(titles) == 5
+    assert [movie.votes for movie in titles] == sorted((movie.votes for movie in titles), reverse=True)
+
+
+def test_repository_autocomplete_includes_added_movie(in_memory_repo):
+    in_memory_repo.autocomplete('quo')
+    movie = Movie(1001, 'Quokka Island', 'A quokka saves the day.', 2015, 100, 5.4, 1234, 543.3, 67)
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.autocomplete('quokka')['titles'] == [movie]
+
+
+def test_repository_autocompletes_nothing_for_empty_prefix(in_memory_repo):
+    assert in_memory_repo.autocomplete('  ') == {'titles': [], 'actors': [], 'directors': []}
+
+
+def test_repository_can_query_movies_by_facets_and_ranges(in_memory_repo):
+    query = MovieQuery(genres=[Genre('Action')], year=(2010, 2016), rating=(7, None), sort_by='revenue',
+                       descending=True, limit=3)
+    movies = in_memory_repo.query_movies(query)
+
+    assert [movie.title for movie in movies] == [
+        'Star Wars: Episode VII - The Force Awakens', 'Jurassic World', 'The Avengers']
+
+
+def test_repository_query_matches_a_scan(in_memory_repo):
+    query = MovieQuery(genres=[Genre('Drama'), Genre('Romance')], duration=(100, 130), metascore=(60, None))
+    movies = in_memory_repo.query_movies(query)
+
+    expected = [movie for movie in in_memory_repo.get_movies()
+                if Genre('Drama') in movie.genres and Genre('Romance') in movie.genres
+                and 100 <= movie.duration <= 130 and movie.metascore is not None and movie.metascore >= 60]
+    assert len(movies) > 0
+    assert movies == expected
+
+
+def test_repository_query_by_actor_and_director(in_memory_repo):
+    movies = in_memory_repo.query_movies(MovieQuery(actors=[Actor('Chris Pratt')], sort_by='year'))
+    assert [movie.year for movie in movies] == sorted(movie.year for movie in movies)
+    assert all(Actor('Chris Pratt') in movie.actors for movie in movies)
+
+    movies = in_memory_repo.query_movies(MovieQuery(director=Director('Ridley Scott'), rating=(8, None)))
+    assert [movie.title for movie in movies] == ['The Martian']
+
+
+def test_repository_query_orders_movies_without_value_last(in_memory_repo):
+    movies = in_memory_repo.query_movies(MovieQuery(year=(2016, 2016), sort_by='revenue', descending=True))
+
+    revenues = [movie.revenue for movie in movies]
+    assert None in revenues
+    assert all(revenue is None for revenue in revenues[revenues.index(None):])
+
+
+def test_repository_query_without_matches(in_memory_repo):
+    assert in_memory_repo.query_movies(MovieQuery(genres=[Genre('Nonexistent')])) == []
+    assert in_memory_repo.query_movies(MovieQuery(rating=(9.5, None), year=(2006, 2007))) == []
+
+
+def test_query_plan_tests_every_step(in_memory_repo):
+    movies = in_memory_repo.get_movies()
+    # The most selective step produces more movies than it matches.
+    even = PlanStep(10, lambda: movies[:20], lambda movie: movie.rank % 2 == 0)
+    early = PlanStep(100, lambda: movies[:100], lambda movie: movie.rank <= 100)
+
+    assert [movie.rank for movie in execute_plan([early, even], movies)] == list(range(2, 21, 2))
+
+
+def test_query_rejects_unknown_sort_key():
+    with pytest.raises(ValueError):
+        MovieQuery(sort_by='colour')
+
+
+def test_repository_rollups_match_a_scan_of_the_movies(in_memory_repo):
+    rollups = in_memory_repo.get_catalogue_rollups()
+    movies = in_memory_repo.get_movies()
+
+    assert rollups.number_of_movies == len(movies)
+    for rollup in rollups.genres():
+        genre_movies = [movie for movie in movies if rollup.genre in movie.genres]
+        assert rollup.movies == len(genre_movies)
+        assert rollup.mean_rating == pytest.approx(sum(movie.rating for movie in genre_movies) / len(genre_movies))
+        assert rollup.total_revenue == pytest.approx(sum(movie.revenue or 0 for movie in genre_movies))
+    assert rollups.movies_by_year()[2016] == len([movie for movie in movies if movie.year == 2016])
+
+    top = rollups.top_directors(3)
+    assert len(top) == 3
+    assert [rollup.mean_rating for rollup in top] == sorted((rollup.mean_rating for rollup in top), reverse=True)
+    assert top[0].director.director_full_name == 'Christopher Nolan'
+
+
+def test_repository_rollups_follow_add_movie(in_memory_repo):
+    rollups = in_memory_repo.get_catalogue_rollups()
+    musicals = {rollup.genre: rollup for rollup in rollups.genres()}[Genre('Musical')]
+    directors = len(rollups.top_directors(1000))
+
+    for rank in (1001, 1002):
+        movie = Movie(rank, 'Some Musical {}'.format(rank), 'singing', 2030, 100, 9.9, 1234, 10.0, 67)
+        movie.director = Director('Someone New')
+        movie.add_genre(Genre('Musical'))
+        in_memory_repo.add_movie(movie)
+
+    updated = {rollup.genre: rollup for rollup in rollups.genres()}[Genre('Musical')]
+    assert updated.movies == musicals.movies + 2
+    assert updated.total_revenue == pytest.approx(musicals.total_revenue + 20)
+    assert rollups.movies_by_year()[2030] == 2
+    assert rollups.top_directors(1)[0].director == Director('Someone New')
+    assert len(rollups.top_directors(1000)) == directors + 1
+
+
+def test_repository_links_co_stars(in_memory_repo):
+    bale = in_memory_repo.get_costar_graph().get_actor(Actor('Christian Bale'))
+
+    assert bale.check_if_this_actor_worked_with(Actor('Michael Caine'))
+    assert not bale.check_if_this_actor_worked_with(Actor('Chris Pratt'))
+    assert in_memory_repo.get_costar_graph().top_collaborators(Actor('Christian Bale'), 2) == [
+        (Actor('Amy Adams'), 2), (Actor('Michael Caine'), 2)]
+
+
+def test_repository_finds_degrees_of_separation(in_memory_repo):
+    graph = in_memory_repo.get_costar_graph()
+
+    path = graph.shortest_path(Actor('Chris Pratt'), Actor('Meryl Streep'))
+    assert path[0] == Actor('Chris Pratt') and path[-1] == Actor('Meryl Streep')
+    assert all(actor.check_if_this_actor_worked_with(colleague) for actor, colleague in zip(path, path[1:]))
+    assert graph.degrees_of_separation(Actor('Chris Pratt'), Actor('Meryl Streep')) == 3
+    assert graph.degrees_of_separation(Actor('Chris Pratt'), Actor('Zoe Saldana')) == 1
+    assert graph.degrees_of_separation(Actor('Chris Pratt'), Actor('Chris Pratt')) == 0
+    assert graph.degrees_of_separation(Actor('Chris Pratt'), Actor('Nobody')) is None
+
+
+def test_costar_graph_degrees_of_separation_match_breadth_first_search(in_memory_repo):
+    graph = in_memory_repo.get_costar_graph()
+    source = graph.get_actor(Actor('Chris Pratt'))
+
+    # Distances from a plain one-sided search.
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        actor = queue.popleft()
+        for colleague in actor.actor_colleagues:
+            if colleague not in distances:
+                distances[colleague] = distances[actor] + 1
+                queue.append(colleague)
+
+    for actor in list(in_memory_repo.get_actor())[:200]:
+        assert graph.degrees_of_separation(source, actor) == distances.get(actor)
+
+
+def test_repository_snapshot_keeps_co_stars(in_memory_repo, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    memory_repository.save_snapshot(snapshot_path, in_memory_repo)
+    repo = memory_repository.load_snapshot(snapshot_path)
+
+    bale = repo.get_costar_graph().get_actor(Actor('Christian Bale'))
+    assert bale.number_of_shared_movies(Actor('Michael Caine')) == 2
+    assert repo.get_costar_graph().degrees_of_separation(Actor('Chris Pratt'), Actor('Meryl Streep')) == 3
+
+
+def test_repository_precomputes_similar_movies(in_memory_repo):
+    interstellar = in_memory_repo.get_movie(37)
+    similar = in_memory_repo.get_similar_movies(interstellar, 3)
+
+    assert [movie.title for movie in similar] == ['The Martian', 'The Prestige', 'Inception']
+    assert interstellar not in in_memory_repo.get_similar_movies(interstellar)
+    assert len(in_memory_repo.get_similar_movies(interstellar)) == 10
+
+
+
+def test_similar_movies_are_the_same_across_blocks_and_processes(in_memory_repo, monkeypatch):
+    movies = in_memory_repo.get_movies()[:300]
+    expected = SimilarMovies(movies, neighbours=5, processes=1)
+
+    # Split the batch into many small blocks, handed to a pool of workers.
+    monkeypatch.setattr(similarity, 'PARALLEL_MIN_MOVIES', 0)
+    monkeypatch.setattr(similarity, 'BLOCK_SCORES', 300 * 16)
+    pooled = SimilarMovies(movies, neighbours=5, processes=2)
+
+    for movie in movies:
+        assert pooled.similar_to(movie) == expected.similar_to(movie)
+
+
+def test_repository_finds_similar_movies_for_added_movie(in_memory_repo):
+    interstellar = in_memory_repo.get_movie(37)
+    movie = Movie(1001, 'Interstellar II', interstellar.description, 2030, 169, 8.6, 1, None, None)
+    movie.director = interstellar.director
+    for actor in interstellar.actors:
+        movie.add_actor(actor)
+    for genre in interstellar.genres:
+        movie.add_genre(genre)
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_similar_movies(movie, 1) == [interstellar]
+    assert in_memory_repo.get_similar_movies(interstellar, 1) == [movie]
+
+
+def test_repository_records_watched_movies(in_memory_repo):
+    user = in_memory_repo.get_user('fmercury')
+    movie = in_memory_repo.get_movie(1)
+
+    in_memory_repo.add_to_watchlist(user, movie)
+    assert movie in user.watchlist
+
+    in_memory_repo.watch_movie(user, movie)
+    assert user.has_watched(movie)
+    assert movie not in user.watchlist
+
+
+def test_user_recommendations_update_incrementally(in_memory_repo):
+    user = in_memory_repo.get_user('fmercury')
+    recommendations = UserRecommendations(user, in_memory_repo)
+    assert recommendations.recommendations(5) == []
+
+    for rank in (37, 65, 81):
+        in_memory_repo.watch_movie(user, in_memory_repo.get_movie(rank))
+        recommendations.update(in_memory_repo.get_movie(rank))
+    in_memory_repo.add_to_watchlist(user, in_memory_repo.get_movie(1))
+    recommendations.update(in_memory_repo.get_movie(1))
+    in_memory_repo.add_to_watchlist(user, in_memory_repo.get_movie(2))
+    recommendations.update(in_memory_repo.get_movie(2))
+    in_memory_repo.remove_from_watchlist(user, in_memory_repo.get_movie(2))
+    recommendations.update(in_memory_repo.get_movie(2))
+
+    # The updated scores agree with scores built from scratch.
+    expected = UserRecommendations(user, in_memory_repo).recommendations(10)
+    assert recommendations.recommendations(10) == expected
+    assert len(expected) == 10
+    assert not any(user.has_watched(movie) or movie in user.watchlist for movie in expected)
+    assert expected[0].director.director_full_name == 'Christopher Nolan'
+
+
+def test_user_recommendations_updated_and_read_by_several_threads(in_memory_repo):
+    user = in_memory_repo.get_user('fmercury')
+    recommendations = UserRecommendations(user, in_memory_repo)
+    errors = list()
+
+    def watch(ranks):
+        try:
+            for rank in ranks:
+                movie = in_memory_repo.get_movie(rank)
+                in_memory_repo.watch_movie(user, movie)
+                recommendations.update(movie)
+                recommendations.recommendations(10)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=watch, args=(range(start, 200, 4),)) for start in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert recommendations.recommendations(10) == UserRecommendations(user, in_memory_repo).recommendations(10)
+
+
+def test_repository_publishes_a_new_catalogue_view_for_added_movies(in_memory_repo):
+    view = in_memory_repo.get_catalogue_view()
+    movies = in_memory_repo.get_movies()
+    assert isinstance(movies, tuple)
+
+    movie = Movie(1001, 'Some Movie', 'yes some movie', 2015, 100, 5.4, 1234, 543.3, 67)
+    movie.director = Director('Someone New')
+    in_memory_repo.add_movie(movie)
+
+    # The earlier view and tuple still hold the catalogue as it was.
+    assert in_memory_repo.get_catalogue_generation() == view.generation + 1
+    assert len(view) == len(movies) == 1000 and view.get_movie(1001) is None
+    assert in_memory_repo.get_movies()[-1] is movie
+    assert in_memory_repo.get_catalogue_view().neighbouring_ranks(1000) == (999, 1001)
+
+
+def test_repository_snapshot_keeps_catalogue_view(in_memory_repo, tmp_path):
+    snapshot_path = str(tmp_path / 'repository.pickle')
+    memory_repository.save_snapshot(snapshot_path, in_memory_repo)
+    repo = memory_repository.load_snapshot(snapshot_path)
+
+    assert repo.get_catalogue_generation() == in_memory_repo.get_catalogue_generation()
+    assert repo.get_movie(500).title == in_memory_repo.get_movie(500).title
+    assert repo.get_movies_page(998, 5)[0] == in_memory_repo.get_movies_page(998, 5)[0]
+
+
+def test_repository_stays_consistent_under_concurrent_reads_and_writes(in_memory_repo):
+    comments_before = len(in_memory_repo.get_comments())
+    number_of_movies = in_memory_repo.get_number_of_movies()
+    sci_fi = Genre('Sci-Fi')
+    query = MovieQuery(genres=[sci_fi], year=(2010, None), sort_by='rating', descending=True)
+    errors = list()
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            movies = in_memory_repo.get_movies()
+            assert [movie.rank for movie in movies] == sorted(movie.rank for movie in movies)
+            page, _, next_rank = in_memory_repo.get_movies_page(500, 10)
+            assert len(page) == 10 and next_rank is not None
+            assert all(sci_fi in movie.genres for movie in in_memory_repo.get_movie_by_genre(sci_fi))
+            assert all(movie.year >= 2010 for movie in in_memory_repo.query_movies(query))
+            assert in_memory_repo.search_movies('galaxy')
+            assert len(in_memory_repo.get_comments()) >= comments_before
+
+    def write_comments(writer):
+        for i in range(200):
+            user = User('writer{}'.format(writer), 'pw12345678')
+            in_memory_repo.add_user(user)
+            user = in_memory_repo.get_user(user.user_name)
+            movie = in_memory_repo.get_movie(1 + (writer * 200 + i) % number_of_movies)
+            in_memory_repo.add_comment(make_comment('comment {}'.format(i), user, movie))
+
+    def add_movies():
+        for rank in range(2001, 2101):
+            movie = Movie(rank, 'Stress Movie {}'.format(rank), 'galaxy', 2020, 90, 5.0, 100, 1.0, 50)
+            movie.director = Director('Stress Director')
+            movie.add_genre(sci_fi)
+            in_memory_repo.add_movie(movie)
+
+    def run(target, *args):
+        try:
+            target(*args)
+        except Exception as exception:  # Collected, as exceptions in threads don't fail the test by themselves.
+            errors.append(exception)
+            done.set()
+
+    readers = [threading.Thread(target=run, args=(read,)) for _ in range(4)]
+    writers = [threading.Thread(target=run, args=(write_comments, writer)) for writer in range(4)]
+    writers.append(threading.Thread(target=run, args=(add_movies,)))
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert len(in_memory_repo.get_comments()) == comments_before + 4 * 200
+    assert in_memory_repo.get_number_of_movies() == number_of_movies + 100
+    assert len(in_memory_repo.get_movie_by_director(Director('Stress Director'))) == 100
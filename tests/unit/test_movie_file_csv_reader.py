@@ -0,0 +1,56 @@
+import os
+
+from Movie.adapters.datafilereaders.movie_file_csv_reader import MovieFileCSVReader, read_movie_records
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.genre import Genre
+
+
+def test_read_movie_records_coerces_types(data_path):
+    record = next(read_movie_records(os.path.join(data_path, 'Data1000Movies.csv')))
+
+    assert record.rank == 1
+    assert record.title == 'Guardians of the Galaxy'
+    assert record.genres == ['Action', 'Adventure', 'Sci-Fi']
+    assert record.actors == ['Chris Pratt', 'Vin Diesel', 'Bradley Cooper', 'Zoe Saldana']
+    assert record.year == 2014
+    assert record.duration == 121
+    assert record.rating == 8.1
+    assert record.votes == 757074
+    assert record.revenue == 333.13
+    assert record.metascore == 76
+
+
+def test_read_movie_records_reads_missing_values_as_none(data_path):
+    records = {record.rank: record for record in read_movie_records(os.path.join(data_path, 'Data1000Movies.csv'))}
+
+    assert records[8].title == 'Mindhorn'
+    assert records[8].revenue is None
+    assert records[8].metascore == 71
+    assert records[26].revenue is None
+    assert records[26].metascore is None
+
+
+def test_reader_reads_movies_and_distinct_entities(data_path):
+    reader = MovieFileCSVReader(os.path.join(data_path, 'Data1000Movies.csv'))
+    reader.read_csv_file()
+
+    movies = reader.dataset_of_movies
+    assert len(movies) == 1000
+    assert movies[0].rank == 1
+    assert movies[0].title == 'Guardians of the Galaxy'
+    assert movies[0].director == Director('James Gunn')
+
+    assert len(reader.dataset_of_actors) == len(set(reader.dataset_of_actors))
+    assert len(reader.dataset_of_directors) == len(set(reader.dataset_of_directors))
+    assert len(reader.dataset_of_genres) == 20
+    assert Actor('Chris Pratt') in reader.dataset_of_actors
+    assert Genre('Sci-Fi') in reader.dataset_of_genres
+
+
+def test_reader_movies_share_canonical_entities(data_path):
+    reader = MovieFileCSVReader(os.path.join(data_path, 'Data1000Movies.csv'))
+    reader.read_csv_file()
+
+    actors = {id(actor) for movie in reader.dataset_of_movies for actor in movie.actors}
+    assert len(actors) == len(reader.dataset_of_actors)
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from Movie.adapters.rwlock import ReadWriteLock
+
+
+def test_readers_hold_the_lock_together():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.reading():
+            both_reading.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not both_reading.broken
+
+
+def test_writer_waits_for_readers_and_blocks_new_readers():
+    lock = ReadWriteLock()
+    events = list()
+
+    def write():
+        with lock.writing():
+            events.append('write')
+
+    def read():
+        with lock.reading():
+            events.append('read')
+
+    lock.acquire_read()
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(0.1)
+    # The writer is waiting for the read lock to be released, so a new reader queues behind it.
+    reader = threading.Thread(target=read)
+    reader.start()
+    reader.join(0.1)
+    assert events == []
+
+    lock.release_read()
+    writer.join()
+    reader.join()
+
+    assert events == ['write', 'read']
+
+
+def test_lock_is_reentrant_and_writers_may_read():
+    lock = ReadWriteLock()
+    written = list()
+
+    with lock.writing():
+        with lock.writing():
+            with lock.reading():
+                pass
+    with lock.reading():
+        with lock.reading():
+            pass
+
+    # Fully released, so another thread can write.
+    def write():
+        with lock.writing():
+            written.append(True)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(5)
+    assert written == [True]
+
+
+def test_read_lock_cannot_be_upgraded():
+    lock = ReadWriteLock()
+
+    with lock.reading():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
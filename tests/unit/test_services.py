@@ -6,6 +6,12 @@ from Movie.authentication.services import AuthenticationException
 from Movie.movie import services as news_services
 from Movie.authentication import services as auth_services
 from Movie.movie.services import NonExistentMovieException
+from Movie.search import services as search_services
+from Movie.stats import services as stats_services
+from Movie.actors import services as actors_services
+from Movie.adapters.sqlite_repository import SqliteRepository
+from Movie.recommendations import services as recommendation_services
+from Movie.domain.actor import Actor
 
 
 def test_can_add_user(in_memory_repo):
@@ -101,8 +107,8 @@ def test_can_get_movie(in_memory_repo):
     assert movie_as_dict['rating'] == 8.1
     assert len(movie_as_dict['comments']) == 3
     assert movie_as_dict['votes'] == 757074
-    assert movie_as_dict['revenue'] == '333.13'
-    assert movie_as_dict['metascore'] =='76'
+    assert movie_as_dict['revenue'] == 333.13
+    assert movie_as_dict['metascore'] == 76
 
 
 def test_cannot_get_movie_with_non_existent_rank(in_memory_repo):
@@ -137,6 +143,15 @@ def test_get_movies_by_rank_with_one_rank(in_memory_repo):
     assert next_rank == 2
 
 
+def test_get_movies_page(in_memory_repo):
+    movies_as_dict, prev_rank, next_rank = news_services.get_movies_page(2, 3, in_memory_repo)
+
+    assert [movie['rank'] for movie in movies_as_dict] == [2, 3, 4]
+    assert movies_as_dict[0]['title'] == 'Prometheus'
+    assert prev_rank == 1
+    assert next_rank == 5
+
+
 def test_get_comments_for_movie(in_memory_repo):
     comments_as_dict = news_services.get_comments_for_movie(1, in_memory_repo)
 
@@ -166,3 +181,169 @@ def test_get_comments_for_article_without_comments(in_memory_repo):
     comments_as_dict = news_services.get_comments_for_movie(4, in_memory_repo)
     assert len(comments_as_dict) == 0
 
+
+def test_cannot_add_user_with_existing_name_in_different_case(in_memory_repo):
+    with pytest.raises(auth_services.NameNotUniqueException):
+        auth_services.add_user('THorke', 'abcd1A23', in_memory_repo)
+
+
+def test_get_movie_is_served_from_cache(in_memory_repo):
+    news_services.get_movie(5, in_memory_repo)
+    stats = news_services.get_movie_cache_stats()
+
+    movie_as_dict = news_services.get_movie(5, in_memory_repo)
+
+    assert movie_as_dict['rank'] == 5
+    assert news_services.get_movie_cache_stats()['hits'] == stats['hits'] + 1
+    assert news_services.get_movie_cache_stats()['misses'] == stats['misses']
+
+
+def test_cached_movie_is_not_altered_by_callers(in_memory_repo):
+    movie_as_dict = news_services.get_movie(5, in_memory_repo)
+    movie_as_dict['view_comment_url'] = '/movies_by_rank?rank=5'
+
+    assert 'view_comment_url' not in news_services.get_movie(5, in_memory_repo)
+
+
+def test_adding_comment_invalidates_cached_movie(in_memory_repo):
+    assert len(news_services.get_movie(4, in_memory_repo)['comments']) == 0
+
+    news_services.add_comment(4, 'what a great movie', 'fmercury', in_memory_repo)
+    stats = news_services.get_movie_cache_stats()
+    movie_as_dict = news_services.get_movie(4, in_memory_repo)
+
+    assert [comment['comment_text'] for comment in movie_as_dict['comments']] == ['what a great movie']
+    assert news_services.get_movie_cache_stats()['misses'] == stats['misses'] + 1
+
+
+def test_search_movies(in_memory_repo):
+    movies_as_dict = search_services.search_movies('guardians galaxy', in_memory_repo, limit=2)
+
+    assert len(movies_as_dict) == 2
+    assert movies_as_dict[0]['title'] == 'Guardians of the Galaxy'
+
+
+def test_autocomplete(in_memory_repo):
+    completions = search_services.autocomplete('guardians', in_memory_repo)
+
+    assert completions['titles'][0] == {'rank': 1, 'title': 'Guardians of the Galaxy', 'year': 2014}
+
+
+def test_query_movies(in_memory_repo):
+    movies_as_dict = search_services.query_movies(
+        in_memory_repo, genres=['Sci-Fi'], director='Ridley Scott', sort_by='rating', descending=True)
+
+    assert [movie['title'] for movie in movies_as_dict] == ['The Martian', 'Prometheus']
+    assert movies_as_dict[0]['genres'] == ['Adventure', 'Drama', 'Sci-Fi']
+
+
+def test_get_analytics(in_memory_repo):
+    analytics = stats_services.get_analytics(in_memory_repo, genre='Action', year=(2010, 2016), rating=(7, None),
+                                             top_by='revenue', top_k=2)
+
+    assert analytics['number_of_movies'] > 0
+    assert analytics['mean_rating_by_genre']['Action'] >= 7
+    assert analytics['top_movies'] == [
+        {'rank': 51, 'title': 'Star Wars: Episode VII - The Force Awakens', 'revenue': 936.63},
+        {'rank': 86, 'title': 'Jurassic World', 'revenue': 652.18}]
+    assert set(analytics['movies_by_year']) <= set(range(2010, 2017))
+
+
+def test_get_analytics_with_unknown_attribute(in_memory_repo):
+    with pytest.raises(ValueError):
+        stats_services.get_analytics(in_memory_repo, top_by='colour')
+
+
+def test_get_catalogue_stats(in_memory_repo):
+    stats = stats_services.get_catalogue_stats(in_memory_repo, top_directors=2)
+
+    assert stats['number_of_movies'] == 1000
+    assert {'genre': 'Musical', 'movies': 5, 'mean_rating': pytest.approx(6.94), 'total_revenue': pytest.approx(408.21)} \
+        in stats['genres']
+    assert sum(stats['movies_by_year'].values()) == 1000
+    assert len(stats['top_directors']) == 2
+    assert stats['top_directors'][0]['director'] == 'Christopher Nolan'
+
+
+def test_worked_with(in_memory_repo):
+    result = actors_services.worked_with('Christian Bale', 'Michael Caine', in_memory_repo)
+    assert result == {'actor': 'Christian Bale', 'colleague': 'Michael Caine', 'worked_with': True,
+                      'shared_movies': 2}
+
+    with pytest.raises(actors_services.UnknownActorException):
+        actors_services.worked_with('Christian Bale', 'Nobody', in_memory_repo)
+
+
+def test_get_top_collaborators(in_memory_repo):
+    collaborators = actors_services.get_top_collaborators('Christian Bale', in_memory_repo, 2)
+    assert collaborators == [{'actor': 'Amy Adams', 'shared_movies': 2}, {'actor': 'Michael Caine', 'shared_movies': 2}]
+
+
+def test_get_degrees_of_separation(in_memory_repo):
+    result = actors_services.get_degrees_of_separation('Chris Pratt', 'Meryl Streep', in_memory_repo)
+
+    assert result['degrees'] == 3
+    assert [step['actor'] for step in result['path']][::3] == ['Chris Pratt', 'Meryl Streep']
+    for step, next_step in zip(result['path'], result['path'][1:]):
+        movie = in_memory_repo.get_movie(step['movie']['rank'])
+        assert Actor(step['actor']) in movie.actors and Actor(next_step['actor']) in movie.actors
+    assert result['path'][-1]['movie'] is None
+
+
+def test_get_similar_movies(in_memory_repo):
+    similar = news_services.get_similar_movies(37, in_memory_repo, 2)
+    assert similar == [{'rank': 103, 'title': 'The Martian', 'year': 2015},
+                       {'rank': 65, 'title': 'The Prestige', 'year': 2006}]
+
+    with pytest.raises(NonExistentMovieException):
+        news_services.get_similar_movies(5000, in_memory_repo)
+
+
+def test_recommendations_follow_watched_movies(in_memory_repo):
+    assert recommendation_services.get_recommendations('fmercury', in_memory_repo) == []
+
+    recommendation_services.watch_movie(37, 'fmercury', in_memory_repo)
+    recommendations = recommendation_services.get_recommendations('fmercury', in_memory_repo, 3)
+    assert len(recommendations) == 3
+    assert 37 not in [movie['rank'] for movie in recommendations]
+
+    # Watching the top recommendation drops it from the cached recommendations.
+    recommendation_services.watch_movie(recommendations[0]['rank'], 'fmercury', in_memory_repo)
+    updated = recommendation_services.get_recommendations('fmercury', in_memory_repo, 3)
+    assert recommendations[0] not in updated
+
+    history = recommendation_services.get_history('fmercury', in_memory_repo)
+    assert [movie['rank'] for movie in history['watched']] == [37, recommendations[0]['rank']]
+
+
+def test_recommendations_follow_another_workers_writes(sqlite_repo, tmp_path):
+    # SqliteRepository builds a fresh User for each read; the cached scores follow it rather than being rebuilt.
+    recommendation_services.watch_movie(37, 'fmercury', sqlite_repo)
+    recommendations = recommendation_services.get_recommendations('fmercury', sqlite_repo, 3)
+    cached = recommendation_services.recommendations_cache.get('fmercury')
+
+    other_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    try:
+        other_repo.watch_movie(other_repo.get_user('fmercury'), other_repo.get_movie(recommendations[0]['rank']))
+    finally:
+        other_repo.close()
+
+    updated = recommendation_services.get_recommendations('fmercury', sqlite_repo, 3)
+    assert recommendations[0] not in updated
+    assert recommendation_services.recommendations_cache.get('fmercury') is cached
+
+
+def test_movies_read_afresh_are_served_from_cache(sqlite_repo):
+    news_services.get_movie(5, sqlite_repo)
+    stats = news_services.get_movie_cache_stats()
+
+    assert news_services.get_movie(5, sqlite_repo)['rank'] == 5
+    assert news_services.get_movie_cache_stats()['hits'] == stats['hits'] + 1
+
+
+def test_watch_movie_with_unknown_movie_or_user(in_memory_repo):
+    with pytest.raises(NonExistentMovieException):
+        recommendation_services.watch_movie(5000, 'fmercury', in_memory_repo)
+
+    with pytest.raises(news_services.UnknownUserException):
+        recommendation_services.add_to_watchlist(1, 'nobody', in_memory_repo)
@@ -0,0 +1,192 @@
+import gc
+import os
+import pickle
+import weakref
+
+import numpy as np
+import pytest
+
+from Movie.domain.genre import Genre
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.comment import make_comment
+from Movie.domain.movie import Movie
+from Movie.adapters.repository import RepositoryException
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.shared_catalogue import SharedCatalogue, write_catalogue
+from Movie.adapters.shared_repository import populate_from_shared_catalogue
+from Movie.adapters.datafilereaders.movie_file_csv_reader import read_movie_records
+
+
+def test_repository_matches_memory_repository(shared_repo, in_memory_repo):
+    assert shared_repo.get_number_of_movies() == in_memory_repo.get_number_of_movies()
+    for movie, expected in zip(shared_repo.get_movies(), in_memory_repo.get_movies()):
+        assert (movie.rank, movie.title, movie.description) == (expected.rank, expected.title, expected.description)
+        assert (movie.year, movie.duration, movie.rating, movie.votes) == \
+               (expected.year, expected.duration, expected.rating, expected.votes)
+        assert (movie.revenue, movie.metascore) == (expected.revenue, expected.metascore)
+        assert movie.actors == expected.actors
+        assert movie.genres == expected.genres
+        assert movie.director == expected.director
+        assert movie.number_of_comments() == expected.number_of_comments()
+
+    assert shared_repo.get_first_movie() == in_memory_repo.get_first_movie()
+    assert shared_repo.get_last_movie() == in_memory_repo.get_last_movie()
+    assert shared_repo.get_movie(5000) is None
+
+
+def test_repository_builds_each_movie_once(shared_repo):
+    movie = shared_repo.get_movie(37)
+
+    assert shared_repo.get_movie(37) is movie
+    assert shared_repo.get_movies_page(37, 1)[0][0] is movie
+    assert all(other.director is movie.director for other in shared_repo.get_movie_by_director(movie.director))
+
+
+def test_repository_keeps_only_the_movies_something_refers_to(shared_repo):
+    # Movies nothing refers to are dropped and built again when next read.
+    unused = weakref.ref(shared_repo.get_movie(500))
+    shared_repo.get_movies_page(1, 10)
+    gc.collect()
+    assert unused() is None
+
+    # A movie carrying comments is kept by them, so readers always see the instance holding them.
+    movie = shared_repo.get_movie(501)
+    shared_repo.add_comment(make_comment('will watch it again', shared_repo.get_user('thorke'), movie))
+    commented = weakref.ref(movie)
+    del movie
+    gc.collect()
+    assert commented() is shared_repo.get_movie(501)
+    assert shared_repo.get_movie(501).number_of_comments() == 1
+
+
+def test_repository_pages_by_rank(shared_repo, in_memory_repo):
+    for start_rank, limit in ((None, 5), (1, 1), (37, 3), (998, 5), (1001, 5)):
+        assert shared_repo.get_movies_page(start_rank, limit) == in_memory_repo.get_movies_page(start_rank, limit)
+    assert shared_repo.get_movie_by_rank(12) == in_memory_repo.get_movie_by_rank(12)
+    with pytest.raises(ValueError):
+        shared_repo.get_movie_by_rank(1001)
+
+    movie = in_memory_repo.get_movie(500)
+    assert shared_repo.get_rank_of_previous_movie(movie) == 499
+    assert shared_repo.get_rank_of_next_movie(movie) == 501
+
+
+def test_repository_finds_movies_by_facet(shared_repo, in_memory_repo):
+    for genre in (Genre('Sci-Fi'), Genre('Musical'), Genre('Unknown')):
+        assert shared_repo.get_movie_by_genre(genre) == in_memory_repo.get_movie_by_genre(genre)
+    actor = Actor('Chris Pratt')
+    assert shared_repo.get_movie_by_actor(actor) == in_memory_repo.get_movie_by_actor(actor)
+    director = Director('Christopher Nolan')
+    assert shared_repo.get_movie_by_director(director) == in_memory_repo.get_movie_by_director(director)
+
+    assert sorted(genre.genre_name for genre in shared_repo.get_genre()) == \
+           sorted(genre.genre_name for genre in in_memory_repo.get_genre())
+    assert len(shared_repo.get_actor()) == len(in_memory_repo.get_actor())
+    assert len(shared_repo.get_director()) == len(in_memory_repo.get_director())
+
+
+def test_repository_indexes_the_catalogue(shared_repo, in_memory_repo):
+    assert shared_repo.search_movies('galaxy') == in_memory_repo.search_movies('galaxy')
+    query = MovieQuery(genres=[Genre('Sci-Fi')], year=(2010, None), sort_by='rating', descending=True)
+    assert shared_repo.query_movies(query) == in_memory_repo.query_movies(query)
+    assert shared_repo.get_catalogue_rollups().number_of_movies == 1000
+
+    # The indexes return the repository's own Movies.
+    assert shared_repo.search_movies('guardians galaxy', 1)[0] is shared_repo.get_movie(1)
+
+
+def test_repository_stores_comments_on_shared_movies(shared_repo):
+    user = shared_repo.get_user('thorke')
+    movie = shared_repo.get_movie(2)
+    comment = make_comment('will watch it again', user, movie)
+    shared_repo.add_comment(comment)
+
+    assert comment in shared_repo.get_comments()
+    assert comment in shared_repo.get_movie(2).comments
+
+
+def test_repository_catalogue_is_read_only(shared_repo):
+    movie = Movie(1001, 'Some Movie', 'yes some movie', 2015, 100, 5.4, 1234, 543.3, 67)
+
+    with pytest.raises(RepositoryException):
+        shared_repo.add_movie(movie)
+    with pytest.raises(RepositoryException):
+        shared_repo.add_movies([movie])
+    with pytest.raises(ValueError):
+        shared_repo.get_catalogue_view().catalogue.array('rank')[0] = 5
+
+
+def test_catalogue_file_is_reused_until_data_changes(data_path, tmp_path):
+    catalogue_path = str(tmp_path / 'movies.catalogue')
+    populate_from_shared_catalogue(data_path, catalogue_path)
+    written = os.path.getmtime(catalogue_path)
+
+    populate_from_shared_catalogue(data_path, catalogue_path)
+    assert os.path.getmtime(catalogue_path) == written
+
+    # A file in another format is rewritten.
+    with open(catalogue_path, mode='r+b') as outfile:
+        outfile.write(b'NOTACATA')
+    repo = populate_from_shared_catalogue(data_path, catalogue_path)
+    assert repo.get_movie(1).title == 'Guardians of the Galaxy'
+
+
+def test_catalogue_arrays_are_views_of_the_mapped_file(data_path, tmp_path):
+    catalogue_path = str(tmp_path / 'movies.catalogue')
+    write_catalogue(catalogue_path, read_movie_records(os.path.join(data_path, 'Data1000Movies.csv')))
+    catalogue = SharedCatalogue(catalogue_path)
+
+    ranks = catalogue.array('rank')
+    assert not ranks.flags.owndata and not ranks.flags.writeable
+    assert np.array_equal(ranks, np.arange(1, 1001))
+    assert catalogue.facet_names('genre') == sorted(catalogue.facet_names('genre'))
+    assert len(catalogue.facet_rows('director', 'Nobody At All')) == 0
+
+
+def test_forked_workers_share_the_catalogue(shared_repo):
+    # A worker forked after the catalogue is mapped reads it without loading the data files.
+    if not hasattr(os, 'fork'):
+        pytest.skip('fork is not available')
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        titles = [movie.title for movie in shared_repo.get_movies_page(998, 3)[0]]
+        os.write(write, pickle.dumps(titles))
+        os._exit(0)
+
+    os.close(write)
+    with os.fdopen(read, mode='rb') as infile:
+        titles = pickle.loads(infile.read())
+    os.waitpid(pid, 0)
+    assert titles == [movie.title for movie in shared_repo.get_movies_page(998, 3)[0]]
+
+
+def test_repository_serves_derived_reads_from_the_catalogue(shared_repo, in_memory_repo):
+    for rank in (1, 37, 500):
+        movie = in_memory_repo.get_movie(rank)
+        assert shared_repo.get_similar_movies(movie, 5) == in_memory_repo.get_similar_movies(movie, 5)
+    assert shared_repo.get_similar_movies(Movie(5000, 'Unknown', '', 2015, 100, 5.4, 1234, None, None)) == []
+
+    queries = (MovieQuery(), MovieQuery(sort_by='revenue', descending=True, limit=10),
+               MovieQuery(actors=[Actor('Chris Pratt')], sort_by='title', descending=True),
+               MovieQuery(director=Director('Christopher Nolan'), metascore=(70, None), sort_by='metascore'),
+               MovieQuery(genres=[Genre('Sci-Fi'), Genre('Action')], rating=(None, 7.5), sort_by='year', limit=3))
+    for query in queries:
+        assert shared_repo.query_movies(query) == in_memory_repo.query_movies(query)
+
+    columns, expected = shared_repo.get_movie_columns(), in_memory_repo.get_movie_columns()
+    mask = columns.range_mask('year', 2012, 2014)
+    assert columns.movies_at(columns.top_k('votes', 5, mask)) == expected.movies_at(expected.top_k('votes', 5, mask))
+    assert columns.mean_by_genre('rating', mask) == expected.mean_by_genre('rating', mask)
+    assert columns.total_by('year', 'revenue') == expected.total_by('year', 'revenue')
+
+    rollups, expected_rollups = shared_repo.get_catalogue_rollups(), in_memory_repo.get_catalogue_rollups()
+    assert rollups.genres() == expected_rollups.genres()
+    assert rollups.top_directors() == expected_rollups.top_directors()
+
+    assert shared_repo.autocomplete('gua') == in_memory_repo.autocomplete('gua')
+    assert shared_repo.autocomplete('gua')['titles'][0] is shared_repo.get_movie(1)
+    assert shared_repo.get_costar_graph().top_collaborators(Actor('Chris Pratt')) == \
+        in_memory_repo.get_costar_graph().top_collaborators(Actor('Chris Pratt'))
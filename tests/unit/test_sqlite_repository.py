@@ -0,0 +1,298 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from Movie.domain.genre import Genre
+from Movie.domain.actor import Actor
+from Movie.domain.director import Director
+from Movie.domain.comment import make_comment
+from Movie.domain.movie import Movie
+from Movie.domain.user import User
+from Movie.adapters.repository import RepositoryException
+from Movie.adapters.movie_query import MovieQuery
+from Movie.adapters.sqlite_repository import ConnectionPool, SqliteRepository
+
+
+def test_repository_can_add_a_user(sqlite_repo):
+    user = User('dave', '123456789')
+    sqlite_repo.add_user(user)
+
+    assert sqlite_repo.get_user('dave') == user
+    assert sqlite_repo.get_user(' Dave ').password == '123456789'
+    assert sqlite_repo.get_user('prince') is None
+
+
+def test_repository_keeps_the_first_user_with_a_name(sqlite_repo):
+    sqlite_repo.add_user(User('dave', 'first'))
+    sqlite_repo.add_user(User('Dave', 'second'))
+
+    assert sqlite_repo.get_user('dave').password == 'first'
+
+
+def test_repository_matches_memory_repository(sqlite_repo, in_memory_repo):
+    assert sqlite_repo.get_number_of_movies() == in_memory_repo.get_number_of_movies()
+    for rank in (1, 37, 500, 1000):
+        movie = sqlite_repo.get_movie(rank)
+        expected = in_memory_repo.get_movie(rank)
+        assert movie.title == expected.title
+        assert movie.actors == expected.actors
+        assert movie.genres == expected.genres
+        assert movie.director == expected.director
+        assert (movie.revenue, movie.metascore) == (expected.revenue, expected.metascore)
+
+    assert sqlite_repo.get_first_movie() == in_memory_repo.get_first_movie()
+    assert sqlite_repo.get_last_movie() == in_memory_repo.get_last_movie()
+    assert sqlite_repo.get_movie(5000) is None
+
+
+def test_repository_shares_instances_within_a_movie(sqlite_repo):
+    movies = sqlite_repo.get_movie_by_director(Director('Christopher Nolan'))
+
+    assert all(movie.director is movies[0].director for movie in movies)
+
+
+def test_repository_pages_by_rank(sqlite_repo, in_memory_repo):
+    for start_rank, limit in ((None, 5), (1, 1), (37, 3), (998, 5), (1001, 5)):
+        movies, previous_rank, next_rank = sqlite_repo.get_movies_page(start_rank, limit)
+        expected, expected_previous_rank, expected_next_rank = in_memory_repo.get_movies_page(start_rank, limit)
+        assert movies == expected
+        assert (previous_rank, next_rank) == (expected_previous_rank, expected_next_rank)
+
+    with pytest.raises(ValueError):
+        sqlite_repo.get_movies_page(1, 0)
+
+
+def test_repository_finds_neighbouring_ranks(sqlite_repo):
+    movie = sqlite_repo.get_movie(37)
+
+    assert sqlite_repo.get_rank_of_previous_movie(movie) == 36
+    assert sqlite_repo.get_rank_of_next_movie(movie) == 38
+    assert sqlite_repo.get_rank_of_previous_movie(sqlite_repo.get_first_movie()) is None
+
+
+def test_repository_rejects_a_missing_rank(sqlite_repo, in_memory_repo):
+    assert sqlite_repo.get_movie_by_rank(12) == in_memory_repo.get_movie_by_rank(12)
+
+    with pytest.raises(ValueError):
+        sqlite_repo.get_movie_by_rank(1001)
+
+
+def test_repository_finds_movies_by_facet(sqlite_repo, in_memory_repo):
+    assert sqlite_repo.get_movie_by_genre(Genre('Musical')) == in_memory_repo.get_movie_by_genre(Genre('Musical'))
+    assert sqlite_repo.get_movie_by_actor(Actor('Chris Pratt')) == in_memory_repo.get_movie_by_actor(Actor('Chris Pratt'))
+    assert sqlite_repo.get_movie_by_director(Director('Christopher Nolan')) == \
+        in_memory_repo.get_movie_by_director(Director('Christopher Nolan'))
+    assert sqlite_repo.get_movie_by_genre('Musical') == []
+
+
+def test_repository_queries_movies(sqlite_repo, in_memory_repo):
+    queries = (
+        MovieQuery(genres=[Genre('Action')], year=(2010, 2016), rating=(7, None), sort_by='revenue',
+                   descending=True, limit=10),
+        MovieQuery(actors=[Actor('Chris Pratt')], sort_by='title'),
+        MovieQuery(director=Director('Christopher Nolan'), sort_by='metascore', descending=True),
+        MovieQuery(revenue=(None, 1), sort_by='rating'),
+        MovieQuery(sort_by='metascore', limit=50)
+    )
+    for query in queries:
+        assert sqlite_repo.query_movies(query) == in_memory_repo.query_movies(query)
+
+
+def test_repository_can_add_movie(sqlite_repo):
+    generation = sqlite_repo.get_catalogue_generation()
+    movie = Movie(1001, 'Some Movie', 'yes some movie', 2015, 100, 5.4, 1234, 543.3, 67)
+    movie.director = Director('Someone New')
+    movie.add_actor(Actor('Chris Pratt'))
+    movie.add_genre(Genre('Musical'))
+    sqlite_repo.add_movie(movie)
+    assert sqlite_repo.get_catalogue_generation() > generation
+
+    stored = sqlite_repo.get_movie(1001)
+    assert stored.title == 'Some Movie'
+    assert stored.director == Director('Someone New')
+    assert stored in sqlite_repo.get_movie_by_actor(Actor('Chris Pratt'))
+
+    # The catalogue indexes are rebuilt to include the new movie.
+    assert sqlite_repo.search_movies('Some Movie', 1) == [stored]
+    assert sqlite_repo.get_catalogue_rollups().number_of_movies == 1001
+
+
+def test_repository_stores_comments(sqlite_repo):
+    user = sqlite_repo.get_user('fmercury')
+    movie = sqlite_repo.get_movie(1)
+    comment = make_comment('A classic', user, movie, datetime(2020, 3, 4, 5, 6, 7))
+    sqlite_repo.add_comment(comment)
+
+    stored = [comment.comment for comment in sqlite_repo.get_movie(1).comments]
+    assert stored[-1] == 'A classic'
+    assert [comment.comment for comment in sqlite_repo.get_user('fmercury').comments][-1] == 'A classic'
+    assert sqlite_repo.get_comments()[-1] == comment
+
+
+def test_repository_does_not_add_a_comment_without_a_user(sqlite_repo):
+    movie = sqlite_repo.get_movie(1)
+    comment = make_comment('A classic', User('nobody', 'password'), movie)
+    comment._user = None
+
+    with pytest.raises(RepositoryException):
+        sqlite_repo.add_comment(comment)
+
+
+def test_repository_records_watched_movies(sqlite_repo):
+    user = sqlite_repo.get_user('fmercury')
+    sqlite_repo.add_to_watchlist(user, sqlite_repo.get_movie(2))
+    sqlite_repo.add_to_watchlist(user, sqlite_repo.get_movie(1))
+    sqlite_repo.watch_movie(user, sqlite_repo.get_movie(1))
+
+    stored = sqlite_repo.get_user('fmercury')
+    assert stored.watched_movies == [sqlite_repo.get_movie(1)]
+    assert stored.time_spent_watching_movies_minutes == 121
+    assert list(stored.watchlist) == [sqlite_repo.get_movie(2)]
+
+
+def test_repository_indexes_the_catalogue(sqlite_repo, in_memory_repo):
+    assert sqlite_repo.search_movies('space', 5) == in_memory_repo.search_movies('space', 5)
+    assert sqlite_repo.autocomplete('chri', 3) == in_memory_repo.autocomplete('chri', 3)
+    assert sqlite_repo.get_similar_movies(Movie(37, None, None, None, None, None, None), 5) == \
+        in_memory_repo.get_similar_movies(in_memory_repo.get_movie(37), 5)
+    assert sqlite_repo.get_costar_graph().degrees_of_separation(Actor('Chris Pratt'), Actor('Meryl Streep')) == 3
+    assert len(sqlite_repo.get_movie_columns()) == 1000
+
+
+def test_repository_lists_people_and_genres(sqlite_repo, in_memory_repo):
+    assert set(sqlite_repo.get_actor()) == set(in_memory_repo.get_actor())
+    assert set(sqlite_repo.get_director()) == set(in_memory_repo.get_director())
+    assert set(sqlite_repo.get_genre()) == set(in_memory_repo.get_genre())
+
+    actor = Actor('Someone New')
+    assert sqlite_repo.add_actor(actor) is actor
+    assert sqlite_repo.add_actor(Actor('Someone New')) is actor
+    assert actor in sqlite_repo.get_actor()
+
+
+def test_repositories_share_one_database(sqlite_repo, tmp_path):
+    # A second repository on the same file, as another worker process would have, sees writes made through the first.
+    other_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    try:
+        other_repo.add_user(User('dave', '123456789'))
+        user = other_repo.get_user('dave')
+        other_repo.add_comment(make_comment('Loved it', user, other_repo.get_movie(3)))
+
+        assert sqlite_repo.get_user('dave') == user
+        assert [comment.comment for comment in sqlite_repo.get_movie(3).comments] == ['Loved it']
+    finally:
+        other_repo.close()
+
+
+def test_writes_from_another_repository_advance_the_generation(sqlite_repo, tmp_path):
+    # Caches keyed on the generation in one worker must miss once another worker writes.
+    other_repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    try:
+        generation = sqlite_repo.get_catalogue_generation()
+        other_repo.add_user(User('dave', '123456789'))
+        assert sqlite_repo.get_catalogue_generation() > generation
+
+        generation = sqlite_repo.get_catalogue_generation()
+        other_repo.add_comment(make_comment('Loved it', other_repo.get_user('dave'), other_repo.get_movie(3)))
+        assert sqlite_repo.get_catalogue_generation() > generation
+    finally:
+        other_repo.close()
+
+
+def test_repository_gives_each_thread_a_connection(sqlite_repo):
+    results = list()
+
+    def read_movies():
+        results.append(sqlite_repo.get_movies_page(1, 10)[0])
+
+    threads = [threading.Thread(target=read_movies) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert all(movies == results[0] for movies in results)
+
+
+def test_workers_starting_together_populate_the_database_once(data_path, tmp_path):
+    # Each thread opens its own repository on an empty database, as worker processes starting together would.
+    database_path = str(tmp_path / 'fresh.sqlite3')
+    populated = list()
+    errors = list()
+
+    def start_worker():
+        repo = SqliteRepository(database_path)
+        try:
+            populated.append(repo.populate_if_empty(data_path))
+        except Exception as exception:
+            errors.append(exception)
+        finally:
+            repo.close()
+
+    threads = [threading.Thread(target=start_worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(populated) == [False, False, False, True]
+    repo = SqliteRepository(database_path)
+    try:
+        assert repo.get_number_of_movies() == 1000
+        assert len(repo.get_comments()) == 4
+    finally:
+        repo.close()
+
+
+def test_pool_reuses_connections_released_by_finished_threads(tmp_path):
+    # A server may start a thread for every request; each hands its connection back when the request ends.
+    pool = ConnectionPool(str(tmp_path / 'pool.sqlite3'), max_idle=2)
+    connections = set()
+
+    def handle_request():
+        connection = pool.connection()
+        connection.execute('SELECT 1')
+        connections.add(id(connection))
+        pool.release()
+
+    try:
+        for _ in range(20):
+            thread = threading.Thread(target=handle_request)
+            thread.start()
+            thread.join()
+        assert len(pool) == 1
+        assert len(connections) == 1
+
+        # Connections released beyond max_idle are closed.
+        start = threading.Barrier(4)
+
+        def handle_concurrent_request():
+            pool.connection()
+            start.wait()
+            pool.release()
+
+        threads = [threading.Thread(target=handle_concurrent_request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(pool) == 2
+    finally:
+        pool.close()
+
+
+def test_released_connection_rolls_back_an_open_transaction(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.sqlite3'))
+    try:
+        connection = pool.connection()
+        connection.execute('CREATE TABLE numbers (number INTEGER)')
+        connection.commit()
+        connection.execute('INSERT INTO numbers VALUES (1)')
+        pool.release()
+
+        assert pool.connection().execute('SELECT COUNT(*) FROM numbers').fetchone()[0] == 0
+    finally:
+        pool.close()